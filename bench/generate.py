@@ -0,0 +1,151 @@
+"""
+Generates synthetic ROS launch files and matching library configs (the input of UpdateLibrary) of a given size,
+so the plugins can be benchmarked on models built from the ROSLaunch seed.
+"""
+import json
+import random
+from xml.sax.saxutils import quoteattr
+
+
+class LaunchSpec(object):
+    """Size of a generated launch model"""
+
+    def __init__(self, nodes: int = 20, depth: int = 2, pubs: int = 2, subs: int = 2, remap_density: float = 0.2,
+                 arg_chain: int = 3, includes: int = 2, seed: int = 0):
+        """
+        Args:
+            nodes (int, optional): Number of node tags. Defaults to 20.
+            depth (int, optional): Nesting depth of the groups, 0 for no groups. Defaults to 2.
+            pubs (int, optional): Publishers per node type. Defaults to 2.
+            subs (int, optional): Subscribers per node type. Defaults to 2.
+            remap_density (float, optional): Share of the nodes with a remap. Defaults to 0.2.
+            arg_chain (int, optional): Length of the chain of args that depend on the previous one. Defaults to 3.
+            includes (int, optional): Number of include tags. Defaults to 2.
+            seed (int, optional): Seed of the random choices. Defaults to 0.
+        """
+        self.nodes = nodes
+        self.depth = depth
+        self.pubs = pubs
+        self.subs = subs
+        self.remap_density = remap_density
+        self.arg_chain = arg_chain
+        self.includes = includes
+        self.seed = seed
+
+    @property
+    def label(self) -> str:
+        return f"n{self.nodes}-d{self.depth}-p{self.pubs}-s{self.subs}-r{self.remap_density}-a{self.arg_chain}-i{self.includes}"
+
+    def to_json(self) -> dict:
+        return dict(vars(self), label=self.label)
+
+
+def _topics(spec: LaunchSpec) -> list:
+    # Roughly one publisher per topic, so most topics connect several nodes
+    return [f"topic_{i}" for i in range(max(1, spec.nodes * max(spec.pubs, 1) // 2))]
+
+
+def _node_types(spec: LaunchSpec) -> list:
+    return [f"node_type_{i}" for i in range(max(1, spec.nodes // 2))]
+
+
+def generate_library(spec: LaunchSpec) -> str:
+    """Generates the library config of the node types and include files used by generate_launch
+
+    Args:
+        spec (LaunchSpec): Size of the model
+
+    Returns:
+        str: Library config in the format read by UpdateLibrary
+    """
+    rng = random.Random(spec.seed)
+    topics = _topics(spec)
+
+    nodes = [
+        {
+            "node": node_type,
+            "publishers": rng.sample(topics, min(spec.pubs, len(topics))) or None,
+            "subscribers": rng.sample(topics, min(spec.subs, len(topics))) or None
+        }
+        for node_type in _node_types(spec)
+    ]
+
+    launch_files = [
+        {
+            "relative_path": f"launch/include_{i}.launch",
+            "nodes": [{
+                "node": f"included_{i}",
+                "publishers": rng.sample(topics, min(spec.pubs, len(topics))) or None,
+                "subscribers": rng.sample(topics, min(spec.subs, len(topics))) or None
+            }]
+        }
+        for i in range(spec.includes)
+    ]
+
+    return json.dumps([{"package": "bench_pkg", "nodes": nodes, "launch_files": launch_files}], indent=1)
+
+
+def generate_launch(spec: LaunchSpec) -> str:
+    """Generates a launch file of the given size
+
+    Args:
+        spec (LaunchSpec): Size of the model
+
+    Returns:
+        str: Launch file
+    """
+    rng = random.Random(spec.seed + 1)
+    topics = _topics(spec)
+    node_types = _node_types(spec)
+    lines = ["<launch>"]
+
+    # Each arg of the chain refers to the one before
+    for i in range(spec.arg_chain):
+        default = f"$(arg arg_{i - 1})_{i}" if i else "base"
+        lines.append(f'  <arg name="arg_{i}" default={quoteattr(default)}/>')
+    ns_arg = f"$(arg arg_{spec.arg_chain - 1})" if spec.arg_chain else "bench"
+
+    # Two nested chains of groups, the nodes are spread over the launch file and all groups
+    containers = [[]]
+    for branch in range(2 if spec.depth else 0):
+        parent = containers[0]
+        for level in range(spec.depth):
+            group = {"ns": f"g{branch}_{level}", "children": []}
+            parent.append(group)
+            containers.append(group["children"])
+            parent = group["children"]
+
+    for i in range(spec.nodes):
+        container = containers[i % len(containers)]
+        node = {"name": f"node_{i}", "type": rng.choice(node_types), "remaps": []}
+        if rng.random() < spec.remap_density:
+            node["remaps"].append((rng.choice(topics), rng.choice(topics)))
+        if i % 5 == 0:
+            node["ns"] = ns_arg
+        container.append(node)
+
+    for i in range(spec.includes):
+        containers[i % len(containers)].append({"include": i})
+
+    # Explicit stack, so deep models do not hit the recursion limit. Items are tags or closing lines.
+    stack = [(item, "  ") for item in reversed(containers[0])]
+    while stack:
+        item, indent = stack.pop()
+        if isinstance(item, str):
+            lines.append(item)
+        elif "children" in item:
+            lines.append(f'{indent}<group ns={quoteattr(item["ns"])}>')
+            stack.append((f"{indent}</group>", indent))
+            stack.extend((child, indent + "  ") for child in reversed(item["children"]))
+        elif "include" in item:
+            lines.append(f'{indent}<include file="$(find bench_pkg)/launch/include_{item["include"]}.launch"/>')
+        else:
+            ns = f' ns={quoteattr(item["ns"])}' if "ns" in item else ""
+            lines.append(f'{indent}<node pkg="bench_pkg" type={quoteattr(item["type"])} '
+                         f'name={quoteattr(item["name"])}{ns}>')
+            for remap_from, remap_to in item["remaps"]:
+                lines.append(f'{indent}  <remap from={quoteattr(remap_from)} to={quoteattr(remap_to)}/>')
+            lines.append(f"{indent}</node>")
+
+    lines.append("</launch>")
+    return "\n".join(lines) + "\n"
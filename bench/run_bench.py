@@ -0,0 +1,238 @@
+"""
+Times the five python plugins on generated launch models of growing size. For every size a fresh branch is made from
+the seed project, then UpdateLibrary, ImportLaunch, MakeConnections, ErrorChecking and ExportLaunch run on it in turn.
+Usage: python bench/run_bench.py PROJECT [--offline] [--sweep DIMENSION=V1,V2,...] [--nodes N] ... [--json FILE]
+Notes:
+ - PROJECT must be a project created from the ROSLaunch seed (src/seeds/ROSLaunch), its master branch is not modified.
+ - Like the run_debug.py scripts this starts bin/corezmq_server.js and must run with the root of the repository as cwd.
+ - With --offline PROJECT is a .webgmex export or snapshot instead, e.g. src/seeds/ROSLaunch/ROSLaunch.webgmex, and
+   the model is kept in memory (launch_common/offline.py): no node, no mongo and no serialization in the timings.
+ - The config and files the plugins ask for are answered here, so no plugin manager is involved and the numbers only
+   cover the python side and its bridge calls. --profile adds the bridge call counts of each plugin (see profileRpc).
+"""
+
+import argparse
+import atexit
+import base64
+import importlib
+import io
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import zipfile
+
+from webgme_bindings import WebGME
+
+from generate import LaunchSpec, generate_launch, generate_library
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PLUGINS_DIR = os.path.join(ROOT_DIR, 'src', 'plugins')
+
+# Shared python modules live in src/common
+sys.path.append(os.path.join(ROOT_DIR, 'src', 'common'))
+from launch_common import find_free_port
+from launch_common.offline import OfflineWebGME
+
+# In the order they are used on a model
+PLUGINS = ['UpdateLibrary', 'ImportLaunch', 'MakeConnections', 'ErrorChecking', 'ExportLaunch']
+
+# Dimensions of LaunchSpec that can be swept and how their values are parsed
+DIMENSIONS = {
+    'nodes': int,
+    'depth': int,
+    'pubs': int,
+    'subs': int,
+    'remap_density': float,
+    'arg_chain': int,
+    'includes': int
+}
+
+logger = logging.getLogger('bench')
+
+
+def load_plugin(name: str):
+    """Imports the plugin class of the given plugin"""
+    plugin_dir = os.path.join(PLUGINS_DIR, name)
+    if plugin_dir not in sys.path:
+        sys.path.append(plugin_dir)
+    module = importlib.import_module(name)
+    # The plugins log every step on INFO, which would dominate the timings
+    logging.getLogger(name).setLevel(logging.WARNING)
+    return getattr(module, name)
+
+
+class PluginRequests(object):
+    """Answers the requests a plugin makes to its plugin manager (config, input and output files)"""
+
+    def __init__(self):
+        self.config = {}
+        self.files = {}
+        self.added = {}
+
+    def put_file(self, name: str, content) -> str:
+        """Stores an input file and returns the hash to put in the config"""
+        file_hash = f"bench:{name}"
+        self.files[file_hash] = content
+        return file_hash
+
+    def __call__(self, payload: dict):
+        name = payload['name']
+        args = payload['args']
+        if name == 'getCurrentConfig':
+            return self.config
+        if name == 'getFile':
+            return self.files[args[0]]
+        if name == 'getBinFile':
+            # Binary files travel base64 encoded, like from the plugin manager
+            content = self.files[args[0]]
+            content = content if isinstance(content, bytes) else content.encode('utf-8')
+            if len(args) > 1 and args[1]:
+                with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                    content = archive.read(args[1])
+            return base64.b64encode(content).decode('utf-8')
+        if name in ('addFile', 'addArtifact'):
+            self.added[args[0]] = args[1]
+            return self.put_file(args[0], args[1])
+        if name in ('sendNotification', 'createMessage', 'resultSetSuccess', 'resultSetError'):
+            return None
+        raise NotImplementedError(f"Plugin request {name} is not available in the benchmark")
+
+
+def run_plugin(webgme: WebGME, plugin_class, branch: str, active_node: str, requests: PluginRequests) -> float:
+    """Runs one plugin on the head of the branch
+
+    Returns:
+        float: Seconds taken, from loading the root to the end of main
+    """
+    start = time.perf_counter()
+    commit_hash = webgme.project.get_branch_hash(branch)
+    plugin = plugin_class(webgme, commit_hash, branch, active_node, [], '')
+    plugin._send = requests
+    plugin.main()
+    return time.perf_counter() - start
+
+
+def run_spec(webgme: WebGME, spec: LaunchSpec, branch: str, profile: bool) -> dict:
+    """Runs all plugins on a model generated from spec, on a new branch
+
+    Returns:
+        dict: The spec and the seconds (and bridge calls when profiling) per plugin
+    """
+    requests = PluginRequests()
+    result = {"spec": spec.to_json(), "seconds": {}, "bridge_calls": {}}
+    webgme.project.create_branch(branch, webgme.project.get_branch_hash('master'))
+    try:
+        for name in PLUGINS:
+            plugin_class = load_plugin(name)
+            requests.config = {"profileRpc": profile}
+            active_node = ''
+            if name == 'UpdateLibrary':
+                requests.config["file"] = requests.put_file("library.json", generate_library(spec))
+            elif name == 'ImportLaunch':
+                requests.config["file"] = requests.put_file("bench.launch", generate_launch(spec))
+                root = webgme.core.load_root(webgme.project.get_root_hash(webgme.project.get_branch_hash(branch)))
+                before = set(webgme.core.get_children_paths(root))
+            else:
+                active_node = launch_file
+
+            result["seconds"][name] = run_plugin(webgme, plugin_class, branch, active_node, requests)
+
+            if name == 'ImportLaunch':
+                root = webgme.core.load_root(webgme.project.get_root_hash(webgme.project.get_branch_hash(branch)))
+                launch_file = (set(webgme.core.get_children_paths(root)) - before).pop()
+            if profile:
+                report = json.loads(requests.added[f"{name}_rpc_profile.json"])
+                result["bridge_calls"][name] = report["bridge_calls"]
+    finally:
+        webgme.project.delete_branch(branch, webgme.project.get_branch_hash(branch))
+    return result
+
+
+def format_table(results: list, profile: bool) -> str:
+    """Returns the results as a text table, one row per size"""
+    width = max([len(result["spec"]["label"]) for result in results] + [4])
+    lines = [f"{'spec':<{width}} " + " ".join(f"{name:>15}" for name in PLUGINS) + f" {'total':>9}"]
+    for result in results:
+        cells = []
+        for name in PLUGINS:
+            cell = f"{result['seconds'][name]:.3f}s"
+            if profile:
+                cell += f"/{result['bridge_calls'][name]}"
+            cells.append(f"{cell:>15}")
+        lines.append(f"{result['spec']['label']:<{width}} " + " ".join(cells) +
+                     f" {sum(result['seconds'].values()):>8.3f}s")
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('project', help='name of a project created from the ROSLaunch seed')
+    parser.add_argument('--offline', action='store_true', help='PROJECT is a .webgmex export or snapshot to run on '
+                                                                'in memory')
+    parser.add_argument('--sweep', action='append', default=[],
+                        help='DIMENSION=V1,V2,... to run one model per value, the other dimensions keep their '
+                             'value (may be repeated, defaults to nodes=10,50,200)')
+    for dimension, parse in DIMENSIONS.items():
+        parser.add_argument(f"--{dimension.replace('_', '-')}", type=parse, dest=dimension)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per size, the fastest is kept')
+    parser.add_argument('--profile', action='store_true', help='count the bridge calls of each plugin')
+    parser.add_argument('--json', help='file to write the results to')
+    return parser.parse_args()
+
+
+def build_specs(args) -> list:
+    base = {dimension: getattr(args, dimension) for dimension in DIMENSIONS if getattr(args, dimension) is not None}
+    specs = []
+    for sweep in args.sweep or ['nodes=10,50,200']:
+        dimension, _, values = sweep.partition('=')
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension}, expected one of {', '.join(DIMENSIONS)}")
+        for value in values.split(','):
+            specs.append(LaunchSpec(**dict(base, **{dimension: DIMENSIONS[dimension](value)}), seed=args.seed))
+    return specs
+
+
+def main():
+    args = parse_args()
+    specs = build_specs(args)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.offline:
+        webgme = OfflineWebGME.open(args.project, logger)
+    else:
+        port = str(find_free_port())
+        corezmq_server_file = os.path.join(os.getcwd(), 'node_modules', 'webgme-bindings', 'bin', 'corezmq_server.js')
+        if not os.path.isfile(corezmq_server_file):
+            corezmq_server_file = os.path.join(os.getcwd(), 'bin', 'corezmq_server.js')
+
+        node_process = subprocess.Popen(['node', corezmq_server_file, args.project, '-p', port],
+                                        stdout=sys.stdout, stderr=sys.stderr)
+        webgme = WebGME(port, logger)
+
+        def exit_handler():
+            webgme.disconnect()
+            node_process.send_signal(signal.SIGTERM)
+
+        atexit.register(exit_handler)
+
+    results = []
+    for index, spec in enumerate(specs):
+        runs = [run_spec(webgme, spec, f"bench-{os.getpid()}-{index}-{run}", args.profile)
+                for run in range(args.repeat)]
+        best = min(runs, key=lambda run: sum(run["seconds"].values()))
+        logger.info(f"{spec.label}: {sum(best['seconds'].values()):.3f}s")
+        results.append(best)
+
+    print(format_table(results, args.profile))
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=4)
+
+
+if __name__ == '__main__':
+    main()
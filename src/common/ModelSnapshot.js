@@ -0,0 +1,170 @@
+/* globals define */
+/* eslint-env node */
+
+/**
+ * Dumps the subtree of the active node (paths, bases, attributes, pointers and parent/child links) into a json file,
+ * so the python side of a plugin can load the model in one go instead of one coreZMQ round trip per call.
+ * The file is read by launch_common.ModelSnapshot (src/common/launch_common/snapshot.py).
+ */
+
+define([], function () {
+    'use strict';
+
+    const fs = require('fs');
+    const os = require('os');
+    const path = require('path');
+    const crypto = require('crypto');
+
+    // Names of the LaunchFile nodes that hold the libraries, same as LIBRARY_NAMES in launch_common/meta.py
+    const LIBRARY_NAMES = ['NodeLibrary', 'TestLibrary', 'IncludeLibrary'];
+
+    /**
+     * Loads the nodes to dump: the whole subtree of node, or only the subtrees of the children with the given names.
+     * @param {object} core - the core of the plugin
+     * @param {object} node - root of the subtree
+     * @param {string[]} [names] - names of the children whose subtree is loaded, all children if not given
+     * @returns {Promise<object>} the nodes with their subtree and the children loaded without it
+     */
+    function loadNodes(core, node, names) {
+        if (!names) {
+            return core.loadSubTree(node)
+                .then((nodes) => {
+                    return {nodes: nodes, shallow: []};
+                });
+        }
+
+        return core.loadChildren(node)
+            .then((children) => {
+                const named = children.filter((child) => names.indexOf(core.getAttribute(child, 'name')) !== -1);
+                const shallow = children.filter((child) => named.indexOf(child) === -1);
+                const shallowPaths = shallow.map((child) => core.getPath(child));
+                const metaNodes = core.getAllMetaNodes(node);
+
+                // New nodes are created from the meta nodes, their values are read as well
+                Object.keys(metaNodes).forEach((metaPath) => {
+                    if (shallowPaths.indexOf(metaPath) === -1 &&
+                        !named.some((child) => metaPath.indexOf(core.getPath(child) + '/') === 0)) {
+                        shallow.push(metaNodes[metaPath]);
+                    }
+                });
+
+                return Promise.all(named.map((child) => core.loadSubTree(child)))
+                    .then((subTrees) => {
+                        return {
+                            nodes: subTrees.reduce((all, subTree) => all.concat(subTree), [node]),
+                            shallow: shallow
+                        };
+                    });
+            });
+    }
+
+    /**
+     * Collects the data of every node in the subtree of node.
+     * @param {object} core - the core of the plugin
+     * @param {object} node - root of the subtree
+     * @param {string[]} [names] - only dump the subtrees of the children with these names, e.g. LIBRARY_NAMES.
+     * The other children and the meta nodes are dumped without their children (null), the python side loads them on
+     * first use.
+     * @returns {Promise<object>} the dump
+     */
+    function collect(core, node, names) {
+        return loadNodes(core, node, names)
+            .then((loaded) => {
+                const nodes = loaded.nodes.concat(loaded.shallow);
+                const result = {
+                    rootPath: core.getPath(node),
+                    nodes: [],
+                    // Bases outside the subtree, only their names are needed to resolve types
+                    bases: {}
+                };
+                const inSubTree = {};
+
+                nodes.forEach((n) => {
+                    inSubTree[core.getPath(n)] = true;
+                });
+
+                nodes.forEach((n) => {
+                    const base = core.getBase(n);
+                    const entry = {
+                        path: core.getPath(n),
+                        base: base ? core.getPath(base) : null,
+                        hash: core.getHash(n),
+                        attributes: {},
+                        pointers: {},
+                        children: loaded.shallow.indexOf(n) === -1 ? core.getChildrenPaths(n) : null
+                    };
+
+                    core.getAttributeNames(n).forEach((name) => {
+                        entry.attributes[name] = core.getAttribute(n, name);
+                    });
+
+                    core.getPointerNames(n).forEach((name) => {
+                        if (name !== 'base') {
+                            entry.pointers[name] = core.getPointerPath(n, name);
+                        }
+                    });
+
+                    let current = base;
+                    while (current && !inSubTree[core.getPath(current)] && !result.bases[core.getPath(current)]) {
+                        const next = core.getBase(current);
+                        result.bases[core.getPath(current)] = {
+                            name: core.getAttribute(current, 'name'),
+                            base: next ? core.getPath(next) : null
+                        };
+                        current = next;
+                    }
+
+                    result.nodes.push(entry);
+                });
+
+                return result;
+            });
+    }
+
+    /**
+     * Writes the dump of the subtree of node into a new temporary file.
+     * @param {object} core - the core of the plugin
+     * @param {object} node - root of the subtree
+     * @param {string[]} [names] - only dump the subtrees of the children with these names, see collect
+     * @returns {Promise<string>} path to the written file
+     */
+    function write(core, node, names) {
+        const fileName = path.join(os.tmpdir(), `webgme_snapshot_${crypto.randomBytes(8).toString('hex')}.json`);
+
+        return collect(core, node, names)
+            .then((data) => {
+                return new Promise((resolve, reject) => {
+                    fs.writeFile(fileName, JSON.stringify(data), (err) => {
+                        if (err) {
+                            reject(err);
+                        } else {
+                            resolve(fileName);
+                        }
+                    });
+                });
+            });
+    }
+
+    /**
+     * Removes a file written by write, errors are ignored.
+     * @param {string|null} fileName - path returned by write
+     * @returns {Promise}
+     */
+    function remove(fileName) {
+        return new Promise((resolve) => {
+            if (!fileName) {
+                resolve();
+                return;
+            }
+
+            fs.unlink(fileName, () => resolve());
+        });
+    }
+
+    return {
+        LIBRARY_NAMES: LIBRARY_NAMES,
+        collect: collect,
+        write: write,
+        remove: remove
+    };
+});
@@ -0,0 +1,121 @@
+/* globals define */
+/* eslint-env node */
+
+/**
+ * Hands out ports for the CoreZMQ servers of the plugins, so concurrent executions on the same server never try
+ * the same port and executions in other processes are skipped over instead of failing.
+ * The first port tried can be changed with the COREZMQ_START_PORT environment variable.
+ */
+
+define([], function () {
+    'use strict';
+
+    const net = require('net');
+
+    const MAX_ATTEMPTS = 20;
+    const MAX_PORT = 65535;
+
+    // Ports handed out to executions in this process that are still running
+    const reserved = new Set();
+
+    /**
+     * Checks whether nothing listens on the port.
+     * @param {number} port
+     * @returns {Promise<boolean>}
+     */
+    function isFree(port) {
+        return new Promise((resolve) => {
+            const server = net.createServer();
+            server.once('error', () => resolve(false));
+            server.once('listening', () => server.close(() => resolve(true)));
+            server.listen(port, '127.0.0.1');
+        });
+    }
+
+    /**
+     * Reserves the first free port from startPort on.
+     * @param {number} startPort
+     * @returns {Promise<number>}
+     */
+    function acquire(startPort) {
+        let port = startPort;
+        while (reserved.has(port)) {
+            port += 1;
+        }
+
+        if (port > MAX_PORT) {
+            return Promise.reject(new Error(`No free port from ${startPort} on.`));
+        }
+
+        // Reserved before probing so concurrent executions skip it right away
+        reserved.add(port);
+        return isFree(port)
+            .then((free) => {
+                if (free) {
+                    return port;
+                }
+
+                return acquire(port + 1)
+                    .finally(() => reserved.delete(port));
+            });
+    }
+
+    /**
+     * Releases a port returned by acquire.
+     * @param {number|null} port
+     */
+    function release(port) {
+        reserved.delete(port);
+    }
+
+    /**
+     * Starts a CoreZMQ server on a free port, moving on to the next port if another process takes it first.
+     * @param {function(number): object} createServer - creates the CoreZMQ instance for a port
+     * @param {number} startPort - first port to try
+     * @returns {Promise<{server: object, port: number}>} the started server and the port it listens on, pass it to
+     * stopServer when done
+     */
+    function startServer(createServer, startPort) {
+        const attempt = (fromPort, attemptsLeft) => {
+            return acquire(fromPort)
+                .then((port) => {
+                    const server = createServer(port);
+                    return Promise.resolve(server.startServer())
+                        .then((listeningPort) => {
+                            return {server: server, port: listeningPort || port, reservedPort: port};
+                        })
+                        .catch((err) => {
+                            release(port);
+                            if (attemptsLeft <= 1) {
+                                throw err;
+                            }
+
+                            return attempt(port + 1, attemptsLeft - 1);
+                        });
+                });
+        };
+
+        return attempt(parseInt(process.env.COREZMQ_START_PORT, 10) || startPort, MAX_ATTEMPTS);
+    }
+
+    /**
+     * Stops a server started by startServer and releases its port.
+     * @param {{server: object, reservedPort: number}|null} started - the result of startServer
+     * @returns {Promise}
+     */
+    function stopServer(started) {
+        if (!started) {
+            return Promise.resolve();
+        }
+
+        return Promise.resolve(started.server.stopServer())
+            .finally(() => release(started.reservedPort));
+    }
+
+    return {
+        acquire: acquire,
+        release: release,
+        startServer: startServer,
+        stopServer: stopServer
+    };
+});
@@ -0,0 +1,168 @@
+/* globals define */
+/* eslint-env node */
+
+/**
+ * Runs the python side of a plugin for its JS wrapper: dumps the model the plugin reads (see ModelSnapshot), starts a
+ * CoreZMQ server on a free port (see PortAllocator), runs src/plugins/<id>/run_plugin.py or hands the execution to
+ * the python worker (see PythonWorker), and cleans up once whichever way the run ends.
+ */
+
+define([
+    './ModelSnapshot',
+    './PythonWorker',
+    './PortAllocator',
+    'module'
+], function (
+    ModelSnapshot,
+    PythonWorker,
+    PortAllocator,
+    module) {
+    'use strict';
+
+    const path = require('path');
+    const cp = require('child_process');
+
+    // First port tried for the CoreZMQ server, concurrent executions get the next free ones (see PortAllocator)
+    const START_PORT = 5555;
+    const COMMAND = 'python';
+    // Each plugin has its run_plugin.py in src/plugins/<id>
+    const PLUGINS_DIR = path.join(path.dirname(module.uri), '..', 'plugins');
+
+    /**
+     * Runs run_plugin.py of the plugin in a new python process.
+     * @param {object} plugin - the running plugin
+     * @param {number} port - port of the CoreZMQ server
+     * @param {string} snapshotFile - dump of the model, passed on to the python side
+     * @returns {Promise} resolved when the script succeeded, rejected when it failed
+     */
+    function callScript(plugin, port, snapshotFile) {
+        const logger = plugin.logger;
+        const scriptPath = path.join(PLUGINS_DIR, plugin.pluginMetadata.id, 'run_plugin.py');
+        const args = [
+            scriptPath,
+            port,
+            `"${plugin.commitHash}"`,
+            `"${plugin.branchName}"`,
+            `"${plugin.core.getPath(plugin.activeNode)}"`,
+            `"${plugin.activeSelection.map(node => plugin.core.getPath(node)).join(',')}"`,
+            `"${plugin.namespace}"`,
+            `"${snapshotFile}"`,
+        ];
+
+        return new Promise((resolve, reject) => {
+            const childProc = cp.spawn(COMMAND, args, {});
+
+            childProc.stdout.on('data', data => {
+                logger.info(data.toString());
+            });
+
+            childProc.stderr.on('data', data => {
+                logger.error(data.toString());
+            });
+
+            childProc.on('close', (code) => {
+                if (code > 0) {
+                    // This means an execution error or crash, so we are failing the plugin
+                    plugin.result.setSuccess(false);
+                    reject(new Error(`${COMMAND} ${args.join(' ')} exited with code ${code}.`));
+                } else {
+                    if (plugin.result.getSuccess() === null) {
+                        // The result have not been set inside the python, but it suceeded, so we go with the true value
+                        plugin.result.setSuccess(true);
+                    }
+                    resolve();
+                }
+            });
+
+            childProc.on('error', (err) => {
+                // This is a hard execution error, like the child process cannot be instantiated...
+                logger.error(err);
+                plugin.result.setSuccess(false);
+                reject(err);
+            });
+        });
+    }
+
+    /**
+     * Runs the python side of the plugin, in the worker if it is enabled.
+     * @param {object} plugin - the running plugin
+     * @param {number} port - port of the CoreZMQ server
+     * @param {string} snapshotFile - dump of the model, passed on to the python side
+     * @returns {Promise} resolved when the plugin succeeded, rejected when it failed
+     */
+    function runPython(plugin, port, snapshotFile) {
+        if (!PythonWorker.isEnabled()) {
+            return callScript(plugin, port, snapshotFile);
+        }
+
+        // Same context as the arguments of run_plugin.py, but handled by the long-lived python worker
+        return PythonWorker.run({
+            plugin: plugin.pluginMetadata.id,
+            port: port,
+            commitHash: plugin.commitHash,
+            branchName: plugin.branchName,
+            activeNodePath: plugin.core.getPath(plugin.activeNode),
+            activeSelectionPaths: plugin.activeSelection.map(node => plugin.core.getPath(node)),
+            namespace: plugin.namespace,
+            snapshotFile: snapshotFile
+        }, plugin.logger)
+            .then(() => {
+                if (plugin.result.getSuccess() === null) {
+                    plugin.result.setSuccess(true);
+                }
+            })
+            .catch((err) => {
+                plugin.result.setSuccess(false);
+                throw err;
+            });
+    }
+
+    /**
+     * Runs the python side of a plugin, the whole main of its wrapper.
+     * @param {object} plugin - the running plugin
+     * @param {object} snapshotRoot - root of the subtree dumped for the python side
+     * @param {string[]} [names] - names of the children of snapshotRoot whose subtree is dumped, see ModelSnapshot.write
+     * @returns {Promise} resolved when the plugin succeeded, rejected with the error of the run when it failed
+     */
+    function runPythonPlugin(plugin, snapshotRoot, names) {
+        const CoreZMQ = require('webgme-bindings').CoreZMQ;
+        const logger = plugin.logger;
+        // Dump of the subtree that the python side loads instead of querying node by node
+        let snapshotFile = null;
+        let corezmq = null;
+
+        // due to the limited options on the script return values, we need this hack
+        plugin.result.setSuccess(null);
+
+        const cleanUp = () => {
+            return PortAllocator.stopServer(corezmq)
+                .finally(() => ModelSnapshot.remove(snapshotFile));
+        };
+
+        return ModelSnapshot.write(plugin.core, snapshotRoot, names)
+            .then((fileName) => {
+                snapshotFile = fileName;
+                return PortAllocator.startServer((port) => {
+                    return new CoreZMQ(plugin.project, plugin.core, logger, {port: port, plugin: plugin});
+                }, START_PORT);
+            })
+            .then((started) => {
+                corezmq = started;
+                logger.info(`zmq-server listening at port ${started.port}`);
+                return runPython(plugin, started.port, snapshotFile);
+            })
+            .then(cleanUp, (err) => {
+                logger.error(err.stack);
+                // A failing clean-up is only logged, so the error of the run is the one reported
+                return cleanUp()
+                    .catch((cleanUpErr) => logger.error(cleanUpErr.stack))
+                    .then(() => {
+                        throw err;
+                    });
+            });
+    }
+
+    return {
+        runPythonPlugin: runPythonPlugin
+    };
+});
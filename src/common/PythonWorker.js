@@ -0,0 +1,182 @@
+/* globals define */
+/* eslint-env node */
+
+/**
+ * Runs the python side of a plugin in a long-lived worker (src/common/run_worker.py) instead of spawning
+ * run_plugin.py for every execution, which saves the interpreter start-up and the imports on each run.
+ * Opt-in through the PYTHON_WORKER environment variable:
+ *  - true: executions are shared out over a pool of workers started on demand, at most PYTHON_WORKERS of them
+ *    (defaults to the number of cpus) so that concurrent executions are not serialized by a single interpreter,
+ *  - a port number: connects to a worker that was started separately (python src/common/run_worker.py PORT).
+ */
+
+define(['module'], function (module) {
+    'use strict';
+
+    const cp = require('child_process');
+    const net = require('net');
+    const os = require('os');
+    const path = require('path');
+
+    const COMMAND = 'python';
+    const SCRIPT_FILE = path.join(path.dirname(module.uri), 'run_worker.py');
+
+    // Workers started by this process: {port: Promise<number>, jobs: number of running jobs}
+    const workers = [];
+
+    /**
+     * Whether the plugins should run in the worker.
+     * @returns {boolean}
+     */
+    function isEnabled() {
+        const setting = process.env.PYTHON_WORKER;
+        return !!setting && setting !== 'false' && setting !== '0';
+    }
+
+    /**
+     * Starts a new worker and adds it to the pool.
+     * @param {object} logger - logger of the calling plugin
+     * @returns {object} the worker
+     */
+    function startWorker(logger) {
+        const worker = {port: null, jobs: 0};
+        worker.port = new Promise((resolve, reject) => {
+            const childProc = cp.spawn(COMMAND, [SCRIPT_FILE]);
+            let buffered = '';
+            let started = false;
+
+            // Removed again once the worker is gone, so workers that come and go do not pile up listeners
+            const kill = () => childProc.kill();
+            process.on('exit', kill);
+
+            childProc.stdout.on('data', (data) => {
+                // The output has to be consumed for the whole life of the worker, the job logs are sent back
+                // with each result
+                if (!started) {
+                    buffered += data.toString();
+                    const match = buffered.match(/^PORT (\d+)$/m);
+                    if (match) {
+                        started = true;
+                        resolve(parseInt(match[1], 10));
+                    }
+                }
+            });
+
+            childProc.stderr.on('data', (data) => {
+                logger.error(data.toString());
+            });
+
+            const remove = () => {
+                process.removeListener('exit', kill);
+                if (workers.indexOf(worker) !== -1) {
+                    workers.splice(workers.indexOf(worker), 1);
+                }
+            };
+
+            childProc.on('error', (err) => {
+                remove();
+                reject(err);
+            });
+
+            childProc.on('close', (code) => {
+                remove();
+                if (!started) {
+                    reject(new Error(`${COMMAND} ${SCRIPT_FILE} exited with code ${code}.`));
+                }
+            });
+        });
+
+        workers.push(worker);
+        return worker;
+    }
+
+    /**
+     * Picks the worker for the next job: an idle one, a new one while the pool is not full, or else the least busy.
+     * @param {object} logger - logger of the calling plugin
+     * @returns {object|null} the worker, null if PYTHON_WORKER is the port of a separately started worker
+     */
+    function getWorker(logger) {
+        if (/^\d+$/.test(process.env.PYTHON_WORKER)) {
+            return null;
+        }
+
+        const size = parseInt(process.env.PYTHON_WORKERS, 10) || os.cpus().length;
+        const idle = workers.reduce((best, worker) => (!best || worker.jobs < best.jobs ? worker : best), null);
+        if (idle && (idle.jobs === 0 || workers.length >= size)) {
+            return idle;
+        }
+
+        return startWorker(logger);
+    }
+
+    /**
+     * Runs a job in the worker.
+     * @param {object} job - plugin id and the context otherwise passed to run_plugin.py
+     * @param {object} logger - logger of the calling plugin, receives the output of the job
+     * @returns {Promise} resolved when the plugin succeeded, rejected when it failed
+     */
+    function run(job, logger) {
+        const worker = getWorker(logger);
+        const workerPort = worker ? worker.port : Promise.resolve(parseInt(process.env.PYTHON_WORKER, 10));
+
+        if (worker) {
+            worker.jobs += 1;
+        }
+
+        return workerPort
+            .then((port) => {
+                return new Promise((resolve, reject) => {
+                    const socket = net.connect(port, '127.0.0.1');
+                    let buffered = '';
+
+                    socket.on('connect', () => {
+                        socket.write(JSON.stringify(job) + '\n');
+                    });
+
+                    socket.on('data', (data) => {
+                        buffered += data.toString();
+                        const end = buffered.indexOf('\n');
+                        if (end === -1) {
+                            return;
+                        }
+
+                        socket.end();
+                        let result;
+                        try {
+                            result = JSON.parse(buffered.substring(0, end));
+                        } catch (err) {
+                            reject(err);
+                            return;
+                        }
+
+                        result.output.forEach((line) => {
+                            logger.info(line);
+                        });
+
+                        if (result.success) {
+                            resolve();
+                        } else {
+                            reject(new Error(`${job.plugin} failed in the python worker:\n${result.error}`));
+                        }
+                    });
+
+                    socket.on('error', reject);
+
+                    socket.on('close', () => {
+                        // Only matters if the worker went away before answering
+                        reject(new Error(`The python worker closed the connection while running ${job.plugin}.`));
+                    });
+                });
+            })
+            .finally(() => {
+                if (worker) {
+                    worker.jobs -= 1;
+                }
+            });
+    }
+
+    return {
+        isEnabled: isEnabled,
+        run: run
+    };
+});
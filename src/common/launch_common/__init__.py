@@ -0,0 +1,17 @@
+"""
+Python modules shared by the plugins. The plugins add src/common to sys.path before importing this package.
+"""
+from .artifacts import ArtifactIndex, content_hash
+from .fragments import FragmentCache, subtree_keys
+from .includes import IncludeResolver, PackageTree
+from .libraries import LibraryLookup, include_key, node_key, store_index
+from .meta import LIBRARY_NAMES, META_TYPES, TypeResolver, find_libraries
+from .mutations import MutationBuffer
+from .parses import ParseCache
+from .pools import ContextPool
+from .ports import find_free_port
+from .profiling import CallProfile, profiled, rpc_phase
+from .resolver import LaunchResolver, parse_launch_args
+from .snapshot import ModelSnapshot
+from .startup import startup_layers, topic_graph
+from .tags import TAGS, Attribute, Tag
@@ -0,0 +1,100 @@
+"""
+Index of the files ExportLaunch added to the blob storage, by content, so an export that did not change returns the
+blob of the earlier one instead of uploading the same text again. Kept next to the fragment caches (see fragments.py).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from .fragments import cache_directory
+
+logger = logging.getLogger('launch_common')
+
+# Oldest entries are dropped beyond this, one entry is only a few hashes
+MAX_ENTRIES = 10000
+
+
+def content_hash(files: dict) -> str:
+    """Returns the hash of files with their names, independent of the order of the dict
+
+    Args:
+        files (dict): File name -> content (str or bytes)
+
+    Returns:
+        str: sha1 of the names and contents
+    """
+    digest = hashlib.sha1()
+    for name in sorted(files):
+        content = files[name]
+        data = content if isinstance(content, bytes) else content.encode("utf-8")
+        digest.update(f"{name}\0{len(data)}\0".encode("utf-8"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ArtifactIndex(object):
+    """Content hash -> metadata hash of the blobs added by earlier exports of one project, stored as a json file"""
+
+    def __init__(self, file_path: str, entries: dict):
+        self.file_path = file_path
+        # Insertion ordered, the most recently used entry last
+        self._entries = entries
+
+    @classmethod
+    def load(cls, name: str):
+        """Loads the index with the given name
+
+        Args:
+            name (str): Identifies the blob storage, e.g. the project id
+
+        Returns:
+            ArtifactIndex: The index, empty if there is none yet or it could not be read, None if there is no cache
+                directory that can be used
+        """
+        directory = cache_directory()
+        if directory is None:
+            return None
+        file_path = os.path.join(directory, hashlib.sha1(f"artifacts:{name}".encode("utf-8")).hexdigest() + ".json")
+        entries = {}
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                if not isinstance(entries, dict):
+                    raise ValueError("not an artifact index")
+            except (OSError, ValueError) as e:
+                entries = {}
+                logger.warning(f"Ignoring the artifact index {file_path}: {e}")
+        return cls(file_path, entries)
+
+    def get(self, key: str):
+        """Returns the metadata hash stored for the content hash, None if there is none"""
+        metadata_hash = self._entries.pop(key, None)
+        if metadata_hash is not None:
+            self._entries[key] = metadata_hash
+        return metadata_hash
+
+    def put(self, key: str, metadata_hash: str):
+        self._entries.pop(key, None)
+        self._entries[key] = metadata_hash
+        while len(self._entries) > MAX_ENTRIES:
+            del self._entries[next(iter(self._entries))]
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def save(self):
+        """Writes the index, replacing the file at once so concurrent exports never see half a file"""
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.file_path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, separators=(",", ":"))
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            logger.warning(f"Could not save the artifact index {self.file_path}: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,166 @@
+"""
+Local cache of the fragments rendered by ExportLaunch, so a later export of the same launch file only renders the
+subtrees that changed since.
+The cache directory defaults to launch_export_cache-<uid> in the temp directory and can be changed with the
+LAUNCH_EXPORT_CACHE environment variable. What is read from the caches ends up in the exported files, so a directory
+that another user owns or can write to is not used.
+"""
+import getpass
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+
+logger = logging.getLogger('launch_common')
+
+# Bumped whenever the rendering changes, so fragments of older exports are not reused
+FORMAT = 2
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def private_directory(variable: str, name: str) -> str:
+    """Returns a cache directory of the current user, created if needed
+
+    Args:
+        variable (str): Environment variable that sets the directory
+        name (str): Name of the directory in the temp directory otherwise, the user id is appended to it
+
+    Returns:
+        str: The directory, None if it can not be created or another user owns or can write to it
+    """
+    path = os.environ.get(variable)
+    if not path:
+        user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+        path = os.path.join(tempfile.gettempdir(), f"{name}-{user}")
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        status = os.stat(path)
+    except OSError as e:
+        logger.warning(f"Not using the cache directory {path}: {e}")
+        return None
+    # Not checked where there are no uids (Windows), the temp directory is per user there
+    if hasattr(os, "getuid") and (status.st_uid != os.getuid() or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        logger.warning(f"Not using the cache directory {path}: it is not private to the current user")
+        return None
+    return path
+
+
+def cache_directory() -> str:
+    """Returns the directory the export caches are kept in, None if it can not be used (see private_directory)"""
+    return private_directory("LAUNCH_EXPORT_CACHE", "launch_export_cache")
+
+
+def subtree_keys(model, node: dict) -> dict:
+    """Computes a content key for every node in the subtree of node. The key of a node changes whenever anything that
+    is exported from its subtree may have changed: its own data and children (the node hash), its base chain
+    (inherited attributes and type) and, through the keys of its children, the base chains of its descendants.
+
+    Args:
+        model (ModelSnapshot): Snapshot containing the subtree
+        node (dict): Root of the subtree
+
+    Returns:
+        dict: Path -> key
+    """
+    base_keys = {}
+
+    def base_key(base: dict) -> str:
+        # Bases are shared by many nodes, each one is only looked at once
+        if base is None:
+            return None
+        path = base["nodePath"]
+        if path not in base_keys:
+            base_keys[path] = _digest(path, model.get_hash(base), base_key(model.get_base(base)))
+        return base_keys[path]
+
+    keys = {}
+    # Children come after their parent in the subtree, so in reverse every child is done before its parent
+    for current in reversed(model.load_sub_tree(node)):
+        keys[current["nodePath"]] = _digest(
+            model.get_hash(current),
+            base_key(model.get_base(current)),
+            [keys[child["nodePath"]] for child in model.load_children(current)]
+        )
+    return keys
+
+
+class FragmentCache(object):
+    """Fragments of the last export of one launch file, stored as a single json file.
+
+    A fragment is what was written for the children of a node at a given indent: a list of chunks of text and
+    [relid] references to the fragment of a child, so a fragment never repeats the text of its subtree. Only the
+    fragments used by the current export are saved, which drops everything that went stale.
+    """
+
+    def __init__(self, file_path: str, fragments: dict):
+        self.file_path = file_path
+        self._stored = fragments
+        self._used = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, name: str):
+        """Loads the fragments of the last export with the given name
+
+        Args:
+            name (str): Identifies the exported launch file, e.g. project id and node path
+
+        Returns:
+            FragmentCache: The cache, empty if there was no earlier export or it could not be read, None if there is
+                no cache directory that can be used
+        """
+        directory = cache_directory()
+        if directory is None:
+            return None
+        file_path = os.path.join(directory, _digest(FORMAT, name) + ".json")
+        fragments = {}
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    fragments = json.load(f)
+                if not isinstance(fragments, dict):
+                    raise ValueError("not a fragment cache")
+            except (OSError, ValueError) as e:
+                fragments = {}
+                logger.warning(f"Ignoring the export cache {file_path}: {e}")
+        return cls(file_path, fragments)
+
+    @staticmethod
+    def key(node_key: str, indent: int) -> str:
+        """Returns the key of the fragment of a node, given its subtree key and the indent of its children"""
+        return _digest(node_key, indent)
+
+    def get(self, key: str):
+        """Returns the stored fragment, None if there is none"""
+        fragment = self._used[key] if key in self._used else self._stored.get(key)
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used[key] = fragment
+        return fragment
+
+    def put(self, key: str, fragment: list):
+        self._used[key] = fragment
+
+    def save(self):
+        """Writes the fragments used by this export, replacing the file at once so concurrent exports never see
+        half a file
+        """
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.file_path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._used, f, separators=(",", ":"))
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            logger.warning(f"Could not save the export cache {self.file_path}: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
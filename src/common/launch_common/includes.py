@@ -0,0 +1,311 @@
+"""
+Launch files of a local catkin/colcon source tree, a directory or a zip of one, so ImportLaunch can read the files
+an imported launch file includes. Packages are found by their package.xml, $(find pkg) resolves to the directory of
+the package.xml naming pkg.
+Source trees on the server can only be read below the directories listed in the LAUNCH_PACKAGE_TREES environment
+variable (separated by os.pathsep), none if it is not set.
+"""
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import re
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+
+from .pools import ContextPool
+
+logger = logging.getLogger('launch_common')
+
+# Directories that never hold source packages: build spaces and version control
+_SKIPPED_DIRECTORIES = {"build", "devel", "install", "log", ".git", ".svn", ".hg"}
+# A directory holding one of these is skipped by catkin and colcon
+_IGNORE_MARKERS = ("CATKIN_IGNORE", "COLCON_IGNORE", "AMENT_IGNORE")
+
+# Directories below which source trees on the server may be read
+ALLOWED_TREES_VARIABLE = "LAUNCH_PACKAGE_TREES"
+
+_FIND = re.compile(r"^\$\(\s*find\s+([^\s)]+)\s*\)")
+_DIRNAME = re.compile(r"^\$\(\s*dirname\s*\)")
+
+
+def _package_name(data: bytes):
+    try:
+        name = ET.fromstring(data).findtext("name")
+    except ET.ParseError:
+        return None
+    return name.strip() if name else None
+
+
+def allowed_tree_roots() -> list:
+    """Returns the directories below which source trees on the server may be read, see ALLOWED_TREES_VARIABLE"""
+    value = os.environ.get(ALLOWED_TREES_VARIABLE, "")
+    return [os.path.realpath(directory) for directory in value.split(os.pathsep) if directory]
+
+
+def _is_inside(path: str, directory: str, path_module=os.path) -> bool:
+    if path_module is os.path:
+        path, directory = os.path.realpath(path), os.path.realpath(directory)
+        return os.path.commonpath([path, directory]) == directory
+    # Names in a zip: relative and already normalized
+    if directory == "":
+        return not (path_module.isabs(path) or path == ".." or path.startswith("../"))
+    return path == directory or path.startswith(directory + "/")
+
+
+def scan_launch(data: bytes) -> dict:
+    """Reads the nodes and includes of a launch file, at any depth of groups. Conditions are not evaluated, every
+    node and include that may run is listed.
+
+    Args:
+        data (bytes): Content of the launch file
+
+    Returns:
+        dict: nodes (list of (pkg, type, name)) and includes (list of the file attributes), in the order of the file
+    """
+    nodes = []
+    includes = []
+    for _, element in ET.iterparse(io.BytesIO(data)):
+        tag = element.tag.split('}')[-1]
+        if tag == "node":
+            nodes.append((element.get("pkg"), element.get("type"), element.get("name") or element.get("type")))
+        elif tag == "include" and element.get("file"):
+            includes.append(element.get("file"))
+        element.clear()
+    return {"nodes": nodes, "includes": includes}
+
+
+class PackageTree(object):
+    """Packages of a source tree and the files in them"""
+
+    def __init__(self, packages: dict, read, path=os.path, root: str = None):
+        """
+        Args:
+            packages (dict): Package name -> directory of the package
+            read (callable): Returns the content of a file of the tree as bytes, raises OSError or KeyError if it
+                does not exist
+            path (module, optional): Path functions of the tree, os.path or posixpath. Defaults to os.path.
+            root (str, optional): Directory of the tree, files outside it are never resolved. Defaults to None, only
+                the packages themselves are confined then.
+        """
+        self.packages = packages
+        self.read = read
+        self.path = path
+        self.root = root
+
+    @classmethod
+    def from_directory(cls, root: str, allowed_roots: list = None):
+        """Finds the packages in a source tree on disk
+
+        Args:
+            root (str): Directory of the tree, e.g. the src directory of a workspace
+            allowed_roots (list, optional): Directories the tree has to be in. Defaults to None, for
+                allowed_tree_roots().
+
+        Returns:
+            PackageTree: The packages found
+
+        Raises:
+            ValueError: If root is not a directory or not in one of the allowed directories
+        """
+        allowed_roots = allowed_tree_roots() if allowed_roots is None else allowed_roots
+        if not any(_is_inside(root, allowed) for allowed in allowed_roots):
+            raise ValueError(f"{root} is not in a directory listed in {ALLOWED_TREES_VARIABLE}")
+        if not os.path.isdir(root):
+            raise ValueError(f"{root} is not a directory")
+        root = os.path.realpath(root)
+        packages = {}
+        for directory, subdirectories, files in os.walk(root):
+            if any(marker in files for marker in _IGNORE_MARKERS):
+                subdirectories[:] = []
+                continue
+            if "package.xml" in files:
+                # Packages do not nest
+                subdirectories[:] = []
+                with open(os.path.join(directory, "package.xml"), "rb") as f:
+                    name = _package_name(f.read())
+                if name:
+                    packages.setdefault(name, directory)
+                continue
+            subdirectories[:] = sorted(d for d in subdirectories if d not in _SKIPPED_DIRECTORIES)
+
+        def read(file_path: str) -> bytes:
+            with open(file_path, "rb") as f:
+                return f.read()
+
+        return cls(packages, read, root=root)
+
+    @classmethod
+    def from_zip(cls, data: bytes):
+        """Finds the packages in a zip of a source tree
+
+        Args:
+            data (bytes): Content of the zip
+
+        Returns:
+            PackageTree: The packages found, the paths are the names in the zip
+
+        Raises:
+            ValueError: If data is not a zip
+        """
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile as e:
+            raise ValueError(str(e)) from e
+        names = set(archive.namelist())
+        lock = threading.Lock()
+
+        def read(name: str) -> bytes:
+            with lock:
+                return archive.read(name)
+
+        packages = {}
+        ignored = [posixpath.dirname(name) + "/" for name in names if posixpath.basename(name) in _IGNORE_MARKERS]
+        # Shallowest package.xml first, so nested copies (e.g. in install/share) lose
+        for name in sorted((n for n in names if posixpath.basename(n) == "package.xml"), key=lambda n: (n.count("/"), n)):
+            directory = posixpath.dirname(name)
+            parts = directory.split("/")
+            if _SKIPPED_DIRECTORIES.intersection(parts) or any((directory + "/").startswith(i) for i in ignored):
+                continue
+            package = _package_name(read(name))
+            if package:
+                packages.setdefault(package, directory)
+        return cls(packages, read, posixpath, "")
+
+    def resolve(self, file: str, current_dir: str = None):
+        """Returns the path of an included file in the tree
+
+        Args:
+            file (str): The file attribute of the include
+            current_dir (str, optional): Directory of the including file, None if it is not in the tree.
+                Defaults to None.
+
+        Returns:
+            str: Path of the file, None if it can not be resolved without evaluating other substitutions or is
+                outside its package (for $(find pkg)) or the tree
+        """
+        match = _FIND.match(file)
+        if match:
+            directory = self.packages.get(match.group(1))
+            rest = file[match.end():]
+            confined_to = directory
+        else:
+            match = _DIRNAME.match(file)
+            directory = current_dir
+            rest = file[match.end():] if match else file
+            if not match and self.path.isabs(file):
+                return None
+            confined_to = self.root if self.root is not None else directory
+        if directory is None or "$(" in rest:
+            return None
+        resolved = self.path.normpath(self.path.join(directory, rest.lstrip("/")))
+        if not _is_inside(resolved, confined_to, self.path):
+            return None
+        return resolved
+
+
+class IncludeResolver(object):
+    """Reads the files included by a launch file from a PackageTree, following their includes.
+
+    Files are read and parsed on a pool of threads as soon as an include naming them is seen. Parse results are
+    cached by the hash of the content, so a file included many times (or copied to several places) is parsed once.
+    """
+
+    def __init__(self, tree: PackageTree, max_workers: int = None):
+        self.tree = tree
+        self._pool = ContextPool(max_workers=max_workers)
+        self._lock = threading.Lock()
+        # Path -> future of the scan of the file
+        self._scans = {}
+        # Content hash -> scan
+        self._parsed = {}
+        self.parsed = 0
+        self.unresolved = set()
+
+    def close(self):
+        """Stops the threads, files that are still waiting to be read are dropped"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _scan(self, path: str):
+        try:
+            data = self.tree.read(path)
+        except (OSError, KeyError):
+            return None
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            scan = self._parsed.get(digest)
+        if scan is None:
+            try:
+                scan = scan_launch(data)
+            except ET.ParseError as e:
+                logger.warning(f"Could not parse the included file {path}: {e}")
+                scan = {"nodes": [], "includes": []}
+            with self._lock:
+                # Another thread may have parsed the same content meanwhile, keep the first
+                scan = self._parsed.setdefault(digest, scan)
+                self.parsed += 1
+        # Start on the nested includes right away
+        for file in scan["includes"]:
+            nested = self.tree.resolve(file, self.tree.path.dirname(path))
+            if nested is not None:
+                self._submit(nested)
+        return scan
+
+    def _submit(self, path: str):
+        with self._lock:
+            future = self._scans.get(path)
+            if future is None:
+                future = self._scans[path] = self._pool.submit(self._scan, path)
+        return future
+
+    def prefetch(self, file: str, current_dir: str = None):
+        """Starts reading an included file in the background
+
+        Args:
+            file (str): The file attribute of the include
+            current_dir (str, optional): Directory of the including file in the tree, None if it is not in the tree.
+                Defaults to None.
+        """
+        path = self.tree.resolve(file, current_dir)
+        if path is not None:
+            self._submit(path)
+
+    def nodes(self, file: str, current_dir: str = None):
+        """Returns the nodes started by an include, including those of the files it includes in turn
+
+        Args:
+            file (str): The file attribute of the include
+            current_dir (str, optional): Directory of the including file in the tree, None if it is not in the tree.
+                Defaults to None.
+
+        Returns:
+            list: (pkg, type, name) of every node, None if the file is not in the tree
+        """
+        path = self.tree.resolve(file, current_dir)
+        if path is None or self._submit(path).result() is None:
+            self.unresolved.add(file)
+            return None
+
+        nodes = []
+        visited = {path}
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            scan = self._submit(current).result()
+            if scan is None:
+                self.unresolved.add(current)
+                continue
+            nodes.extend(scan["nodes"])
+            nested = []
+            for nested_file in scan["includes"]:
+                nested_path = self.tree.resolve(nested_file, self.tree.path.dirname(current))
+                if nested_path is None:
+                    self.unresolved.add(nested_file)
+                elif nested_path not in visited:
+                    visited.add(nested_path)
+                    nested.append(nested_path)
+            # In the order of the file
+            stack.extend(reversed(nested))
+        return nodes
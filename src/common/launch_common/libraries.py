@@ -0,0 +1,108 @@
+"""
+Lookup of the nodes of the libraries filled by UpdateLibrary. UpdateLibrary stores an index of the keys of the
+nodes of each library (pkg and type, or the include file) in the registry of the library, so ImportLaunch finds the
+library nodes it needs without reading every node of the library.
+"""
+import logging
+
+logger = logging.getLogger('launch_common')
+
+# Registry of a library node holding its index
+INDEX_REGISTRY = "libraryIndex"
+# Bumped whenever the keys change, so older indexes are not used
+FORMAT = 1
+
+
+def node_key(get):
+    """Key of a node or test in its library
+
+    Args:
+        get (callable): Returns the value of an attribute by name, e.g. dict.get of the attributes of a tag
+
+    Returns:
+        tuple: (pkg, type), None if either is missing
+    """
+    pkg = get("pkg")
+    node_type = get("type")
+    return (pkg, node_type) if pkg and node_type else None
+
+
+def include_key(get):
+    """Key of an include in its library
+
+    Args:
+        get (callable): Returns the value of an attribute by name
+
+    Returns:
+        str: The file of the include without slashes, None if it has none
+    """
+    name = get("name")
+    return name.replace("/", "") if name else None
+
+
+def store_index(core, library: dict, keyed_nodes: list):
+    """Stores the index of a library in its registry
+
+    Args:
+        core (Core): Core of the plugin
+        library (dict): Library node
+        keyed_nodes (list): (key, node) of the nodes of the library, the nodes have to exist in the core
+    """
+    entries = [[node["nodePath"].rpartition("/")[2], list(key) if isinstance(key, tuple) else key]
+               for key, node in keyed_nodes if key is not None]
+    core.set_registry(library, INDEX_REGISTRY, {"format": FORMAT, "entries": entries})
+
+
+class LibraryLookup(object):
+    """Nodes of one library by key.
+
+    The index stored by UpdateLibrary is used when it lists exactly the children the library has, every node found
+    through it is checked against its key. Otherwise, e.g. for libraries filled before there was an index or edited
+    by hand, every node of the library is read once.
+    """
+
+    def __init__(self, core, model, library: dict, key_of):
+        """
+        Args:
+            core (Core): Core of the plugin, the index is read from it
+            model (ModelSnapshot): Snapshot containing the library
+            library (dict): Library node
+            key_of (callable): node_key or include_key
+        """
+        self.model = model
+        self.library = library
+        self.key_of = key_of
+        self._nodes = self._read_index(core)
+        self.indexed = self._nodes is not None
+        if self._nodes is None:
+            self._nodes = self._scan()
+
+    def _read_index(self, core):
+        index = core.get_registry(self.library, INDEX_REGISTRY)
+        if not isinstance(index, dict) or index.get("format") != FORMAT:
+            return None
+        children = {child["nodePath"].rpartition("/")[2]: child for child in self.model.load_children(self.library)}
+        entries = index.get("entries", [])
+        if set(children) != {relid for relid, _ in entries}:
+            logger.info(f"Index of {self.model.get_attribute(self.library, 'name')} is out of date.")
+            return None
+        return {tuple(key) if isinstance(key, list) else key: children[relid] for relid, key in entries}
+
+    def _scan(self) -> dict:
+        nodes = {}
+        for node in self.model.load_sub_tree(self.library):
+            key = self.key_of(lambda name: self.model.get_attribute(node, name))
+            if key is not None:
+                nodes[key] = node
+        return nodes
+
+    def get(self, key):
+        """Returns the library node with the given key, None if there is none"""
+        node = self._nodes.get(key)
+        if node is not None and self.indexed and self.key_of(lambda name: self.model.get_attribute(node, name)) != key:
+            # Changed since the index was stored
+            logger.info(f"Index of {self.model.get_attribute(self.library, 'name')} is out of date.")
+            self.indexed = False
+            self._nodes = self._scan()
+            node = self._nodes.get(key)
+        return node
@@ -0,0 +1,134 @@
+"""
+Resolution of the launch file meta type of WebGME nodes, shared by all plugins.
+"""
+
+# Meta types defined in the Launch File tab in the metamodel
+META_TYPES = ["LaunchFile", "Include", "Argument", "Remap", "Group", "Parameter", "rosparam", "Node", "Topic", "GroupPublisher", "GroupSubscriber", "Subscriber", "Publisher", "Machine", "Env", "Test", "rosparamBody"]
+
+# Names of the LaunchFile nodes that hold the libraries filled by UpdateLibrary
+LIBRARY_NAMES = ["NodeLibrary", "TestLibrary", "IncludeLibrary"]
+
+
+class TypeResolver(object):
+    """Resolves the type of WebGME nodes and caches the result for the whole plugin run.
+
+    The type of a node is the name of the first node in its base chain that is one of META_TYPES.
+    Results are cached per base node path, so each base is only visited once no matter how many
+    nodes share it.
+    """
+
+    def __init__(self, core):
+        self.core = core
+        # Path of a node -> base node (None when the node has no base)
+        self._bases = {}
+        # Path of a node -> name of the node
+        self._names = {}
+        # Path of a base node -> type of the nodes deriving from it
+        self._types = {}
+
+    def add_node(self, node: dict, base: dict, name: str):
+        """Registers the base and name of a node that the caller already knows, so they are not loaded again
+
+        Args:
+            node (dict): A node in the WebGME project
+            base (dict): Base of the node, None if it has no base
+            name (str): Name of the node
+        """
+        self._bases[node["nodePath"]] = base
+        self._names[node["nodePath"]] = name
+
+    def _get_base(self, node: dict) -> dict:
+        """Returns the base of the node, loading it from the core only once
+
+        Args:
+            node (dict): A node in the WebGME project
+
+        Returns:
+            dict: Base node, None if the node has no base
+        """
+        path = node["nodePath"]
+        if path not in self._bases:
+            self._bases[path] = self.core.get_base(node)
+        return self._bases[path]
+
+    def _get_name(self, node: dict) -> str:
+        """Returns the name of the node, loading it from the core only once
+
+        Args:
+            node (dict): A node in the WebGME project
+
+        Returns:
+            str: Name of the node
+        """
+        path = node["nodePath"]
+        if path not in self._names:
+            self._names[path] = self.core.get_attribute(node, "name")
+        return self._names[path]
+
+    def get_type(self, node: dict) -> str:
+        """Returns the type of the WebGME node
+
+        Args:
+            node (dict): A node in the WebGME project
+
+        Returns:
+            str: The type of the node as defined in the Launch File tab in the metamodel, None if there is none
+        """
+        base = self._get_base(node)
+        unresolved = []
+
+        while base and base["nodePath"] not in self._types:
+            name = self._get_name(base)
+            if name in META_TYPES:
+                self._types[base["nodePath"]] = name
+                break
+            unresolved.append(base["nodePath"])
+            base = self._get_base(base)
+
+        node_type = self._types[base["nodePath"]] if base else None
+        for path in unresolved:
+            self._types[path] = node_type
+
+        return node_type
+
+    def get_types(self, nodes: list) -> list:
+        """Returns the types of all nodes in the list
+
+        Args:
+            nodes (list): Nodes in the WebGME project
+
+        Returns:
+            list: Type of each node, in the same order as nodes
+        """
+        resolved = {}
+        for node in nodes:
+            if node["nodePath"] not in resolved:
+                resolved[node["nodePath"]] = self.get_type(node)
+
+        return [resolved[node["nodePath"]] for node in nodes]
+
+
+def find_libraries(model, node: dict) -> dict:
+    """Finds the libraries (LIBRARY_NAMES) below node without loading its whole subtree. They are normally children
+    of node, the levels below are only searched, one at a time, for libraries that are not there.
+
+    Args:
+        model (ModelSnapshot): Snapshot containing node
+        node (dict): Node to search below, e.g. the root
+
+    Returns:
+        dict: Library name -> library node, libraries that were not found are left out
+    """
+    libraries = {}
+    level = [node]
+    while level and len(libraries) < len(LIBRARY_NAMES):
+        next_level = []
+        for parent in level:
+            for child in model.load_children(parent):
+                name = model.get_attribute(child, "name")
+                if name in LIBRARY_NAMES:
+                    libraries.setdefault(name, child)
+                else:
+                    next_level.append(child)
+        level = next_level
+    return libraries
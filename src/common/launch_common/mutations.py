@@ -0,0 +1,329 @@
+"""
+Write-behind buffer for model changes, so a plugin can record its changes locally and send them to the core in one go.
+"""
+import logging
+
+logger = logging.getLogger('launch_common')
+
+# Provisional relids start with this character, which never appears in a relid generated by WebGME
+PROVISIONAL_MARK = "#"
+
+
+class _Pending(object):
+    """A node that only exists in the buffer so far"""
+    __slots__ = ('node', 'parent', 'origin', 'instance')
+
+    def __init__(self, node: dict, parent: dict, origin: dict, instance: bool):
+        # Provisional handle given to the caller, updated in place with the real node on flush
+        self.node = node
+        self.parent = parent
+        # Base of a created node or source of a copied node, values that were not set are read from it
+        self.origin = origin
+        # Whether the node is an instance of origin (created) or a copy of it (copied)
+        self.instance = instance
+
+
+class MutationBuffer(object):
+    """Records create_child, copy_node, delete_node, set_attribute, set_pointer and add_member calls instead of
+    sending each of them to the core, and sends them all at once when flush is called (before util.save).
+
+    create_child and copy_node return provisional handles, node dicts with a path ending in a relid that starts
+    with PROVISIONAL_MARK. They can be used anywhere in the buffer (as parents, bases, pointer targets, set members)
+    and are updated in place with the real node on flush, so they stay valid afterwards. The buffer can be used again
+    after a flush.
+
+    Reads through the buffer (get_attribute, get_attribute_names, get_pointer_path, get_base, get_parent,
+    load_children) see the buffered changes. Every other Core method is passed to the core, flushing first if one
+    of its arguments is a provisional handle or a node with buffered changes.
+
+    Repeated writes of the same attribute or pointer only send the last value, and changes to nodes that get deleted
+    before the flush are dropped.
+    """
+
+    def __init__(self, core, reader=None):
+        """
+        Args:
+            core (Core): Core of the plugin, receives the changes on flush
+            reader (optional): Used to read nodes that exist in the core, e.g. a ModelSnapshot. Defaults to core.
+        """
+        self.core = core
+        self.reader = reader if reader is not None else core
+        self._counter = 0
+        # Provisional path -> _Pending, including inherited or copied children of pending nodes
+        self._pending = {}
+        # Provisional path -> real node, for every provisional node that has been sent to the core
+        self._resolved = {}
+        # Path -> node dict of every node that has buffered changes
+        self._nodes = {}
+        # Structural changes in the order they were made: ("create" | "copy" | "delete", path)
+        self._operations = []
+        # Path -> {name: value}
+        self._attributes = {}
+        # Path -> {name: target path or None}
+        self._pointers = {}
+        # (path, set name) -> [member paths]
+        self._members = {}
+        # Paths of the nodes created or copied since the last flush
+        self._created = set()
+        # Paths of the deleted nodes
+        self._deleted = set()
+        # Parent path -> paths of the nodes created or copied into it
+        self._new_children = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.core, name)
+
+        def call(*args, **kwargs):
+            if any(self._is_changed(arg) for arg in list(args) + list(kwargs.values())):
+                self.flush()
+                args = [self._real(arg) for arg in args]
+                kwargs = {key: self._real(value) for key, value in kwargs.items()}
+            return method(*args, **kwargs)
+
+        return call if callable(method) else method
+
+    def __len__(self):
+        """Number of buffered changes"""
+        return len(self._operations) + sum(len(values) for values in self._attributes.values()) + \
+            sum(len(values) for values in self._pointers.values()) + \
+            sum(len(values) for values in self._members.values())
+
+    def _is_provisional(self, value) -> bool:
+        if isinstance(value, dict):
+            return PROVISIONAL_MARK in value.get("nodePath", "")
+        if isinstance(value, (list, tuple)):
+            return any(self._is_provisional(item) for item in value)
+        return False
+
+    def _is_changed(self, value) -> bool:
+        """Whether the value is a provisional handle or a node with buffered changes"""
+        if isinstance(value, dict):
+            return self._is_provisional(value) or value.get("nodePath") in self._nodes
+        if isinstance(value, (list, tuple)):
+            return any(self._is_changed(item) for item in value)
+        return False
+
+    def _real(self, value):
+        """Returns the real node for a provisional handle, loading inherited or copied children from their parent"""
+        if isinstance(value, list):
+            return [self._real(item) for item in value]
+        if not self._is_provisional(value):
+            return value
+
+        path = value["nodePath"]
+        if path not in self._resolved:
+            # Children of created or copied nodes come into being with their parent and keep the relid of the origin
+            pending = self._get_pending(value)
+            self._resolved[path] = self.core.load_child(self._real(pending.parent), path.rpartition("/")[2])
+            pending.node.update(self._resolved[path])
+        return self._resolved[path]
+
+    def _get_pending(self, node: dict) -> _Pending:
+        """Returns the record of a provisional node, or None for nodes that exist in the core"""
+        path = node["nodePath"]
+        if PROVISIONAL_MARK not in path:
+            return None
+        if path not in self._pending:
+            # Child of a pending node that has not been loaded yet
+            self.load_children(self._get_pending({"nodePath": path.rpartition("/")[0]}).node)
+        return self._pending[path]
+
+    def _remember(self, node: dict) -> str:
+        self._nodes[node["nodePath"]] = node
+        return node["nodePath"]
+
+    def _is_deleted(self, path: str) -> bool:
+        """Whether the node or one of its ancestors was deleted"""
+        while path:
+            if path in self._deleted:
+                return True
+            path = path.rpartition("/")[0]
+        return False
+
+    def _add_pending(self, parent: dict, origin: dict, instance: bool) -> dict:
+        self._counter += 1
+        node = {"nodePath": f"{parent['nodePath']}/{PROVISIONAL_MARK}{self._counter}", "rootId": parent["rootId"]}
+        self._pending[self._remember(node)] = _Pending(node, parent, origin, instance)
+        self._created.add(node["nodePath"])
+        self._new_children.setdefault(parent["nodePath"], []).append(node["nodePath"])
+        return node
+
+    def create_child(self, parent: dict, base: dict) -> dict:
+        node = self._add_pending(parent, base, instance=True)
+        self._operations.append(("create", node["nodePath"]))
+        return node
+
+    def copy_node(self, node: dict, parent: dict) -> dict:
+        source = node["nodePath"]
+        if any(path == source or path.startswith(source + "/") for path in list(self._attributes) + list(self._pointers)):
+            # The copy has to include the buffered changes of the source
+            self.flush()
+            node = self._real(node)
+            parent = self._real(parent)
+        copy = self._add_pending(parent, node, instance=False)
+        self._operations.append(("copy", copy["nodePath"]))
+        return copy
+
+    def delete_node(self, node: dict):
+        path = self._remember(node)
+        if self._is_deleted(path):
+            return
+        self._deleted.add(path)
+        if path not in self._created:
+            # Nodes created in the buffer are simply never sent
+            self._operations.append(("delete", path))
+        for changes in (self._attributes, self._pointers):
+            for removed in [p for p in changes if p == path or p.startswith(path + "/")]:
+                del changes[removed]
+
+    def set_attribute(self, node: dict, name: str, value):
+        self._attributes.setdefault(self._remember(node), {})[name] = value
+
+    def set_pointer(self, node: dict, name: str, target: dict):
+        self._pointers.setdefault(self._remember(node), {})[name] = self._remember(target) if target else None
+
+    def add_member(self, node: dict, name: str, member: dict):
+        members = self._members.setdefault((self._remember(node), name), [])
+        if self._remember(member) not in members:
+            members.append(member["nodePath"])
+
+    def get_path(self, node: dict) -> str:
+        return node["nodePath"]
+
+    def get_attribute(self, node: dict, name: str):
+        values = self._attributes.get(node["nodePath"])
+        if values and name in values:
+            return values[name]
+        pending = self._get_pending(node)
+        if pending is None:
+            return self.reader.get_attribute(node, name)
+        return self.get_attribute(pending.origin, name) if pending.origin else None
+
+    def get_attribute_names(self, node: dict) -> list:
+        pending = self._get_pending(node)
+        if pending is None:
+            names = self.reader.get_attribute_names(node)
+        else:
+            names = self.get_attribute_names(pending.origin) if pending.origin else []
+        return names + [name for name in self._attributes.get(node["nodePath"], {}) if name not in names]
+
+    def get_pointer_path(self, node: dict, name: str) -> str:
+        values = self._pointers.get(node["nodePath"])
+        if values and name in values:
+            return values[name]
+        pending = self._get_pending(node)
+        if pending is None:
+            return self.reader.get_pointer_path(node, name)
+        return self.get_pointer_path(pending.origin, name) if pending.origin else None
+
+    def get_base(self, node: dict) -> dict:
+        pending = self._get_pending(node)
+        if pending is None:
+            return self.reader.get_base(node)
+        if pending.instance or not pending.origin:
+            return pending.origin
+        return self.get_base(pending.origin)
+
+    def get_parent(self, node: dict) -> dict:
+        pending = self._get_pending(node)
+        if pending is None:
+            return self.reader.get_parent(node)
+        return pending.parent
+
+    def load_children(self, node: dict) -> list:
+        path = node["nodePath"]
+        pending = self._get_pending(node)
+        if pending is None:
+            children = self.reader.load_children(node)
+        else:
+            # Inherited from the base or copied from the source, with the same relids
+            children = []
+            for origin_child in self.load_children(pending.origin) if pending.origin else []:
+                child_path = f"{path}/{origin_child['nodePath'].rpartition('/')[2]}"
+                if child_path not in self._pending:
+                    child = {"nodePath": child_path, "rootId": node["rootId"]}
+                    self._pending[child_path] = _Pending(child, node, origin_child, pending.instance)
+                children.append(self._pending[child_path].node)
+        children = children + [self._pending[p].node for p in self._new_children.get(path, [])]
+        return [child for child in children if child["nodePath"] not in self._deleted]
+
+    def flush(self):
+        """Sends the buffered changes to the core: creates, copies and deletes in the order they were made, then
+        attributes, pointers and set members. The buffer is empty afterwards.
+        """
+        if not len(self):
+            return
+
+        core = self.core
+        nodes = self._nodes
+        is_deleted = self._is_deleted
+
+        def get_node(path: str) -> dict:
+            return self._real(nodes[path] if path in nodes else self._get_pending({"nodePath": path}).node)
+
+        created = 0
+        deleted = 0
+        for operation, path in self._operations:
+            if operation == "delete":
+                # Deleting an ancestor removes the node anyway
+                if not is_deleted(path.rpartition("/")[0]):
+                    core.delete_node(get_node(path))
+                    deleted += 1
+                continue
+            if is_deleted(path):
+                continue
+            pending = self._pending[path]
+            parent = self._real(pending.parent)
+            origin = self._real(pending.origin) if pending.origin is not None else None
+            if operation == "create":
+                real = core.create_child(parent, origin)
+            else:
+                real = core.copy_node(origin, parent)
+            self._resolved[path] = real
+            pending.node.update(real)
+            created += 1
+
+        changed = 0
+        for path, values in self._attributes.items():
+            if not is_deleted(path):
+                node = get_node(path)
+                for name, value in values.items():
+                    core.set_attribute(node, name, value)
+                    changed += 1
+
+        for path, values in self._pointers.items():
+            if not is_deleted(path):
+                node = get_node(path)
+                for name, target in values.items():
+                    if target is None:
+                        core.set_pointer(node, name, None)
+                    elif not is_deleted(target):
+                        core.set_pointer(node, name, get_node(target))
+                    changed += 1
+
+        for (path, name), member_paths in self._members.items():
+            if not is_deleted(path):
+                node = get_node(path)
+                for member_path in member_paths:
+                    if not is_deleted(member_path):
+                        core.add_member(node, name, get_node(member_path))
+                        changed += 1
+
+        def real_handle(path: str) -> dict:
+            if path in self._resolved:
+                return self._resolved[path]
+            parent_path, _, relid = path.rpartition("/")
+            parent = real_handle(parent_path)
+            return {"nodePath": f"{parent['nodePath']}/{relid}", "rootId": parent["rootId"]}
+
+        # Inherited or copied children that were only read keep the relid of their origin, so their handles get the
+        # real path without loading them. Nothing provisional is left afterwards.
+        for path, pending in self._pending.items():
+            if path not in self._resolved and not is_deleted(path):
+                pending.node.update(real_handle(path))
+
+        logger.debug(f"Flushed {created} new nodes, {deleted} deletions and {changed} changes.")
+
+        self._nodes, self._operations, self._attributes, self._pointers, self._members = {}, [], {}, {}, {}
+        self._created, self._deleted, self._new_children = set(), set(), {}
+        self._pending, self._resolved = {}, {}
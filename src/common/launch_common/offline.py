@@ -0,0 +1,752 @@
+"""
+In-memory stand-in for the node-process behind webgme_bindings, so the python side of the plugins can run without
+node or mongo (debugging, profiling, benchmarks). OfflineWebGME is a WebGME whose requests are answered in process
+from an OfflineModel, the plugins keep using the real Core/Util/Project classes on top of it.
+
+Only the part of the core the plugins use is covered. Calling anything else raises NotImplementedError naming
+the missing request.
+"""
+import base64
+import copy
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import zipfile
+
+from webgme_bindings import WebGME
+from webgme_bindings.core import Core
+from webgme_bindings.project import Project
+from webgme_bindings.util import Util
+from webgme_bindings.exceptions import CoreIllegalArgumentError, JSError
+
+# Marks the json snapshots written by OfflineModel.to_json
+SNAPSHOT_FORMAT = "launch_common.offline/1"
+
+# Keys of the webgme data objects that are not children
+_RESERVED_KEYS = {'_id', '__v', 'atr', 'reg', 'ovr', '_meta', '_sets', '_nullptr', '_minlenrelid', '_mutable'}
+
+_RELID_CHARS = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _snake_case(name: str) -> str:
+    """Returns the python name of a request, e.g. get_attribute for getAttribute"""
+    if name.isupper():
+        return name
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _digest(*parts) -> str:
+    return '#' + hashlib.sha1("\0".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class _Record(object):
+    """Own data of a single node"""
+    __slots__ = ('attributes', 'registry', 'pointers', 'children', 'sets')
+
+    def __init__(self, attributes=None, registry=None, pointers=None, children=None, sets=None):
+        self.attributes = attributes if attributes is not None else {}
+        self.registry = registry if registry is not None else {}
+        self.pointers = pointers if pointers is not None else {}
+        self.children = children if children is not None else []
+        self.sets = sets if sets is not None else {}
+
+    def copy(self):
+        # Values are never changed in place (registry values are copied on the way in and out)
+        return _Record(dict(self.attributes), dict(self.registry), dict(self.pointers), list(self.children),
+                       {name: list(members) for name, members in self.sets.items()})
+
+
+class OfflineModel(object):
+    """Node tree of a project, built from a .webgmex export or a json snapshot.
+
+    Only nodes with data of their own have a record, the children of instances are derived from their base like the
+    core does. Pointers are stored as paths, 'base' included.
+    """
+
+    def __init__(self, records=None, deleted=None):
+        # Path -> _Record
+        self.records = records if records is not None else {'': _Record({'name': 'ROOT'})}
+        # Inherited children that were deleted in the instance
+        self.deleted = deleted if deleted is not None else set()
+        self._relid_counter = 0
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, file_path: str):
+        """Loads a .webgmex export, the project.json inside one or a snapshot written by to_json
+
+        Args:
+            file_path (str): Path of the file
+
+        Returns:
+            OfflineModel: The model
+        """
+        if zipfile.is_zipfile(file_path):
+            return cls.from_webgmex(file_path)
+
+        with open(file_path, 'r', encoding='utf-8') as snapshot_file:
+            data = json.load(snapshot_file)
+        if data.get("format") == SNAPSHOT_FORMAT:
+            return cls.from_json(data)
+        return cls.from_project_json(data)
+
+    @classmethod
+    def from_webgmex(cls, file_path: str):
+        with zipfile.ZipFile(file_path) as archive:
+            project = json.loads(archive.read('project.json').decode('utf-8'))
+        return cls.from_project_json(project)
+
+    @classmethod
+    def from_project_json(cls, project: dict):
+        """Builds the model from the project.json of a .webgmex export (the raw data objects of the project)"""
+        objects = {data['_id']: data for data in project['objects']}
+        model = cls(records={})
+
+        def children(data: dict):
+            for relid, value in data.items():
+                if relid not in _RESERVED_KEYS and isinstance(value, str) and value.startswith('#'):
+                    yield relid, objects[value]
+
+        def load(data: dict, path: str):
+            record = _Record(dict(data.get('atr', {})), copy.deepcopy(data.get('reg', {})))
+            record.attributes.pop('_relguid', None)
+            model.records[path] = record
+            for relid, child in children(data):
+                record.children.append(relid)
+                load(child, path + '/' + relid)
+
+        def load_overlays(data: dict, path: str):
+            # Pointers (base included) and set members are stored in the overlays of the common parent
+            for source, pointers in data.get('ovr', {}).items():
+                for name, target in pointers.items():
+                    if name.endswith('-inv') or not isinstance(target, str):
+                        continue
+                    target_path = None if target == '/_nullptr' else path + target
+                    if '/_' not in source:
+                        model.record(path + source).pointers[name] = target_path
+                        continue
+                    owner, _, rest = source.partition('/_sets/')
+                    parts = rest.split('/')
+                    if name == 'member' and len(parts) == 2 and '/_' not in owner:
+                        model.record(path + owner).sets.setdefault(parts[0], []).append(target_path)
+            for relid, child in children(data):
+                load_overlays(child, path + '/' + relid)
+
+        root = objects[project['rootHash']]
+        load(root, '')
+        load_overlays(root, '')
+        return model
+
+    @classmethod
+    def from_json(cls, data: dict):
+        """Builds the model from a snapshot written by to_json"""
+        records = {
+            path: _Record(record['attributes'], record['registry'], record['pointers'], record['children'],
+                          record['sets'])
+            for path, record in data['records'].items()
+        }
+        return cls(records, set(data['deleted']))
+
+    def to_json(self) -> dict:
+        """Returns the whole model as a json serializable snapshot, read back by load and from_json"""
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "records": {
+                path: {"attributes": record.attributes, "registry": record.registry, "pointers": record.pointers,
+                       "children": record.children, "sets": record.sets}
+                for path, record in self.records.items()
+            },
+            "deleted": sorted(self.deleted)
+        }
+
+    def copy(self):
+        return OfflineModel({path: record.copy() for path, record in self.records.items()}, set(self.deleted))
+
+    def changed(self):
+        self._hashes = {}
+
+    def record(self, path: str) -> _Record:
+        """Returns the own data of the node, creating it if the node had none"""
+        if path not in self.records:
+            self.records[path] = _Record()
+        return self.records[path]
+
+    # Lookups following the core semantics: attributes, pointers and children are inherited from the base
+    def exists(self, path: str) -> bool:
+        if path in self.deleted:
+            return False
+        if path == '' or path in self.records:
+            return True
+        parent, _, relid = path.rpartition('/')
+        return self.exists(parent) and relid in self.child_relids(parent)
+
+    def base_path(self, path: str):
+        record = self.records.get(path)
+        if record is not None and 'base' in record.pointers:
+            return record.pointers['base']
+        if path == '':
+            return None
+        # Inherited child: its base is the child with the same relid in the base of the parent
+        parent, _, relid = path.rpartition('/')
+        parent_base = self.base_path(parent)
+        while parent_base is not None:
+            if relid in self.child_relids(parent_base):
+                return parent_base + '/' + relid
+            parent_base = self.base_path(parent_base)
+        return None
+
+    def bases(self, path: str):
+        """Yields the path and then the paths of the bases of the node"""
+        while path is not None:
+            yield path
+            path = self.base_path(path)
+
+    def child_relids(self, path: str) -> list:
+        relids = []
+        for current in self.bases(path):
+            record = self.records.get(current)
+            if record is not None:
+                relids.extend(relid for relid in record.children if relid not in relids)
+        return [relid for relid in relids if path + '/' + relid not in self.deleted]
+
+    def inherited(self, path: str, field: str, name: str):
+        """Returns the first value of the named attribute/registry/pointer on the node or its bases"""
+        for current in self.bases(path):
+            record = self.records.get(current)
+            if record is not None and name in getattr(record, field):
+                return getattr(record, field)[name]
+        return None
+
+    def inherited_names(self, path: str, field: str) -> list:
+        names = []
+        for current in self.bases(path):
+            record = self.records.get(current)
+            if record is not None:
+                names.extend(name for name in getattr(record, field) if name not in names)
+        return names
+
+    def new_relid(self, parent: str) -> str:
+        taken = set(self.child_relids(parent))
+        while True:
+            self._relid_counter += 1
+            value, relid = self._relid_counter, ''
+            while value:
+                value, digit = divmod(value, len(_RELID_CHARS))
+                relid = _RELID_CHARS[digit] + relid
+            relid = 'o' + relid
+            if relid not in taken and parent + '/' + relid not in self.deleted:
+                return relid
+
+    def content_hash(self, path: str) -> str:
+        if path not in self._hashes:
+            record = self.records.get(path)
+            content = {
+                'base': self.base_path(path),
+                'own': [record.attributes, record.pointers, record.registry, record.sets] if record else None,
+                'children': [self.content_hash(path + '/' + relid) for relid in self.child_relids(path)]
+            }
+            self._hashes[path] = _digest(json.dumps(content, sort_keys=True, default=str))
+        return self._hashes[path]
+
+
+class _CoreRequests(object):
+    """Answers the core requests. Nodes are {'nodePath', 'rootId'} dicts, the rootId being the root hash the tree was
+    loaded from. Loading the same root hash again returns the same tree (until it is unloaded), like the node cache of
+    the core does.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        # Root hash -> working copy of the tree
+        self.trees = {}
+
+    def tree(self, node) -> OfflineModel:
+        if not isinstance(node, dict) or node.get('rootId') not in self.trees:
+            raise CoreIllegalArgumentError({'message': f"Not a node of a loaded tree: {node}"})
+        return self.trees[node['rootId']]
+
+    @staticmethod
+    def _node(path: str, root_id: str) -> dict:
+        return {'nodePath': path, 'rootId': root_id}
+
+    def _related(self, node, path):
+        return self._node(path, node['rootId']) if path is not None else None
+
+    def _changed(self, node) -> _Record:
+        tree = self.tree(node)
+        tree.changed()
+        return tree.record(node['nodePath'])
+
+    # Loading
+    def CONSTANTS(self):
+        return {}
+
+    def load_root(self, root_hash):
+        if root_hash not in self.trees:
+            if root_hash not in self._storage.roots:
+                raise CoreIllegalArgumentError({'message': f"Unknown root hash {root_hash}"})
+            self.trees[root_hash] = self._storage.roots[root_hash].copy()
+        return self._node('', root_hash)
+
+    def load_by_path(self, node, relative_path):
+        path = node['nodePath'] + relative_path if relative_path.startswith('/') or not relative_path else \
+            node['nodePath'] + '/' + relative_path
+        return self._related(node, path) if self.tree(node).exists(path) else None
+
+    def load_child(self, parent, relative_id):
+        path = parent['nodePath'] + '/' + relative_id
+        return self._related(parent, path) if self.tree(parent).exists(path) else None
+
+    def load_children(self, node):
+        path = node['nodePath']
+        return [self._related(node, path + '/' + relid) for relid in self.tree(node).child_relids(path)]
+
+    def load_own_children(self, node):
+        record = self.tree(node).records.get(node['nodePath'])
+        return [self._related(node, node['nodePath'] + '/' + relid) for relid in (record.children if record else [])]
+
+    def load_sub_tree(self, node):
+        tree = self.tree(node)
+        result = []
+        stack = [node['nodePath']]
+        while stack:
+            path = stack.pop()
+            result.append(self._related(node, path))
+            stack.extend(path + '/' + relid for relid in reversed(tree.child_relids(path)))
+        return result
+
+    def get_children_paths(self, node):
+        return [node['nodePath'] + '/' + relid for relid in self.tree(node).child_relids(node['nodePath'])]
+
+    def get_children_relids(self, node):
+        return self.tree(node).child_relids(node['nodePath'])
+
+    # Navigation
+    def get_path(self, node):
+        return node['nodePath']
+
+    def get_relid(self, node):
+        return node['nodePath'].rpartition('/')[2] or None
+
+    def get_parent(self, node):
+        if node['nodePath'] == '':
+            return None
+        return self._related(node, node['nodePath'].rpartition('/')[0])
+
+    def get_root(self, node):
+        return self._related(node, '')
+
+    def get_common_parent(self, nodes):
+        paths = [node['nodePath'].split('/') for node in nodes]
+        common = []
+        for parts in zip(*paths):
+            if len(set(parts)) != 1:
+                break
+            common.append(parts[0])
+        common_path = '/'.join(common)
+        if any(common_path == node['nodePath'] for node in nodes):
+            common_path = common_path.rpartition('/')[0]
+        return self._related(nodes[0], common_path)
+
+    def get_hash(self, node):
+        return self.tree(node).content_hash(node['nodePath'])
+
+    def get_guid(self, node):
+        return hashlib.md5(node['nodePath'].encode('utf-8')).hexdigest()
+
+    # Inheritance and meta
+    def get_base(self, node):
+        return self._related(node, self.tree(node).base_path(node['nodePath']))
+
+    def is_meta_node(self, node):
+        return node['nodePath'] in self.tree(node).records[''].sets.get('MetaAspectSet', [])
+
+    def get_meta_type(self, node):
+        tree = self.tree(node)
+        members = tree.records[''].sets.get('MetaAspectSet', [])
+        for path in tree.bases(node['nodePath']):
+            if path in members:
+                return self._related(node, path)
+        return None
+
+    def get_base_type(self, node):
+        return self.get_meta_type(node)
+
+    def is_type_of(self, node, type_node_or_path):
+        target = type_node_or_path if isinstance(type_node_or_path, str) else type_node_or_path['nodePath']
+        return target in self.tree(node).bases(node['nodePath'])
+
+    def is_instance_of(self, node, base_node_or_path):
+        return self.is_type_of(node, base_node_or_path)
+
+    def get_fully_qualified_name(self, node):
+        return self.get_attribute(node, 'name')
+
+    # Attributes, registry, pointers and sets
+    def get_attribute(self, node, name):
+        return self.tree(node).inherited(node['nodePath'], 'attributes', name)
+
+    def get_own_attribute(self, node, name):
+        record = self.tree(node).records.get(node['nodePath'])
+        return record.attributes.get(name) if record is not None else None
+
+    def get_attribute_names(self, node):
+        return self.tree(node).inherited_names(node['nodePath'], 'attributes')
+
+    def get_own_attribute_names(self, node):
+        record = self.tree(node).records.get(node['nodePath'])
+        return list(record.attributes) if record is not None else []
+
+    def get_valid_attribute_names(self, node):
+        return self.get_attribute_names(node)
+
+    def set_attribute(self, node, name, value):
+        self._changed(node).attributes[name] = value
+
+    def del_attribute(self, node, name):
+        self._changed(node).attributes.pop(name, None)
+
+    def get_registry(self, node, name):
+        return copy.deepcopy(self.tree(node).inherited(node['nodePath'], 'registry', name))
+
+    def get_registry_names(self, node):
+        return self.tree(node).inherited_names(node['nodePath'], 'registry')
+
+    def set_registry(self, node, name, value):
+        self._changed(node).registry[name] = copy.deepcopy(value)
+
+    def del_registry(self, node, name):
+        self._changed(node).registry.pop(name, None)
+
+    def get_pointer_names(self, node):
+        return [name for name in self.tree(node).inherited_names(node['nodePath'], 'pointers') if name != 'base']
+
+    def get_pointer_path(self, node, name):
+        return self.tree(node).inherited(node['nodePath'], 'pointers', name)
+
+    def set_pointer(self, node, name, target):
+        self._changed(node).pointers[name] = target['nodePath'] if target else None
+
+    def del_pointer(self, node, name):
+        self._changed(node).pointers.pop(name, None)
+
+    def get_set_names(self, node):
+        record = self.tree(node).records.get(node['nodePath'])
+        return list(record.sets) if record is not None else []
+
+    def get_member_paths(self, node, name):
+        record = self.tree(node).records.get(node['nodePath'])
+        return list(record.sets.get(name, [])) if record is not None else []
+
+    def add_member(self, node, name, member):
+        members = self._changed(node).sets.setdefault(name, [])
+        if member['nodePath'] not in members:
+            members.append(member['nodePath'])
+
+    def del_member(self, node, name, path):
+        members = self._changed(node).sets.get(name, [])
+        if path in members:
+            members.remove(path)
+
+    # Structure
+    def create_child(self, node, base):
+        return self.create_node({'parent': node, 'base': base})
+
+    def create_node(self, parameters=None):
+        parameters = parameters or {}
+        parent = parameters['parent']
+        tree = self.tree(parent)
+        relid = parameters.get('relid') or tree.new_relid(parent['nodePath'])
+        path = parent['nodePath'] + '/' + relid
+        tree.deleted.discard(path)
+        tree.record(parent['nodePath']).children.append(relid)
+        base = parameters.get('base')
+        tree.records[path] = _Record(pointers={'base': base['nodePath'] if base else None})
+        tree.changed()
+        return self._related(parent, path)
+
+    def copy_node(self, node, parent):
+        tree = self.tree(node)
+        copied = self.create_node({'parent': parent, 'base': self.get_base(node)})
+        own = tree.records.get(node['nodePath'])
+        if own is not None:
+            record = tree.record(copied['nodePath'])
+            record.attributes.update(own.attributes)
+            record.registry.update(own.registry)
+            record.pointers.update({name: path for name, path in own.pointers.items() if name != 'base'})
+        for child in self.load_children(node):
+            if child['nodePath'] in tree.records:
+                self.copy_node(child, copied)
+        return copied
+
+    def copy_nodes(self, nodes, parent):
+        return [self.copy_node(node, parent) for node in nodes]
+
+    def delete_node(self, node):
+        tree = self.tree(node)
+        path = node['nodePath']
+        parent, _, relid = path.rpartition('/')
+        record = tree.records.get(parent)
+        if record is not None and relid in record.children:
+            record.children.remove(relid)
+        for key in [key for key in tree.records if key == path or key.startswith(path + '/')]:
+            del tree.records[key]
+        # Inherited children stay hidden once deleted
+        tree.deleted.add(path)
+        tree.changed()
+
+
+class _UtilRequests(object):
+    """Answers the util requests, traverse and equal are done by Util itself"""
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def gme_config(self):
+        return {}
+
+    def META(self, node, namespace=None):
+        core = self._storage.core_requests
+        tree = core.tree(node)
+        result = {}
+        for path in tree.records[''].sets.get('MetaAspectSet', []):
+            if path is not None and tree.exists(path):
+                result[tree.inherited(path, 'attributes', 'name')] = core._related(node, path)
+        return result
+
+    def save(self, root_node, commit_hash, branch_name=None, msg='Save initiated from python api.'):
+        tree = self._storage.core_requests.tree(root_node)
+        return self._storage.commit(tree, [commit_hash], msg, branch_name)
+
+    def unload_root(self, node):
+        self._storage.core_requests.trees.pop(node['rootId'], None)
+
+
+class _ProjectRequests(object):
+    """Answers the project requests, commits and branches are kept in memory"""
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def get_project_info(self):
+        return {'_id': self._storage.project_name, 'name': self._storage.project_name}
+
+    def get_branches(self):
+        return dict(self._storage.branches)
+
+    def get_branch_hash(self, branch_name):
+        return self._storage.branches.get(branch_name, '')
+
+    def set_branch_hash(self, branch_name, new_hash, old_hash):
+        return self._storage.update_branch(branch_name, new_hash, old_hash)
+
+    def create_branch(self, branch_name, new_hash):
+        return self._storage.update_branch(branch_name, new_hash, '')
+
+    def delete_branch(self, branch_name, old_hash):
+        return self._storage.update_branch(branch_name, '', old_hash)
+
+    def get_root_hash(self, branch_name_or_commit_hash):
+        commit_hash = self._storage.branches.get(branch_name_or_commit_hash, branch_name_or_commit_hash)
+        return self.get_commit_object(commit_hash)['root']
+
+    def get_commit_object(self, branch_name_or_commit_hash):
+        commit_hash = self._storage.branches.get(branch_name_or_commit_hash, branch_name_or_commit_hash)
+        if commit_hash not in self._storage.commits:
+            raise CoreIllegalArgumentError({'message': f"Unknown commit {branch_name_or_commit_hash}"})
+        return dict(self._storage.commits[commit_hash])
+
+
+class _PluginRequests(object):
+    """Answers the requests of the plugin to its plugin manager: config, input files and results"""
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def get_current_config(self):
+        return self._storage.config
+
+    def get_file(self, metadata_hash):
+        return self._storage.blobs[metadata_hash].decode('utf-8')
+
+    def get_bin_file(self, metadata_hash, sub_path=None):
+        content = self._storage.blobs[metadata_hash]
+        if sub_path:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                content = archive.read(sub_path)
+        return base64.b64encode(content).decode('utf-8')
+
+    def get_file_metadata(self, metadata_hash):
+        if metadata_hash not in self._storage.blobs:
+            raise JSError(f"Blob {metadata_hash} does not exist")
+        return {'name': self._storage.blob_names.get(metadata_hash, ''), 'size': len(self._storage.blobs[metadata_hash])}
+
+    def add_file(self, name, content, is_bytes=False):
+        return self._storage.add_result(name, base64.b64decode(content) if is_bytes else content.encode('utf-8'))
+
+    def add_artifact(self, name, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for file_name, entry in files.items():
+                archive.writestr(file_name, base64.b64decode(entry['content']) if entry['binary'] else entry['content'])
+        return self._storage.add_result(name if name.endswith('.zip') else name + '.zip', buffer.getvalue())
+
+    def send_notification(self, message):
+        self._storage.notifications.append(message)
+
+    def create_message(self, node, message, severity='info'):
+        self._storage.messages.append({'node': node, 'message': message, 'severity': severity})
+
+    def result_set_success(self, success):
+        self._storage.success = success
+
+    def result_set_error(self, message):
+        self._storage.error = message
+
+
+class OfflineWebGME(WebGME):
+    """WebGME connection answered in process from an OfflineModel instead of by a corezmq server.
+
+    The model is committed to the master branch of an in-memory project. The plugin requests are answered as well:
+    the config comes from config, input files are added with put_file, and the files added by the plugin are kept
+    in results (name -> content) and also written to output_dir when it is given.
+    """
+
+    def __init__(self, model: OfflineModel, logger=None, config: dict = None, output_dir: str = None,
+                 project_name: str = 'offline'):
+        """
+        Args:
+            model (OfflineModel): The project, committed to the master branch
+            logger (logging.Logger, optional): Logger of the connection. Defaults to the offline logger.
+            config (dict, optional): Plugin config returned to the plugins. Defaults to an empty config.
+            output_dir (str, optional): Directory to write the files added by the plugins to. Defaults to None.
+            project_name (str, optional): Name of the project. Defaults to offline.
+        """
+        # No socket, so the constructor of WebGME is not used
+        self.logger = logger or logging.getLogger('offline')
+        self.project_name = project_name
+        self.config = config if config is not None else {}
+        self.output_dir = output_dir
+
+        # Storage of the in-memory project and blob store
+        self.roots = {}
+        self.commits = {}
+        self.branches = {}
+        self.blobs = {}
+        self.blob_names = {}
+        self.results = {}
+        self.notifications = []
+        self.messages = []
+        self.success = None
+        self.error = None
+
+        self.core_requests = _CoreRequests(self)
+        self._handlers = {
+            'core': self.core_requests,
+            'util': _UtilRequests(self),
+            'project': _ProjectRequests(self),
+            'plugin': _PluginRequests(self)
+        }
+        self._pending = None
+
+        self.commit(model, [], 'Initial commit', 'master')
+
+        self.core = Core(self)
+        self.util = Util(self)
+        self.project = Project(self)
+
+    @classmethod
+    def open(cls, model_file: str, logger=None, metadata_path: str = None, asset_files: dict = None,
+             output_dir: str = None):
+        """Opens a model file for running a plugin offline
+
+        Args:
+            model_file (str): A .webgmex export or a snapshot, see OfflineModel.load
+            logger (logging.Logger, optional): Logger of the connection. Defaults to None.
+            metadata_path (str, optional): metadata.json of the plugin, its config defaults are used. Defaults to None.
+            asset_files (dict, optional): Config name -> local file for the asset options. Defaults to None.
+            output_dir (str, optional): Directory to write the files added by the plugin to. Defaults to None.
+
+        Returns:
+            OfflineWebGME: The connection
+        """
+        config = {}
+        if metadata_path is not None:
+            with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
+                config = {entry['name']: entry['value'] for entry in json.load(metadata_file)['configStructure']}
+
+        webgme = cls(OfflineModel.load(model_file), logger, config, output_dir,
+                     os.path.splitext(os.path.basename(model_file))[0])
+        for name, file_path in (asset_files or {}).items():
+            with open(file_path, 'rb') as asset_file:
+                webgme.config[name] = webgme.put_file(os.path.basename(file_path), asset_file.read())
+        return webgme
+
+    def disconnect(self):
+        pass
+
+    def send_request(self, payload):
+        self._pending = payload
+
+    def handle_response(self):
+        payload, self._pending = self._pending, None
+        handler = self._handlers[payload.get('type')]
+        name = _snake_case(payload['name'])
+        if name.startswith('_') or not hasattr(handler, name):
+            raise NotImplementedError(f"{payload.get('type')}.{name} is not available offline")
+        return getattr(handler, name)(*payload['args'])
+
+    # Storage
+    def commit(self, tree: OfflineModel, parents: list, msg: str, branch_name: str = None) -> dict:
+        """Stores a copy of the tree as a new commit, moving the branch to it when one is given"""
+        root_hash = _digest('root', len(self.roots))
+        self.roots[root_hash] = tree.copy()
+        commit_hash = _digest('commit', len(self.commits), msg)
+        self.commits[commit_hash] = {'_id': commit_hash, 'root': root_hash, 'parents': parents, 'message': msg}
+        if branch_name is None:
+            return {'status': None, 'hash': commit_hash}
+        return self.update_branch(branch_name, commit_hash, parents[0] if parents else '')
+
+    def update_branch(self, branch_name: str, new_hash: str, old_hash: str) -> dict:
+        """Moves the branch if it is still at old_hash, an empty hash means the branch does not exist"""
+        if self.branches.get(branch_name, '') != old_hash:
+            return {'status': 'FORKED', 'hash': new_hash}
+        if new_hash:
+            self.branches[branch_name] = new_hash
+        else:
+            self.branches.pop(branch_name, None)
+        return {'status': 'SYNCED', 'hash': new_hash}
+
+    def put_file(self, name: str, content) -> str:
+        """Adds an input file to the blob store
+
+        Args:
+            name (str): Name of the file
+            content (str or bytes): Content of the file
+
+        Returns:
+            str: Metadata hash to put in the plugin config
+        """
+        data = content if isinstance(content, bytes) else content.encode('utf-8')
+        metadata_hash = hashlib.sha1(data).hexdigest()
+        self.blobs[metadata_hash] = data
+        self.blob_names[metadata_hash] = name
+        return metadata_hash
+
+    def add_result(self, name: str, data: bytes) -> str:
+        self.results[name] = data
+        if self.output_dir is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, name), 'wb') as output:
+                output.write(data)
+            self.logger.info(f"Wrote {os.path.join(self.output_dir, name)}")
+        return self.put_file(name, data)
+
+    def save_snapshot(self, file_path: str, branch_name: str = 'master'):
+        """Writes the head of the branch as a json snapshot, to be loaded again with OfflineModel.load"""
+        commit = self.commits[self.branches[branch_name]]
+        with open(file_path, 'w', encoding='utf-8') as snapshot_file:
+            json.dump(self.roots[commit['root']].to_json(), snapshot_file)
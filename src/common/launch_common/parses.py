@@ -0,0 +1,171 @@
+"""
+Local cache of the launch files parsed by ImportLaunch, so importing the same file again (into another project or
+branch, or from another archive) skips the XML parsing. The events of a parse (see ImportLaunch.iter_ros_launch) are
+stored by the hash of the content of the file, as gzipped json lines.
+The cache directory defaults to launch_parse_cache-<uid> in the temp directory and can be changed with the
+LAUNCH_PARSE_CACHE environment variable. The cached events are imported as they are, so like the export caches a
+directory that another user owns or can write to is not used (see fragments.private_directory).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from .fragments import private_directory
+
+logger = logging.getLogger('launch_common')
+
+# Bumped whenever the way parses are stored changes, so files of older versions are not read
+FORMAT = 1
+# Least recently used parses are dropped beyond this
+MAX_FILES = 1000
+# Events per line of a cached parse, so json is called once per batch and a batch is all that is kept in memory
+BATCH_SIZE = 512
+
+_PREFIX = "parse-"
+_SUFFIX = ".jsonl.gz"
+
+
+class ParseCache(object):
+    """Events of the launch files parsed before, one file per content.
+
+    Events are written in batches while the parse streams by and read back a batch at a time, so neither side keeps the
+    events of a whole file in memory. A file only replaces the cached one once its parse went through to the end.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Where the parses are kept
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        # Files of an archive are parsed on several threads
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        """Returns the parse cache of the current user
+
+        Returns:
+            ParseCache: The cache, None if there is no cache directory that can be used
+        """
+        directory = private_directory("LAUNCH_PARSE_CACHE", "launch_parse_cache")
+        return cls(directory) if directory is not None else None
+
+    @staticmethod
+    def key(text: str, version: int, chunk_size: int = 1 << 20) -> str:
+        """Returns the key of the parse of a launch file
+
+        Args:
+            text (str): Content of the launch file
+            version (int): Version of the parser, bumped by the caller whenever the events it yields change
+            chunk_size (int, optional): Characters encoded at a time, so a large file is not copied whole.
+                Defaults to 1 MiB.
+
+        Returns:
+            str: sha1 of the format, the version of the parser and the content
+        """
+        digest = hashlib.sha1(f"{FORMAT}\0{version}\0".encode("utf-8"))
+        for offset in range(0, len(text), chunk_size):
+            digest.update(text[offset:offset + chunk_size].encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, _PREFIX + key + _SUFFIX)
+
+    def events(self, key: str, parse) -> iter:
+        """Yields the events of a launch file, read from the cache if the same content was parsed before, otherwise
+        from parse while they are stored
+
+        Args:
+            key (str): See key
+            parse (callable): Returns the events of the launch file, called only if they are not cached
+
+        Yields:
+            tuple: The events, as parse yields them
+        """
+        path = self._path(key)
+        # A broken file is only noticed while reading it, the events already yielded are skipped on parsing
+        yielded = 0
+        if os.path.isfile(path):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        for event, tag, data in json.loads(line):
+                            yield event, tag, data
+                            yielded += 1
+                with self._lock:
+                    self.hits += 1
+                # Marks it as recently used
+                os.utime(path)
+                return
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"Ignoring the parse cache {path}: {e}")
+        with self._lock:
+            self.misses += 1
+
+        out = None
+        temp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(fd)
+            # Parses are mostly repeated names, the fastest level already makes them small
+            out = gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=1)
+        except OSError as e:
+            logger.warning(f"Could not write the parse cache {path}: {e}")
+
+        def write(batch: list):
+            nonlocal out
+            try:
+                out.write(json.dumps(batch, separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write the parse cache {path}: {e}")
+                out.close()
+                out = None
+
+        complete = False
+        batch = []
+        try:
+            for position, event in enumerate(parse()):
+                if out is not None:
+                    batch.append(event)
+                    if len(batch) == BATCH_SIZE:
+                        write(batch)
+                        batch = []
+                if position >= yielded:
+                    yield event
+            if out is not None and batch:
+                write(batch)
+            complete = True
+        finally:
+            if out is not None:
+                try:
+                    out.close()
+                    if complete:
+                        # Concurrent imports of the same file write the same content, the last one wins
+                        os.replace(temp_path, path)
+                        temp_path = None
+                except OSError as e:
+                    logger.warning(f"Could not save the parse cache {path}: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+        if complete and out is not None:
+            self._prune()
+
+    def _prune(self):
+        try:
+            files = [entry for entry in os.scandir(self.directory)
+                     if entry.name.startswith(_PREFIX) and entry.name.endswith(_SUFFIX)]
+            if len(files) <= MAX_FILES:
+                return
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in files[:len(files) - MAX_FILES]:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not prune the parse cache in {self.directory}: {e}")
@@ -0,0 +1,14 @@
+"""
+Thread pool for the work a plugin shares out. The tasks run in a copy of the context of the thread that submits them,
+so context variables set for a plugin execution (e.g. the job of the plugin worker, see worker.py) hold in the pool
+threads as well.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ContextPool(ThreadPoolExecutor):
+    """ThreadPoolExecutor that runs each task in the context it was submitted from"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
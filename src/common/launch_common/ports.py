@@ -0,0 +1,28 @@
+"""
+Port selection for the CoreZMQ servers started from python (run_debug.py).
+"""
+import os
+import socket
+
+# Same first port as the plugin wrappers (START_PORT), COREZMQ_START_PORT changes it for both
+START_PORT = 5555
+
+
+def find_free_port(start_port: int = None) -> int:
+    """Finds the first port from start_port on that nothing listens on at 127.0.0.1
+
+    Args:
+        start_port (int, optional): First port to try. Defaults to COREZMQ_START_PORT or START_PORT.
+
+    Returns:
+        int: The free port
+    """
+    port = start_port or int(os.environ.get("COREZMQ_START_PORT") or START_PORT)
+    while port <= 65535:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(("127.0.0.1", port))
+                return port
+            except OSError:
+                port += 1
+    raise RuntimeError(f"No free port from {start_port} on")
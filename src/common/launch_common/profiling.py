@@ -0,0 +1,151 @@
+"""
+Opt-in counting and timing of the bridge calls a plugin makes, enabled per run with the profileRpc config option.
+"""
+import functools
+import json
+import re
+import time
+
+# Name of the plugin config option that enables profiling
+CONFIG_OPTION = "profileRpc"
+
+# Phase of the calls made before the first rpc_phase
+DEFAULT_PHASE = "main"
+
+
+def _python_name(request_type: str, name: str) -> str:
+    """Returns the python name of a bridge request, e.g. core.get_attribute for ('core', 'getAttribute')"""
+    if name != "META":
+        name = re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+    return f"{request_type}.{name}"
+
+
+class CallProfile(object):
+    """Counts and times every request sent through a WebGME connection, by method and by phase.
+
+    The connection is a zmq REQ socket, so requests and responses strictly alternate and each response
+    belongs to the last request sent.
+    """
+
+    def __init__(self):
+        self.phase = DEFAULT_PHASE
+        # Method -> [count, seconds, max seconds]
+        self.calls = {}
+        # Phase -> [count, seconds]
+        self.phases = {}
+        self.started = None
+        self.seconds = 0.0
+        self._webgme = None
+        self._pending = None
+
+    def attach(self, webgme):
+        """Starts recording the requests of webgme"""
+        self._webgme = webgme
+        send_request = webgme.send_request
+        handle_response = webgme.handle_response
+
+        def timed_send_request(payload):
+            self._pending = (_python_name(payload.get("type", ""), payload.get("name", "")), time.perf_counter())
+            return send_request(payload)
+
+        def timed_handle_response():
+            try:
+                return handle_response()
+            finally:
+                if self._pending is not None:
+                    name, start = self._pending
+                    self._pending = None
+                    self.record(name, time.perf_counter() - start)
+
+        webgme.send_request = timed_send_request
+        webgme.handle_response = timed_handle_response
+        self.started = time.perf_counter()
+
+    def detach(self):
+        """Stops recording and restores the connection"""
+        if self._webgme is not None:
+            del self._webgme.send_request
+            del self._webgme.handle_response
+            self._webgme = None
+            self.seconds = time.perf_counter() - self.started
+
+    def record(self, name: str, seconds: float):
+        call = self.calls.setdefault(name, [0, 0.0, 0.0])
+        call[0] += 1
+        call[1] += seconds
+        call[2] = max(call[2], seconds)
+        phase = self.phases.setdefault(self.phase, [0, 0.0])
+        phase[0] += 1
+        phase[1] += seconds
+
+    def to_json(self) -> dict:
+        """Returns the profile as a json serializable dict, methods and phases sorted by time spent"""
+        return {
+            "seconds": self.seconds,
+            "bridge_seconds": sum(call[1] for call in self.calls.values()),
+            "bridge_calls": sum(call[0] for call in self.calls.values()),
+            "methods": [
+                {"method": name, "count": count, "seconds": seconds, "max_seconds": max_seconds}
+                for name, (count, seconds, max_seconds) in sorted(self.calls.items(), key=lambda item: -item[1][1])
+            ],
+            "phases": [
+                {"phase": name, "count": count, "seconds": seconds}
+                for name, (count, seconds) in self.phases.items()
+            ]
+        }
+
+    def table(self) -> str:
+        """Returns the profile as a text table for the log"""
+        data = self.to_json()
+        width = max([len(row["method"]) for row in data["methods"]] + [len(row["phase"]) for row in data["phases"]] + [6])
+        lines = [
+            f"{data['bridge_calls']} bridge calls took {data['bridge_seconds']:.3f}s of {data['seconds']:.3f}s",
+            f"{'method':<{width}} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"
+        ]
+        for row in data["methods"]:
+            lines.append(f"{row['method']:<{width}} {row['count']:>8} {row['seconds'] * 1000:>10.1f} "
+                         f"{row['seconds'] * 1000 / row['count']:>9.3f} {row['max_seconds'] * 1000:>9.3f}")
+        lines.append(f"{'phase':<{width}} {'calls':>8} {'total ms':>10}")
+        for row in data["phases"]:
+            lines.append(f"{row['phase']:<{width}} {row['count']:>8} {row['seconds'] * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+def rpc_phase(plugin, name: str):
+    """Attributes the following bridge calls of the plugin to the named phase, does nothing unless profiling
+
+    Args:
+        plugin (PluginBase): The running plugin
+        name (str): Name of the phase, shown in the report
+    """
+    profile = getattr(plugin, "rpc_profile", None)
+    if profile is not None:
+        profile.phase = name
+
+
+def profiled(main):
+    """Decorates the main of a plugin so that, when the profileRpc config option is set, every bridge call of the run
+    is counted and timed. The report is logged and added to the result as <plugin>_rpc_profile.json.
+    """
+
+    @functools.wraps(main)
+    def wrapper(self):
+        config = self.get_current_config() or {}
+        if not config.get(CONFIG_OPTION):
+            return main(self)
+
+        self.rpc_profile = CallProfile()
+        self.rpc_profile.attach(self._webgme)
+        try:
+            return main(self)
+        finally:
+            self.rpc_profile.detach()
+            # The report must not replace an error of the run, e.g. when the connection to the server is gone
+            try:
+                self.logger.info(f"Bridge calls of {type(self).__name__}:\n{self.rpc_profile.table()}")
+                self.add_file(f"{type(self).__name__}_rpc_profile.json",
+                              json.dumps(self.rpc_profile.to_json(), indent=4))
+            except Exception as e:
+                self.logger.error(f"Could not add the bridge call profile: {str(e)}")
+
+    return wrapper
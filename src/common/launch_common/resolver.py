@@ -0,0 +1,350 @@
+"""
+Offline evaluation of a launch file the way roslaunch would, from the model alone: $(arg) substitutions, if/unless
+conditions and namespaces are resolved without starting roscore. The result lists the parameters and nodes that
+would be launched, similar to roslaunch --dump-params and --nodes.
+"""
+import re
+import shlex
+from graphlib import CycleError, TopologicalSorter
+
+# A substitution and its arguments, e.g. $(arg name) or $(optenv VAR default value)
+_SUBSTITUTION = re.compile(r"\$\(\s*([a-z]+)\s*([^()]*?)\s*\)")
+_ARG = re.compile(r"\$\(\s*arg\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\)")
+
+# Substitutions that need the machine the file is launched on, they are kept as written
+_UNRESOLVED_SUBSTITUTIONS = {"find", "anon", "eval", "dirname"}
+
+# Same order as the tags of an exported launch file, so remaps and envs of a container come before its nodes
+_TAG_ORDER = {"Argument": 1, "rosparam": 2, "Parameter": 3, "Env": 4, "Remap": 5, "Include": 6, "Group": 7, "Machine": 8, "Node": 9, "Test": 10}
+
+# Param types of roslaunch, "yaml" values are kept as text
+_PARAM_TYPES = {"str", "int", "double", "bool", "yaml"}
+
+
+def _join(ns: str, name: str) -> str:
+    """Returns the global name of name in namespace ns (which ends with /)"""
+    if name.startswith("/"):
+        return name
+    return ns + name
+
+
+def _convert(value: str, param_type: str):
+    """Converts a param value the way roslaunch does, the type is guessed when none is given"""
+    if param_type in ("str", "yaml"):
+        return value
+    if param_type == "bool":
+        if value.strip().lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"{value!r} is not a bool")
+        return value.strip().lower() in ("true", "1")
+    if param_type == "int":
+        return int(value)
+    if param_type == "double":
+        return float(value)
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    if value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return value
+
+
+def parse_launch_args(text: str) -> dict:
+    """Parses args given the way roslaunch takes them on the command line
+
+    Args:
+        text (str): e.g. 'robot:=rover sim:=true name:="two words"'
+
+    Returns:
+        dict: Name -> value
+
+    Raises:
+        ValueError: If an item is not name:=value
+    """
+    args = {}
+    for item in shlex.split(text or ""):
+        name, separator, value = item.partition(":=")
+        if not separator or not name:
+            raise ValueError(f"Expected name:=value, got {item!r}")
+        args[name] = value
+    return args
+
+
+class LaunchResolver(object):
+    """Resolves a LaunchFile node of a model.
+
+    Args are evaluated first, in the order of their dependencies, then the tree is walked once with the namespace,
+    remaps and envs of every container. Subtrees whose if/unless is false are pruned. Every substitution is
+    evaluated once per launch file and cached, since the same values are used by many tags.
+
+    Included files are not in the model, so includes are listed with the args passed to them instead of being
+    resolved. $(find), $(anon), $(eval) and $(dirname) need the machine the file is launched on and are kept as
+    written, as are params read from commands or files and the YAML of rosparam tags. So is $(env), unless the
+    environment of that machine is given; without it $(optenv) takes its default.
+    """
+
+    def __init__(self, model, args: dict = None, env: dict = None):
+        """
+        Args:
+            model (ModelSnapshot): Snapshot containing the launch file
+            args (dict, optional): Values of args given on the command line (name:=value). Defaults to None.
+            env (dict, optional): Environment variables for $(env) and $(optenv). Defaults to None, for keeping
+                $(env) as written, the environment of the server is not the one the file is launched in.
+        """
+        self.model = model
+        self.args = dict(args or {})
+        self.env = dict(env) if env is not None else None
+
+    def resolve(self, launch_file: dict) -> dict:
+        """Resolves the launch file
+
+        Args:
+            launch_file (dict): LaunchFile node
+
+        Returns:
+            dict: args, params (global name -> value), nodes, includes, pruned (paths of the tags left out by their
+                if/unless), unresolved (what needs the machine the file is launched on) and errors
+        """
+        self._values = {}
+        self._cache = {}
+        self._unresolved = set()
+        self._errors = []
+        self._pruned = []
+
+        self._resolve_args(launch_file)
+
+        result = {"args": self._values, "params": {}, "nodes": [], "includes": []}
+        self._walk(launch_file, result)
+        result["pruned"] = self._pruned
+        result["unresolved"] = sorted(self._unresolved)
+        result["errors"] = self._errors
+        return result
+
+    def substitute(self, text: str) -> str:
+        """Evaluates the substitutions in text with the args resolved so far
+
+        Args:
+            text (str): Attribute value
+
+        Returns:
+            str: The value with every substitution that can be evaluated offline replaced
+
+        Raises:
+            ValueError: If an arg or environment variable is not defined
+        """
+        if not text or "$(" not in text:
+            return text
+        if text not in self._cache:
+            if "$(eval" in text:
+                # Python expressions, usually with parentheses of their own
+                self._unresolved.add(text)
+            self._cache[text] = _SUBSTITUTION.sub(self._evaluate, text)
+        return self._cache[text]
+
+    def _evaluate(self, match) -> str:
+        command, argument = match.group(1), match.group(2)
+        if command == "arg":
+            if argument not in self._values:
+                raise ValueError(f"arg {argument!r} is not defined")
+            return self._values[argument]
+        if command == "env" and self.env is None:
+            self._unresolved.add(match.group(0))
+            return match.group(0)
+        if command == "env":
+            if argument not in self.env:
+                raise ValueError(f"environment variable {argument!r} is not set")
+            return self.env[argument]
+        if command == "optenv":
+            name, _, default = argument.partition(" ")
+            return (self.env or {}).get(name, default.strip())
+        if command not in _UNRESOLVED_SUBSTITUTIONS:
+            raise ValueError(f"unknown substitution {match.group(0)!r}")
+        self._unresolved.add(match.group(0))
+        return match.group(0)
+
+    def _condition(self, node: dict) -> bool:
+        """Evaluates the if and unless attributes of a tag
+
+        Raises:
+            ValueError: If a condition is neither true nor false
+        """
+        for name, expected in (("if", True), ("unless", False)):
+            value = self.model.get_attribute(node, name)
+            if not value:
+                continue
+            value = self.substitute(value).strip().lower()
+            if value not in ("true", "1", "false", "0"):
+                raise ValueError(f"{name} must be true or false, got {value!r}")
+            if (value in ("true", "1")) != expected:
+                return False
+        return True
+
+    def _error(self, node: dict, error: Exception):
+        self._errors.append(f"{node['nodePath']}: {error}")
+
+    def _resolve_args(self, launch_file: dict):
+        """Evaluates the args declared in the launch file, each one after the args it refers to"""
+        model = self.model
+        # Name -> [(declaration, containers up to the launch file)]
+        declarations = {}
+        precedence = {}
+
+        stack = [(launch_file, ())]
+        while stack:
+            node, containers = stack.pop()
+            for child in model.load_children(node):
+                child_type = model.get_type(child)
+                if child_type == "Argument":
+                    name = model.get_attribute(child, "name")
+                    declarations.setdefault(name, []).append((child, containers))
+                    refs = precedence.setdefault(name, set())
+                    for tag in (child,) + containers:
+                        for attribute in ("value", "default", "if", "unless"):
+                            refs.update(_ARG.findall(model.get_attribute(tag, attribute) or ""))
+                elif child_type == "Group":
+                    # Args passed to an include or set inside a node are not declarations of this file
+                    stack.append((child, containers + (child,)))
+
+        try:
+            order = list(TopologicalSorter(precedence).static_order())
+        except CycleError as e:
+            self._errors.append(f"{launch_file['nodePath']}: circular dependency in args {' -> '.join(e.args[1])}")
+            return
+
+        for name in order:
+            for declaration, containers in declarations.get(name, []):
+                try:
+                    if not all(self._condition(tag) for tag in containers + (declaration,)):
+                        continue
+                    value = model.get_attribute(declaration, "value")
+                    default = model.get_attribute(declaration, "default")
+                    if value:
+                        if name in self.args:
+                            raise ValueError(f"cannot override arg {name!r}, which has a value")
+                        self._values[name] = self.substitute(value)
+                    elif name in self.args:
+                        self._values[name] = self.args[name]
+                    elif default:
+                        self._values[name] = self.substitute(default)
+                    else:
+                        raise ValueError(f"arg {name!r} is required")
+                except ValueError as e:
+                    self._error(declaration, e)
+                break
+
+        for name in self.args:
+            if name not in declarations:
+                self._errors.append(f"{launch_file['nodePath']}: unused arg {name!r}")
+
+    def _walk(self, launch_file: dict, result: dict):
+        """Collects the params, nodes and includes, with an explicit stack so deep models are no problem"""
+        model = self.model
+        # (container, namespace, remaps, envs, node name of the container if it is a node)
+        stack = [(launch_file, "/", {}, {}, None)]
+        while stack:
+            container, ns, remaps, envs, node_name = stack.pop()
+            remaps = dict(remaps)
+            envs = dict(envs)
+            # Containers are pushed in reverse, so they are walked in the order of the file
+            nested = []
+
+            children = sorted(model.load_children(container), key=lambda child: _TAG_ORDER.get(model.get_type(child), 100))
+            for child in children:
+                child_type = model.get_type(child)
+                if child_type not in _TAG_ORDER or child_type in ("Argument", "Machine", "Test"):
+                    continue
+
+                try:
+                    if not self._condition(child):
+                        self._pruned.append(child["nodePath"])
+                        continue
+                    values = {name: self.substitute(model.get_attribute(child, name))
+                              for name in model.get_attribute_names(child)
+                              if isinstance(model.get_attribute(child, name), str)}
+
+                    if child_type == "Remap":
+                        remaps[_join(ns, values.get("from", ""))] = _join(ns, values.get("to", ""))
+                    elif child_type == "Env":
+                        envs[values.get("name", "")] = values.get("value", "")
+                    elif child_type == "Parameter":
+                        self._param(child, values, ns, node_name, result["params"])
+                    elif child_type == "rosparam":
+                        self._rosparam(child, values, ns, node_name, result["params"])
+                    elif child_type == "Group":
+                        group_ns = values.get("name")
+                        nested.append((child, _join(ns, group_ns) + "/" if group_ns else ns, remaps, envs, None))
+                    elif child_type == "Include":
+                        include_ns = _join(ns, values["ns"]) + "/" if values.get("ns") else ns
+                        result["includes"].append(self._include(child, values, include_ns))
+                    elif child_type == "Node":
+                        node_ns = _join(ns, values["ns"]) + "/" if values.get("ns") else ns
+                        name = node_ns + values.get("name", "")
+                        node_remaps = dict(remaps)
+                        node_envs = dict(envs)
+                        # Remaps and envs inside the node only apply to it
+                        for inner in model.load_children(child):
+                            inner_type = model.get_type(inner)
+                            if inner_type in ("Remap", "Env") and self._condition(inner):
+                                inner_values = {n: self.substitute(model.get_attribute(inner, n)) for n in ("from", "to", "name", "value")}
+                                if inner_type == "Remap":
+                                    node_remaps[_join(node_ns, inner_values["from"] or "")] = _join(node_ns, inner_values["to"] or "")
+                                else:
+                                    node_envs[inner_values["name"] or ""] = inner_values["value"] or ""
+                        result["nodes"].append({
+                            "name": name,
+                            "pkg": values.get("pkg"),
+                            "type": values.get("type"),
+                            "args": values.get("args", ""),
+                            "machine": values.get("machine") or None,
+                            "respawn": model.get_attribute(child, "respawn") == True,
+                            "remaps": node_remaps,
+                            "env": node_envs,
+                            "path": child["nodePath"]
+                        })
+                        nested.append((child, node_ns, node_remaps, node_envs, name))
+                except ValueError as e:
+                    self._error(child, e)
+
+            stack.extend(reversed(nested))
+
+    def _param(self, node: dict, values: dict, ns: str, node_name: str, params: dict):
+        # Params of a node are private to it
+        name = _join(f"{node_name}/" if node_name else ns, values.get("name", "").lstrip("~"))
+
+        for source in ("command", "textfile", "binfile"):
+            if values.get(source):
+                self._unresolved.add(f"{name}: {source} {values[source]}")
+                return
+
+        param_type = values.get("type") or None
+        if param_type is not None and param_type not in _PARAM_TYPES:
+            raise ValueError(f"unknown param type {param_type!r}")
+        params[name] = _convert(values.get("value", ""), param_type)
+
+    def _rosparam(self, node: dict, values: dict, ns: str, node_name: str, params: dict):
+        command = values.get("command") or "load"
+        # Like params, a rosparam in a node is private to it
+        rosparam_ns = f"{node_name}/" if node_name else ns
+        if values.get("ns"):
+            rosparam_ns = _join(rosparam_ns, values["ns"]) + "/"
+        name = _join(rosparam_ns, values["param"]) if values.get("param") else rosparam_ns
+
+        if command != "load" or values.get("file"):
+            self._unresolved.add(f"{name}: rosparam {command} {values.get('file', '')}".rstrip())
+            return
+        body = "".join(self.model.get_attribute(child, "body") or "" for child in self.model.load_children(node)
+                       if self.model.get_type(child) == "rosparamBody")
+        if self.model.get_attribute(node, "subst_value") == True:
+            body = self.substitute(body)
+        # The YAML is not parsed, the body is given as written
+        params[name] = body
+        self._unresolved.add(f"{name}: rosparam YAML")
+
+    def _include(self, node: dict, values: dict, ns: str) -> dict:
+        passed = {}
+        for child in self.model.load_children(node):
+            if self.model.get_type(child) == "Argument" and self._condition(child):
+                passed[self.model.get_attribute(child, "name")] = self.substitute(
+                    self.model.get_attribute(child, "value") or self.model.get_attribute(child, "default") or "")
+        return {"file": values.get("name"), "ns": ns, "args": passed, "path": node["nodePath"]}
@@ -0,0 +1,297 @@
+"""
+In-memory snapshot of a model subtree, so the plugins can read the model without a bridge round trip per call.
+"""
+import json
+import logging
+import os
+
+from .meta import TypeResolver
+
+logger = logging.getLogger('launch_common')
+
+# Marks a base that has not been loaded yet (None means the node has no base)
+_UNKNOWN = object()
+
+
+class _Entry(object):
+    """Everything the snapshot knows about a single node"""
+    __slots__ = ('node', 'base', 'attributes', 'pointers', 'children', 'hash', 'complete', 'attribute_names')
+
+    def __init__(self, node: dict, base=_UNKNOWN, attributes=None, pointers=None, children=None, node_hash=None, complete=False):
+        self.node = node
+        self.base = base
+        self.attributes = attributes if attributes is not None else {}
+        self.pointers = pointers if pointers is not None else {}
+        # Paths of the children, None until they are loaded
+        self.children = children
+        self.hash = node_hash
+        # Whether attributes and pointers hold every value of the node
+        self.complete = complete
+        self.attribute_names = None
+
+
+class ModelSnapshot(object):
+    """Read access to a model subtree that mirrors the read part of the Core API (get_attribute, load_children, ...).
+
+    The subtree is bulk-loaded once from the dump written by the plugin wrapper (see src/common/ModelSnapshot.js).
+    When there is none, only its structure is loaded and every value is read over the bridge at most once, on first
+    use. Anything outside the snapshot is loaded from the core on first use and cached as well. The write methods
+    (create_child, set_attribute, set_pointer, delete_node) pass through to the core and keep the snapshot up to date.
+    """
+
+    def __init__(self, core, root_id: str):
+        self.core = core
+        self._root_id = root_id
+        # Path -> _Entry
+        self._entries = {}
+        # Type lookups are answered from the snapshot as well
+        self.type_resolver = TypeResolver(self)
+
+    @classmethod
+    def load(cls, core, node: dict, snapshot_file: str = None, read_values: bool = False, names: list = None):
+        """Loads the subtree of node into a new snapshot
+
+        Args:
+            core (Core): Core of the plugin
+            node (dict): Root of the subtree to load
+            snapshot_file (str, optional): Dump of the subtree written by the plugin wrapper. Defaults to None.
+            read_values (bool, optional): Whether to read every value of the subtree up front when there is no dump,
+                so reading the subtree never goes over the bridge, e.g. from several threads. Defaults to False.
+            names (list, optional): Only load the subtrees of the children of node with one of these names, e.g.
+                the libraries. The other children are loaded without their subtree, which is read from the core on
+                first use. Defaults to None, the whole subtree.
+
+        Returns:
+            ModelSnapshot: Snapshot of the subtree
+        """
+        snapshot = cls(core, node["rootId"])
+
+        data = None
+        if snapshot_file and os.path.isfile(snapshot_file):
+            with open(snapshot_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("rootPath") != node["nodePath"]:
+                logger.warning(f"Snapshot {snapshot_file} is not of {node['nodePath']}, loading from the core instead.")
+                data = None
+
+        # Children of node whose subtree is not loaded
+        shallow = set()
+        if names is None:
+            nodes = core.load_sub_tree(node)
+        else:
+            dumped = {info["path"]: info for info in data["nodes"]} if data is not None else {}
+            children = core.load_children(node)
+            nodes = [node] + children
+            for child in children:
+                info = dumped.get(child["nodePath"])
+                name = info["attributes"].get("name") if info else core.get_attribute(child, "name")
+                if name in names:
+                    nodes.extend(core.load_sub_tree(child)[1:])
+                else:
+                    shallow.add(child["nodePath"])
+
+        if data is not None:
+            snapshot._load_dump(nodes, data)
+        else:
+            snapshot._load_from_core(nodes, read_values, shallow)
+
+        return snapshot
+
+    def _node(self, path: str) -> dict:
+        """Returns a node dict for a path outside the loaded subtree"""
+        return {"nodePath": path, "rootId": self._root_id}
+
+    def _load_dump(self, nodes: list, data: dict):
+        """Fills the snapshot from a dump written by the plugin wrapper
+
+        Args:
+            nodes (list): The subtree as returned by core.load_sub_tree
+            data (dict): Content of the dump
+        """
+        by_path = {n["nodePath"]: n for n in nodes}
+
+        def get_node(path: str) -> dict:
+            if path is None:
+                return None
+            return by_path[path] if path in by_path else self._node(path)
+
+        for path, info in data.get("bases", {}).items():
+            self._entries[path] = _Entry(get_node(path), get_node(info["base"]), {"name": info["name"]})
+
+        for info in data["nodes"]:
+            # Nodes dumped without their subtree have no children, they are read from the core on first use
+            self._entries[info["path"]] = _Entry(
+                get_node(info["path"]),
+                get_node(info["base"]),
+                info["attributes"],
+                info["pointers"],
+                info["children"],
+                info.get("hash"),
+                complete=True
+            )
+
+        for node in nodes:
+            if node["nodePath"] not in self._entries:
+                self._entries[node["nodePath"]] = _Entry(node)
+
+    def _load_from_core(self, nodes: list, read_values: bool = False, shallow: set = ()):
+        """Fills the snapshot with the structure of the subtree, values are read over the bridge once on first use
+
+        Args:
+            nodes (list): The subtree as returned by core.load_sub_tree
+            read_values (bool, optional): Whether to read every value now instead. Defaults to False.
+            shallow (set, optional): Paths of the nodes loaded without their children. Defaults to ().
+        """
+        for node in nodes:
+            path = node["nodePath"]
+            self._entries[path] = _Entry(node, children=None if path in shallow else [])
+            parent = self._entries.get(path.rpartition("/")[0]) if path else None
+            if parent is not None and parent.children is not None:
+                parent.children.append(path)
+
+        if not read_values:
+            return
+
+        # Same content as a dump, bases outside the subtree still resolve their name on first use
+        for node in nodes:
+            entry = self._entries[node["nodePath"]]
+            entry.base = self.core.get_base(node)
+            entry.hash = self.core.get_hash(node)
+            entry.attributes = {name: self.core.get_attribute(node, name) for name in self.core.get_attribute_names(node)}
+            entry.pointers = {name: self.core.get_pointer_path(node, name)
+                              for name in self.core.get_pointer_names(node) if name != "base"}
+            entry.complete = True
+
+    def _entry(self, node: dict) -> _Entry:
+        """Returns the entry of the node, creating an empty one for nodes that have not been seen yet"""
+        path = node["nodePath"]
+        if path not in self._entries:
+            self._entries[path] = _Entry(node)
+        return self._entries[path]
+
+    def get_path(self, node: dict) -> str:
+        return node["nodePath"]
+
+    def get_attribute(self, node: dict, name: str):
+        entry = self._entry(node)
+        if name not in entry.attributes and not entry.complete:
+            entry.attributes[name] = self.core.get_attribute(entry.node, name)
+        return entry.attributes.get(name)
+
+    def get_attributes(self, node: dict, names: list) -> dict:
+        """Reads several attributes of a node at once, straight from the dump when there is one
+
+        Args:
+            node (dict): A node in the WebGME project
+            names (list): Names of the attributes
+
+        Returns:
+            dict: Name -> value, None for attributes the node does not have
+        """
+        entry = self._entry(node)
+        attributes = entry.attributes
+        if not entry.complete:
+            for name in names:
+                if name not in attributes:
+                    attributes[name] = self.core.get_attribute(entry.node, name)
+        return {name: attributes.get(name) for name in names}
+
+    def get_attribute_names(self, node: dict) -> list:
+        entry = self._entry(node)
+        if entry.complete:
+            return list(entry.attributes)
+        if entry.attribute_names is None:
+            entry.attribute_names = self.core.get_attribute_names(entry.node)
+        return entry.attribute_names + [name for name in entry.attributes if name not in entry.attribute_names]
+
+    def get_pointer_path(self, node: dict, name: str) -> str:
+        entry = self._entry(node)
+        if name not in entry.pointers and not entry.complete:
+            entry.pointers[name] = self.core.get_pointer_path(entry.node, name)
+        return entry.pointers.get(name)
+
+    def get_hash(self, node: dict) -> str:
+        entry = self._entry(node)
+        if entry.hash is None:
+            entry.hash = self.core.get_hash(entry.node)
+        return entry.hash
+
+    def get_base(self, node: dict) -> dict:
+        entry = self._entry(node)
+        if entry.base is _UNKNOWN:
+            entry.base = self.core.get_base(entry.node)
+        return entry.base
+
+    def get_parent(self, node: dict) -> dict:
+        path = node["nodePath"]
+        if not path:
+            return None
+        parent_path = path.rpartition("/")[0]
+        if parent_path in self._entries:
+            return self._entries[parent_path].node
+        return self._entry(self.core.get_parent(node)).node
+
+    def get_common_parent(self, nodes: list) -> dict:
+        split_paths = [node["nodePath"].split("/") for node in nodes]
+        common = []
+        for parts in zip(*split_paths):
+            if len(set(parts)) != 1:
+                break
+            common.append(parts[0])
+        path = "/".join(common)
+        if any(node["nodePath"] == path for node in nodes):
+            path = path.rpartition("/")[0]
+        if path in self._entries:
+            return self._entries[path].node
+        return self._entry(self.core.get_common_parent(nodes)).node
+
+    def get_type(self, node: dict) -> str:
+        return self.type_resolver.get_type(node)
+
+    def get_types(self, nodes: list) -> list:
+        return self.type_resolver.get_types(nodes)
+
+    def load_children(self, node: dict) -> list:
+        entry = self._entry(node)
+        if entry.children is None:
+            entry.children = [self._entry(child).node["nodePath"] for child in self.core.load_children(entry.node)]
+        return [self._entries[path].node for path in entry.children]
+
+    def load_sub_tree(self, node: dict) -> list:
+        result = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(reversed(self.load_children(current)))
+        return result
+
+    def traverse(self, node: dict, visitor_fn):
+        """Invokes visitor_fn with every node in the subtree of node (including node), like util.traverse"""
+        for current in self.load_sub_tree(node):
+            visitor_fn(current)
+
+    def create_child(self, parent: dict, base: dict) -> dict:
+        child = self.core.create_child(parent, base)
+        self._entries[child["nodePath"]] = _Entry(child, base)
+        parent_entry = self._entries.get(parent["nodePath"])
+        if parent_entry is not None and parent_entry.children is not None:
+            parent_entry.children.append(child["nodePath"])
+        return child
+
+    def set_attribute(self, node: dict, name: str, value):
+        self.core.set_attribute(node, name, value)
+        self._entry(node).attributes[name] = value
+
+    def set_pointer(self, node: dict, name: str, target: dict):
+        self.core.set_pointer(node, name, target)
+        self._entry(node).pointers[name] = target["nodePath"] if target else None
+
+    def delete_node(self, node: dict):
+        self.core.delete_node(node)
+        path = node["nodePath"]
+        parent_entry = self._entries.get(path.rpartition("/")[0])
+        if parent_entry is not None and parent_entry.children is not None and path in parent_entry.children:
+            parent_entry.children.remove(path)
+        for removed in [p for p in self._entries if p == path or p.startswith(path + "/")]:
+            del self._entries[removed]
@@ -0,0 +1,187 @@
+"""
+Startup order of the nodes of a launch file from the Topic connections made by MakeConnections: a node can start once
+the nodes publishing the topics it subscribes to are up. Nodes that publish to each other (feedback loops) start
+together.
+"""
+from graphlib import TopologicalSorter
+
+# Tags that are started as a whole, the endpoints of the connections belong to them
+_UNITS = ("Node", "Include", "Test")
+_GROUP_ENDPOINTS = ("GroupPublisher", "GroupSubscriber")
+
+
+def _components(units: list, edges: dict) -> list:
+    """Strongly connected components of the graph (Tarjan), with an explicit stack so long chains are no problem
+
+    Args:
+        units (list): Vertices
+        edges (dict): Vertex -> set of successors
+
+    Returns:
+        list: Components, each a list of vertices
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for start in units:
+        if start in index:
+            continue
+        # (vertex, iterator over its successors)
+        work = [(start, iter(sorted(edges.get(start, ()))))]
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            vertex, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(sorted(edges.get(successor, ())))))
+                    break
+                if successor in on_stack:
+                    low[vertex] = min(low[vertex], index[successor])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[vertex])
+                if low[vertex] == index[vertex]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == vertex:
+                            break
+                    components.append(component)
+    return components
+
+
+def topic_graph(model, launch_file: dict) -> tuple:
+    """Builds the graph of the nodes, includes and tests of a launch file from its Topic connections
+
+    Args:
+        model (ModelSnapshot): Snapshot containing the launch file
+        launch_file (dict): LaunchFile node
+
+    Returns:
+        tuple: Paths of the units in the order of the model (list) and, per publishing unit, the subscribing units
+            with the names of the topics between them (dict of dicts of sets)
+    """
+    subtree = model.load_sub_tree(launch_file)
+    types = dict(zip((node["nodePath"] for node in subtree), model.get_types(subtree)))
+    by_path = {node["nodePath"]: node for node in subtree}
+    units = [node["nodePath"] for node in subtree if types[node["nodePath"]] in _UNITS]
+
+    # Group endpoints only name the node they stand for, which is somewhere in their group
+    by_node_name = {}
+    for path in units:
+        if types[path] == "Node":
+            by_node_name.setdefault(model.get_attribute(by_path[path], "name"), []).append(path)
+    for node in subtree:
+        parent = node["nodePath"].rpartition("/")[0]
+        if types[node["nodePath"]] in _GROUP_ENDPOINTS and types.get(parent) == "Include":
+            by_node_name.setdefault(model.get_attribute(node, "nodeName"), []).append(parent)
+
+    def unit_of(path: str):
+        node = by_path.get(path)
+        if node is None:
+            return None
+        parent = path.rpartition("/")[0]
+        if types.get(parent) in _UNITS:
+            return parent
+        if types[path] in _GROUP_ENDPOINTS:
+            candidates = [unit for unit in by_node_name.get(model.get_attribute(node, "nodeName"), [])
+                          if unit.startswith(parent + "/")]
+            # The closest one, in case the same name is used in nested groups
+            return max(candidates, key=lambda unit: unit.count("/")) if candidates else None
+        return None
+
+    edges = {}
+    for node in subtree:
+        if types[node["nodePath"]] != "Topic":
+            continue
+        producer = unit_of(model.get_pointer_path(node, "src"))
+        consumer = unit_of(model.get_pointer_path(node, "dst"))
+        if producer is None or consumer is None or producer == consumer:
+            continue
+        edges.setdefault(producer, {}).setdefault(consumer, set()).add(model.get_attribute(node, "name"))
+
+    return units, edges
+
+
+def startup_layers(model, launch_file: dict) -> dict:
+    """Computes the startup layers of a launch file. Each layer can start in parallel once the layers before it are
+    up, since every publisher a unit subscribes to is in an earlier layer (or in its own feedback loop).
+
+    Args:
+        model (ModelSnapshot): Snapshot containing the launch file
+        launch_file (dict): LaunchFile node
+
+    Returns:
+        dict: layers (lists of unit paths), cycles (units that publish to each other and start together),
+            critical_path (the longest chain of layers, each step with its units and the topics to the next step)
+            and names (unit path -> name)
+    """
+    units, edges = topic_graph(model, launch_file)
+
+    components = _components(units, {unit: set(consumers) for unit, consumers in edges.items()})
+    component_of = {unit: number for number, component in enumerate(components) for unit in component}
+
+    # Component -> components publishing to it
+    predecessors = {number: set() for number in range(len(components))}
+    for producer, consumers in edges.items():
+        for consumer in consumers:
+            if component_of[producer] != component_of[consumer]:
+                predecessors[component_of[consumer]].add(component_of[producer])
+
+    # Everything that gets ready together is a layer
+    order = {unit: position for position, unit in enumerate(units)}
+    sorter = TopologicalSorter(predecessors)
+    sorter.prepare()
+    layers = []
+    # Longest chain of components ending in each component, and the component before it in the chain
+    depth = {}
+    previous = {}
+    while sorter.is_active():
+        ready = sorter.get_ready()
+        for number in ready:
+            before = max(predecessors[number], key=lambda p: depth[p], default=None)
+            depth[number] = depth[before] + 1 if before is not None else 1
+            previous[number] = before
+        layers.append(sorted((unit for number in ready for unit in components[number]), key=order.get))
+        sorter.done(*ready)
+
+    critical_path = []
+    if components:
+        number = max(depth, key=lambda n: (depth[n], -min(order[u] for u in components[n])))
+        chain = []
+        while number is not None:
+            chain.append(number)
+            number = previous[number]
+        chain.reverse()
+        for position, number in enumerate(chain):
+            step = {"units": sorted(components[number], key=order.get), "topics": []}
+            if position + 1 < len(chain):
+                step["topics"] = sorted({topic for producer in components[number]
+                                         for consumer in components[chain[position + 1]]
+                                         for topic in edges.get(producer, {}).get(consumer, ())})
+            critical_path.append(step)
+
+    names = {}
+    for node in model.load_sub_tree(launch_file):
+        if node["nodePath"] in order:
+            # Tests are known by their test name, nodes and includes (the file) by their name
+            names[node["nodePath"]] = (model.get_attribute(node, "name") or model.get_attribute(node, "testName")
+                                       or node["nodePath"])
+
+    return {
+        "layers": layers,
+        "cycles": [sorted(component, key=order.get) for component in components if len(component) > 1],
+        "critical_path": critical_path,
+        "names": names
+    }
@@ -0,0 +1,192 @@
+"""
+Declarative description of the launch file tags written by ExportLaunch: for each meta type the XML tag, the model
+attributes it is written from and when an attribute is left out. Adding a ROS tag only takes a new entry in TAGS.
+"""
+
+
+def escape_ros_attribute(value: str) -> str:
+    """Removes invalid characters from attribute in XML
+
+    Args:
+        value (str): String to fix
+
+    Returns:
+        str: Attribute with clean XML
+    """
+    return (
+        value
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+    )
+
+
+# How a value is written
+def escaped(value) -> str:
+    return escape_ros_attribute(value)
+
+
+def lower(value) -> str:
+    return str(value).lower()
+
+
+def raw(value) -> str:
+    return f"{value}"
+
+
+# When a value is written, given the value and all values read for the node
+def is_set(value, values: dict) -> bool:
+    return bool(value)
+
+
+def always(value, values: dict) -> bool:
+    return True
+
+
+def is_false(value, values: dict) -> bool:
+    return value == False
+
+
+def differs_from(default):
+    """Writes the value unless it is the given default"""
+    return lambda value, values: value != default
+
+
+class Attribute(object):
+    """A model attribute written as an XML attribute"""
+    __slots__ = ('name', 'xml_name', 'write', 'include')
+
+    def __init__(self, name: str, xml_name: str = None, write=escaped, include=is_set):
+        """
+        Args:
+            name (str): Name of the attribute in the model
+            xml_name (str, optional): Name of the XML attribute. Defaults to name.
+            write (callable, optional): Turns the value into the XML text. Defaults to escaped.
+            include (callable, optional): Whether to write the value, given the value and all values of the node.
+                Defaults to is_set.
+        """
+        self.name = name
+        self.xml_name = xml_name or name
+        self.write = write
+        self.include = include
+
+
+class Tag(object):
+    """How nodes of one meta type are written to the launch file"""
+
+    def __init__(self, xml_name: str, attributes: list, has_children: bool = False):
+        """
+        Args:
+            xml_name (str): Name of the XML tag
+            attributes (list): Attribute of each XML attribute, in the order they are written
+            has_children (bool, optional): Whether the children of the node are written inside the tag, else the
+                tag is self-closing. Defaults to False.
+        """
+        self.xml_name = xml_name
+        self.has_children = has_children
+        # Every attribute the tag needs, read in one go
+        self.attribute_names = list(dict.fromkeys(attribute.name for attribute in attributes))
+        # Precomputed per attribute, so serializing is a single pass over the values
+        self._emitters = tuple((attribute.name, attribute.include, f'{attribute.xml_name}="', attribute.write)
+                               for attribute in attributes)
+
+    def serialize(self, values: dict) -> str:
+        """Returns the XML attributes of a node
+
+        Args:
+            values (dict): Values of attribute_names of the node
+
+        Returns:
+            str: The attributes, separated by spaces
+        """
+        parts = []
+        for name, include, prefix, write in self._emitters:
+            value = values.get(name)
+            if include(value, values):
+                parts.append(f'{prefix}{write(value)}"')
+        return " ".join(parts)
+
+
+# Conditions that every tag supports
+_CONDITIONS = [Attribute("if"), Attribute("unless")]
+
+# Meta type -> how its nodes are written. Children of other written types are rosparam bodies, the remaining meta
+# types (connections) are not written at all.
+TAGS = {
+    "Argument": Tag("arg", [
+        Attribute("name"),
+        Attribute("value"),
+        Attribute("default"),
+        Attribute("doc")
+    ] + _CONDITIONS),
+    "Node": Tag("node", [
+        Attribute("name", write=raw, include=always),
+        Attribute("pkg"),
+        Attribute("type"),
+        Attribute("args"),
+        Attribute("respawn", write=lower),
+        Attribute("respawn_delay", write=raw, include=lambda value, values: values.get("respawn") == True and value != 0),
+        Attribute("clear_params", write=lower),
+        Attribute("cwd"),
+        Attribute("launch-prefix"),
+        Attribute("ns"),
+        Attribute("output"),
+        Attribute("required", write=lower, include=is_false),
+        Attribute("machine")
+    ] + _CONDITIONS, has_children=True),
+    "Remap": Tag("remap", [
+        Attribute("from"),
+        Attribute("to")
+    ] + _CONDITIONS),
+    "Include": Tag("include", [
+        Attribute("name", "file"),
+        Attribute("clear_params", write=lower),
+        Attribute("ns"),
+        Attribute("pass_all_args", write=lower)
+    ] + _CONDITIONS, has_children=True),
+    "Group": Tag("group", [
+        Attribute("name", "ns"),
+        Attribute("clear_params", write=lower)
+    ] + _CONDITIONS, has_children=True),
+    "Parameter": Tag("param", [
+        Attribute("name"),
+        Attribute("command"),
+        Attribute("value"),
+        Attribute("binfile"),
+        Attribute("textfile"),
+        Attribute("type")
+    ] + _CONDITIONS),
+    "rosparam": Tag("rosparam", [
+        Attribute("command"),
+        Attribute("file"),
+        Attribute("param"),
+        Attribute("ns"),
+        Attribute("subst_value", write=lower, include=is_false)
+    ] + _CONDITIONS, has_children=True),
+    "Machine": Tag("machine", [
+        Attribute("name"),
+        Attribute("address"),
+        Attribute("env-loader"),
+        Attribute("default"),
+        Attribute("user"),
+        Attribute("password"),
+        Attribute("timeout", write=raw, include=differs_from(10))
+    ] + _CONDITIONS, has_children=True),
+    "Env": Tag("env", [
+        Attribute("name"),
+        Attribute("value")
+    ] + _CONDITIONS),
+    "Test": Tag("test", [
+        Attribute("pkg"),
+        Attribute("testName", "test-name"),
+        Attribute("type"),
+        Attribute("name"),
+        Attribute("args"),
+        Attribute("clear_params", write=lower),
+        Attribute("cwd"),
+        Attribute("launch-prefix"),
+        Attribute("ns"),
+        Attribute("retry", write=raw),
+        Attribute("time-limit", write=raw, include=differs_from(60))
+    ] + _CONDITIONS, has_children=True)
+}
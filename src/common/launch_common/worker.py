@@ -0,0 +1,140 @@
+"""
+Long-lived process that keeps the python plugins imported and runs them on request, so a plugin execution does not
+have to start an interpreter and import webgme_bindings every time. Started by src/common/run_worker.py and used by
+src/common/PythonWorker.js.
+
+Jobs are sent over a local TCP connection as one json object per line:
+    {"plugin": "ExportLaunch", "port": "5555", "commitHash": "...", "branchName": "...", "activeNodePath": "...",
+     "activeSelectionPaths": [...], "namespace": "", "snapshotFile": "..."}
+and answered with one json object per line:
+    {"success": true, "output": ["log line", ...], "error": null}
+"""
+import contextvars
+import importlib
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+import traceback
+
+from webgme_bindings import WebGME
+
+logger = logging.getLogger('launch_common')
+
+# Each plugin package lives in src/plugins/<name>/<name>
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'plugins')
+
+_import_lock = threading.Lock()
+# Output of the job run in the current context, set in the thread of the job and copied into the pools of the plugin
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def load_plugin(name: str):
+    """Imports the plugin class of the given plugin, once per process
+
+    Args:
+        name (str): Id of the plugin, e.g. ExportLaunch
+
+    Returns:
+        type: The PluginBase subclass of the plugin
+    """
+    with _import_lock:
+        plugin_dir = os.path.normpath(os.path.join(PLUGINS_DIR, name))
+        if not os.path.isdir(os.path.join(plugin_dir, name)):
+            raise ValueError(f"Unknown plugin {name}")
+        if plugin_dir not in sys.path:
+            sys.path.append(plugin_dir)
+        return getattr(importlib.import_module(name), name)
+
+
+class _JobOutput(logging.Handler):
+    """Collects the log records emitted for a job, by its thread and the pool threads (see ContextPool) it uses"""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.lines = []
+        self.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    def emit(self, record):
+        if _current_job.get() is self:
+            self.lines.append(self.format(record))
+
+
+def run_job(job: dict) -> dict:
+    """Runs one plugin execution, like run_plugin.py does
+
+    Args:
+        job (dict): Plugin context sent by the plugin wrapper
+
+    Returns:
+        dict: Whether the plugin succeeded, its log output and the error if it failed
+    """
+    name = job.get("plugin", "")
+    plugin_logger = logging.getLogger(name)
+    output = _JobOutput()
+    job_token = _current_job.set(output)
+    loggers = [plugin_logger, logging.getLogger('launch_common')]
+    for log in loggers:
+        log.addHandler(output)
+
+    error = None
+    try:
+        plugin_class = load_plugin(name)
+        webgme = WebGME(job["port"], plugin_logger)
+        try:
+            plugin = plugin_class(webgme, job["commitHash"], job["branchName"], job["activeNodePath"],
+                                  job.get("activeSelectionPaths", []), job.get("namespace", ""))
+            if job.get("snapshotFile"):
+                plugin.snapshot_file = job["snapshotFile"]
+            plugin.main()
+        finally:
+            webgme.disconnect()
+            # Every WebGME instance creates its own zmq context, which would pile up in a long-lived process
+            webgme._socket.close(linger=0)
+            webgme._socket.context.term()
+    except Exception:
+        error = traceback.format_exc()
+        plugin_logger.error(error)
+    finally:
+        for log in loggers:
+            log.removeHandler(output)
+        _current_job.reset(job_token)
+
+    return {"success": error is None, "output": output.lines, "error": error}
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Answers every json line of a connection with the result of the job"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                result = run_job(json.loads(line))
+            except ValueError as e:
+                result = {"success": False, "output": [], "error": f"Invalid job: {e}"}
+            self.wfile.write((json.dumps(result) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class PluginWorker(socketserver.ThreadingTCPServer):
+    """Local server that runs plugin jobs, each connection is handled in its own thread"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, preload: list = None):
+        """
+        Args:
+            port (int, optional): Port to listen on at 127.0.0.1, 0 picks a free one. Defaults to 0.
+            preload (list, optional): Plugins to import right away. Defaults to None.
+        """
+        super().__init__(("127.0.0.1", port), _JobHandler)
+        for name in preload or []:
+            load_plugin(name)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
@@ -0,0 +1,34 @@
+"""
+Starts a long-lived worker that runs the python plugins on request (see launch_common/worker.py).
+Usage: python run_worker.py [PORT] [PLUGIN ...]
+Notes:
+ - PORT defaults to 0, which picks a free port. The port is printed as "PORT <port>" once the worker listens.
+ - The listed plugins are imported at start-up, the others on their first job.
+ - The plugin wrappers start this worker themselves when PYTHON_WORKER is set to true, or connect to an already
+   running one when PYTHON_WORKER is set to its port (see PythonWorker.js).
+"""
+
+import sys
+import logging
+from launch_common.worker import PluginWorker
+
+logger = logging.getLogger('launch_common')
+logger.setLevel(logging.INFO)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.INFO)
+handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+logger.addHandler(handler)
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+PRELOAD = sys.argv[2:]
+
+worker = PluginWorker(PORT, PRELOAD)
+print('PORT {0}'.format(worker.port), flush=True)
+logger.info('Plugin worker listening at 127.0.0.1:{0}'.format(worker.port))
+
+try:
+    worker.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    worker.server_close()
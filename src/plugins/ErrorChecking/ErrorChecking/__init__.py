@@ -3,11 +3,16 @@ This is where the implementation of the plugin code goes.
 The ErrorChecking-class is imported from both run_plugin.py and run_debug.py
 """
 import sys
+import os
 import logging
 from webgme_bindings import PluginBase
 import re
 from graphlib import TopologicalSorter, CycleError
 
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from launch_common import ModelSnapshot, profiled
+
 # Setup a logger
 logger = logging.getLogger('ErrorChecking')
 logger.setLevel(logging.INFO)
@@ -19,29 +24,24 @@ logger.addHandler(handler)
 
 
 class ErrorChecking(PluginBase):
+    # Dump of the active node's subtree written by ErrorChecking.js (set in run_plugin.py)
+    snapshot_file = None
+
+    @profiled
     def main(self):
         core = self.core
         active_node = self.active_node
+        
+        # All reads go through a snapshot of the active node's subtree instead of the core
+        model = ModelSnapshot.load(core, active_node, self.snapshot_file)
 
         # Stores report of all errors for notification
         error_report = ""
         # Divides test name from result in error report
         divider = ": "
         
-        def get_type(node: dict) -> str:
-            """Returns the type of the WebGME node
-
-            Args:
-                node (dict): A node in the WebGME project
-
-            Returns:
-                str: The type of the node as defined in the Launch File tab in the metamodel
-            """            
-            meta_types = ["LaunchFile", "Include", "Argument", "Remap", "Group", "Parameter", "rosparam", "Node", "Topic", "GroupPublisher", "GroupSubscriber", "Subscriber", "Publisher", "Machine", "Env", "Test", "rosparamBody"]
-            base_type = core.get_base(node)
-            while base_type and core.get_attribute(base_type, 'name') not in meta_types:
-                base_type = core.get_base(base_type)
-            return core.get_attribute(base_type, 'name')
+        # Resolves node types, cached for the whole run
+        get_type = model.get_type
         
         def get_node_name(node: dict) -> str:
             """Gets name of a node including all namespaces
@@ -53,21 +53,21 @@ class ErrorChecking(PluginBase):
                 str: Name including namespaces
             """            
             
-            name = core.get_attribute(node, "name")
+            name = model.get_attribute(node, "name")
             
-            ns = core.get_attribute(node, "ns")
+            ns = model.get_attribute(node, "ns")
             if ns != "" and name[0] != "/":
                 name = ns + "/" + name
             
-            parent = core.get_parent(node)
+            parent = model.get_parent(node)
             
             while get_type(parent) != "LaunchFile" and name[0] != "/":
                 if get_type(parent) == "Group":
-                    ns = core.get_attribute(parent, "name")
+                    ns = model.get_attribute(parent, "name")
                     if ns != "":
                         name = ns + "/" + name
                 
-                parent = core.get_parent(parent)
+                parent = model.get_parent(parent)
             
             return name if name[0] != "/" else name[1:]
         
@@ -81,21 +81,21 @@ class ErrorChecking(PluginBase):
                 str: Name including namespaces
             """
             
-            name = core.get_attribute(test, "testName")
+            name = model.get_attribute(test, "testName")
             
-            ns = core.get_attribute(test, "ns")
+            ns = model.get_attribute(test, "ns")
             if ns != "" and name[0] != "/":
                 name = ns + "/" + name
             
-            parent = core.get_parent(test)
+            parent = model.get_parent(test)
             
             while get_type(parent) != "LaunchFile" and name[0] != "/":
                 if get_type(parent) == "Group":
-                    ns = core.get_attribute(parent, "name")
+                    ns = model.get_attribute(parent, "name")
                     if ns != "":
                         name = ns + "/" + name
                 
-                parent = core.get_parent(parent)
+                parent = model.get_parent(parent)
             
             return name if name[0] != "/" else name[1:]
         
@@ -115,7 +115,7 @@ class ErrorChecking(PluginBase):
             else:
                 all_nodes[node_type].append(node)
                 
-        self.util.traverse(active_node, document_nodes)
+        model.traverse(active_node, document_nodes)
         
         # Check duplicate names in nodes and tests
         error_report += "TESTING FOR DUPLICATE NAMES IN NODES AND TESTS" + divider
@@ -146,9 +146,9 @@ class ErrorChecking(PluginBase):
         # Find nodes with default and value defined and add to errors
         if all_nodes.get("Argument") is not None:
             for arg in all_nodes.get("Argument"):
-                name = core.get_attribute(arg, "name")
-                default = core.get_attribute(arg, "default")
-                value = core.get_attribute(arg, "value")
+                name = model.get_attribute(arg, "name")
+                default = model.get_attribute(arg, "default")
+                value = model.get_attribute(arg, "value")
                 
                 if default and value:
                     args_with_error.append(name)
@@ -178,9 +178,9 @@ class ErrorChecking(PluginBase):
         
         if all_nodes.get("Argument") is not None:
             for arg in all_nodes.get("Argument"):
-                name = core.get_attribute(arg, "name")
-                default = core.get_attribute(arg, "default")
-                value = core.get_attribute(arg, "value")
+                name = model.get_attribute(arg, "name")
+                default = model.get_attribute(arg, "default")
+                value = model.get_attribute(arg, "value")
                 
                 precedence[name] = get_arg_from_string(default) + get_arg_from_string(value)
         
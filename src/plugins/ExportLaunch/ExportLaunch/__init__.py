@@ -3,11 +3,20 @@ This is where the implementation of the plugin code goes.
 The ExportLaunch-class is imported from both run_plugin.py and run_debug.py
 """
 import sys
+import os
+import io
+import json
+import hashlib
 import logging
-from webgme_bindings import PluginBase
+from webgme_bindings import JSError, PluginBase
 import re
 import textwrap
-from graphlib import TopologicalSorter
+from graphlib import CycleError, TopologicalSorter
+
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from launch_common import (LIBRARY_NAMES, TAGS, ArtifactIndex, ContextPool, FragmentCache, LaunchResolver, ModelSnapshot,
+                           parse_launch_args, content_hash, profiled, startup_layers, subtree_keys)
 
 # Setup a logger
 logger = logging.getLogger('ExportLaunch')
@@ -20,30 +29,60 @@ logger.addHandler(handler)
 
 
 class ExportLaunch(PluginBase):
+    # Dump of the active node's subtree written by ExportLaunch.js (set in run_plugin.py)
+    snapshot_file = None
+
+    @profiled
     def main(self):
         active_node = self.active_node
         core = self.core
         logger = self.logger
         
-        # Nodes in project that have been traversed
-        visited_nodes = []
+        config = self.get_current_config() or {}
+        # Every launch file of the project instead of the active node, into one archive
+        export_all = config.get("exportAll")
+        # One launch file per machine plus a coordinator file instead of a single launch file
+        split_machines = config.get("splitByMachine") and not export_all
+        if config.get("splitByMachine") and export_all:
+            logger.warning("Splitting by machine only applies to a single launch file, it is ignored when exporting all")
+        # One launch file per startup layer of the topic graph plus a coordinator file
+        stage_startup = config.get("stageStartup") and not export_all and not split_machines
+        if config.get("stageStartup") and (export_all or split_machines):
+            logger.warning("Staged startup only applies to a single launch file that is not split by machine, it is ignored")
+        
+        # All reads go through a snapshot of the active node's subtree instead of the core. In bulk mode it is the
+        # whole project. Both are read up front when files are rendered from several threads.
+        snapshot_root = self.root_node if export_all else active_node
+        model = ModelSnapshot.load(core, snapshot_root, self.snapshot_file,
+                                   read_values=export_all or split_machines or stage_startup)
+        # Nodes of the subtree by path
+        nodes = {node["nodePath"]: node for node in model.load_sub_tree(snapshot_root)}
+        
+        # Fragments of the previous export of each launch file, only the subtrees that changed since are rendered
+        use_cache = config.get("exportCache")
+        # Blobs of earlier exports by content, an unchanged export returns the blob it already has
+        reuse_unchanged = config.get("reuseUnchanged")
+        if use_cache or reuse_unchanged:
+            project_id = self.project.get_project_info().get("_id")
+        index = ArtifactIndex.load(project_id) if reuse_unchanged else None
+        
+        # Args and params of each launch file with every substitution evaluated, like roslaunch --dump-params
+        dump_params = config.get("dumpParams")
+        # Machines are assigned with the args resolved as well
+        if dump_params or split_machines:
+            try:
+                launch_args = parse_launch_args(config.get("launchArgs", ""))
+            except ValueError as e:
+                logger.error(f"Invalid launch args: {e}")
+                return
+        
         # Meta types that will not be included in the launch file
-        ignore_meta_type = ["GroupPublisher", "GroupSubscriber", "Subscriber", "Topic", "Publisher"]
+        ignore_meta_type = {"GroupPublisher", "GroupSubscriber", "Subscriber", "Topic", "Publisher"}
         
-        def get_type(node: dict) -> str:
-            """Returns the type of the WebGME node
-
-            Args:
-                node (dict): A node in the WebGME project
-
-            Returns:
-                str: The type of the node as defined in the Launch File tab in the metamodel
-            """
-            meta_types = ["LaunchFile", "Include", "Argument", "Remap", "Group", "Parameter", "rosparam", "Node", "Topic", "GroupPublisher", "GroupSubscriber", "Subscriber", "Publisher", "Machine", "Env", "Test", "rosparamBody"]
-            base_type = core.get_base(node)
-            while base_type and core.get_attribute(base_type, 'name') not in meta_types:
-                base_type = core.get_base(base_type)
-            return core.get_attribute(base_type, 'name')
+        # Resolves node types, cached for the whole run
+        get_type = model.get_type
+        # Preferred order of the tags in the launch file
+        tag_order = {"Argument": 1, "rosparam": 2, "Parameter": 3, "Env": 4, "Remap": 5, "Include": 6, "Group": 7, "Machine": 8, "Node": 9, "Test": 10}
         
         def get_arg_from_string(arg_string: str) -> list:
             """Extract all names in string in form $(arg name)
@@ -66,28 +105,32 @@ class ExportLaunch(PluginBase):
             Returns:
                 list: All nodes with args correctly ordered according to dependencies
             """            
-            args = [n for n in nodes if get_type(n) == "Argument"]
-            not_args = [n for n in nodes if get_type(n) != "Argument"]
+            node_types = model.get_types(nodes)
+            args = [n for n, t in zip(nodes, node_types) if t == "Argument"]
+            not_args = [n for n, t in zip(nodes, node_types) if t != "Argument"]
             
             # Stores all arguments and the arguments that they depend on
             precedence = {}
-            # Stores all arguments by name
+            # Stores all arguments by name, an arg can be declared more than once (under different conditions)
             arg_dict = {}
             
             for arg in args:
-                name = core.get_attribute(arg, "name")
-                default = core.get_attribute(arg, "default")
-                value = core.get_attribute(arg, "value")
+                name = model.get_attribute(arg, "name")
+                default = model.get_attribute(arg, "default")
+                value = model.get_attribute(arg, "value")
+                # Args used in the conditions of an arg have to be declared before it as well
+                conditions = (model.get_attribute(arg, "if") or "") + (model.get_attribute(arg, "unless") or "")
                 
-                precedence[name] = get_arg_from_string(default) + get_arg_from_string(value)
-                arg_dict[name] = arg
+                precedence.setdefault(name, []).extend(get_arg_from_string(default) + get_arg_from_string(value) + get_arg_from_string(conditions))
+                arg_dict.setdefault(name, []).append(arg)
             
             try:
                 ts = TopologicalSorter(precedence)
                 ordered_args = list(ts.static_order())
-                args = [arg_dict[arg_name] for arg_name in ordered_args]
-            except:
-                logger.error("Circular dependency in args")
+                # Args declared further up are not in this list
+                args = [arg for arg_name in ordered_args for arg in arg_dict.get(arg_name, [])]
+            except CycleError as e:
+                logger.error(f"Circular dependency in args: {' -> '.join(e.args[1])}")
             
             return args + not_args
         
@@ -100,417 +143,260 @@ class ExportLaunch(PluginBase):
             Returns:
                 float: Rank for ordering of node
             """            
-            if get_type(node) == "Argument":
-                return 1
-            if get_type(node) == "rosparam":
-                return 2
-            if get_type(node) == "Parameter":
-                return 3
-            if get_type(node) == "Env":
-                return 4
-            if get_type(node) == "Remap":
-                return 5
-            if get_type(node) == "Include":
-                return 6
-            if get_type(node) == "Group":
-                return 7
-            if get_type(node) == "Machine":
-                return 8
-            if get_type(node) == "Node":
-                return 9
-            if get_type(node) == "Test":
-                return 10
-            
-            return 100
+            return tag_order.get(get_type(node), 100)
         
-        def escape_ros_attribute(value: str) -> str:
-            """Removes invalid characters from attribute in XML
+        def render_children(node: dict, indent: int, keep = None, overrides = None) -> list:
+            """Renders what is written for the children of a node
 
             Args:
-                value (str): String to fix
+                node (dict): Node whose children are rendered
+                indent (int): Number of spaces the tags of the children are indented by, minus 2
+                keep (set, optional): Paths of the nodes to write, all nodes if None. Defaults to None.
+                overrides (dict, optional): Attribute values used instead of those of the nodes. Defaults to None.
 
             Returns:
-                str: Attribute with clean XML
-            """            
-            return (
-                value
-                .replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace('"', "&quot;")
-            )
-        
-        def xml_generator(activeNode: dict, indent = 0, topLevel = True) -> str:
-            """Generates the launch file in XML format
-
-            Args:
-                activeNode (dict): Node in projec to parse to generate launch file
-                indent (int, optional): Number of spaces to indent current tag. Defaults to 0.
-                topLevel (bool, optional): Whether or not the current node is the top-level launch file node. Defaults to True.
-
-            Returns:
-                str: Launch file in XML format
-            """            
-            result = ""
-            node_path = core.get_path(activeNode)   
-            
-            if topLevel:
-                result += " " * indent + "<launch>\n"
-                
-            if node_path in visited_nodes:
-                return result + '\n</launch>'
-            
-            visited_nodes.append(node_path)
-            children = core.load_children(activeNode)
+                list: The fragment: chunks of text in order, with [relid] where the children of that child go
+            """
+            children = model.load_children(node)
             
             children = order_args(children)
             children = sorted(children, key = lambda x: sort_tags(x))
             
+            fragment = []
             for child in children:
-                child_name = core.get_attribute(child, 'name')
                 base_name = get_type(child)
                 
-                if base_name in ignore_meta_type:
+                if base_name in ignore_meta_type or (keep is not None and child["nodePath"] not in keep):
                     continue
                 
-                if base_name == "Argument":
-                    attributes = []
-                    
-                    arg_name = core.get_attribute(child, 'name')
-                    arg_value = core.get_attribute(child, 'value')
-                    default = core.get_attribute(child, 'default')
-                    doc = core.get_attribute(child, 'doc')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-
-                    if arg_name:
-                        attributes.append(f'name="{escape_ros_attribute(arg_name)}"')
-                    if arg_value:
-                        attributes.append(f'value="{escape_ros_attribute(arg_value)}"')
-                    if default:
-                        attributes.append(f'default="{escape_ros_attribute(default)}"')
-                    if doc:
-                        attributes.append(f'doc="{escape_ros_attribute(doc)}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<arg {attribute_string}/>\n"
+                tag = TAGS.get(base_name)
+                if tag is None:
+                    # rosparamBody
+                    fragment.append(textwrap.indent(model.get_attribute(child, 'body'), f"{' ' * (indent + 2)}") + "\n")
+                    continue
                 
-                elif base_name == "Node":
-                    attributes = []
-                    
-                    pkg = core.get_attribute(child, 'pkg')
-                    node_type = core.get_attribute(child, 'type')
-                    args = core.get_attribute(child, 'args')
-                    respawn = core.get_attribute(child, 'respawn')
-                    clear_params = core.get_attribute(child, 'clear_params')
-                    cwd = core.get_attribute(child, 'cwd')
-                    launch_prefix = core.get_attribute(child, 'launch-prefix')
-                    ns = core.get_attribute(child, 'ns')
-                    output = core.get_attribute(child, 'output')
-                    required = core.get_attribute(child, 'required')
-                    respawn_delay = core.get_attribute(child, 'respawn_delay')
-                    machine = core.get_attribute(child, 'machine')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if pkg:
-                        attributes.append(f'pkg="{escape_ros_attribute(pkg)}"')
-                    if node_type:
-                        attributes.append(f'type="{escape_ros_attribute(node_type)}"')
-                    if args:
-                        attributes.append(f'args="{escape_ros_attribute(args)}"')
-                    if respawn:
-                        attributes.append(f'respawn="{str(respawn).lower()}"')
-                    if respawn == True and respawn_delay != 0:
-                        attributes.append(f'respawn_delay="{respawn_delay}"')
-                    if clear_params:
-                        attributes.append(f'clear_params="{str(clear_params).lower()}"')
-                    if cwd:
-                        attributes.append(f'cwd="{escape_ros_attribute(cwd)}"')
-                    if launch_prefix:
-                        attributes.append(f'launch-prefix="{escape_ros_attribute(launch_prefix)}"')
-                    if ns:
-                        attributes.append(f'ns="{escape_ros_attribute(ns)}"')
-                    if output:
-                        attributes.append(f'output="{escape_ros_attribute(output)}"')
-                    if required == False:
-                        attributes.append(f'required="{str(required).lower()}"')
-                    if machine:
-                        attributes.append(f'machine="{escape_ros_attribute(machine)}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<node name=\"{child_name}\" {attribute_string}>\n"
-                    result += xml_generator(child, indent + 4, topLevel = False)
-                    result += f"{' ' * (indent + 2)}</node>\n"
-
-                elif base_name == "Remap":
-                    attributes = []
-                    
-                    remap_from = core.get_attribute(child, 'from')
-                    remap_to = core.get_attribute(child, 'to')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                        
-                    if remap_from:
-                        attributes.append(f'from="{escape_ros_attribute(remap_from)}"')
-                    if remap_to:
-                        attributes.append(f'to="{escape_ros_attribute(remap_to)}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                        
-                    result += f"{' ' * (indent + 2)}<remap {attribute_string}/>\n"
+                # All attributes of the tag in one read, serialized in one pass
+                values = model.get_attributes(child, tag.attribute_names)
+                if overrides:
+                    values.update((name, value) for name, value in overrides.items() if name in values)
+                attribute_string = tag.serialize(values)
                 
-                elif base_name == "Include":
-                    attributes = []
-                    
-                    file_name = core.get_attribute(child, 'name')
-                    clear_params = core.get_attribute(child, 'clear_params')
-                    ns = core.get_attribute(child, "ns")
-                    pass_all_args = core.get_attribute(child, "pass_all_args")
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
+                if tag.has_children:
+                    fragment.append(f"{' ' * (indent + 2)}<{tag.xml_name} {attribute_string}>\n")
+                    fragment.append([child["nodePath"].rpartition("/")[2]])
+                    fragment.append(f"{' ' * (indent + 2)}</{tag.xml_name}>\n")
+                else:
+                    fragment.append(f"{' ' * (indent + 2)}<{tag.xml_name} {attribute_string}/>\n")
+            
+            return fragment
+        
+        def xml_generator(activeNode: dict, write, indent = 0, cache = None, keep = None, overrides = None):
+            """Generates the launch file in XML format, chunk by chunk, so the output is assembled only once.
+            The tree is walked with an explicit stack, so the depth of the model is not limited by the recursion limit.
 
-                    if file_name:
-                        attributes.append(f'file="{escape_ros_attribute(file_name)}"')
-                    if clear_params:
-                        attributes.append(f'clear_params="{str(clear_params).lower()}"')
-                    if ns:
-                        attributes.append(f'ns="{escape_ros_attribute(ns)}"')
-                    if pass_all_args:
-                        attributes.append(f'pass_all_args="{str(pass_all_args).lower()}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<include {attribute_string}>\n"
-                    result += xml_generator(child, indent + 4, topLevel = False)          
-                    result += f"{' ' * (indent + 2)}</include>\n"
-                
-                elif base_name == "Group":
-                    attributes = []
-                    
-                    ns = core.get_attribute(child, 'name')
-                    clear_params = core.get_attribute(child, 'clear_params')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if ns:
-                        attributes.append(f'ns="{escape_ros_attribute(ns)}"')
-                    if clear_params:
-                        attributes.append(f'clear_params="{str(clear_params).lower()}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<group {attribute_string}>\n"
-                    # Recursively process children of the group
-                    result += xml_generator(child, indent + 4, topLevel = False)          
-                    result += f"{' ' * (indent + 2)}</group>\n"
+            Args:
+                activeNode (dict): Node in projec to parse to generate launch file
+                write (callable): Called with each chunk of the launch file in order, e.g. the write of a buffer
+                indent (int, optional): Number of spaces to indent current tag. Defaults to 0.
+                cache (FragmentCache, optional): Fragments of the previous export to reuse and update, only for
+                    complete launch files. Defaults to None.
+                keep (set, optional): Paths of the nodes to write, all nodes if None. Defaults to None.
+                overrides (dict, optional): Attribute values used instead of those of the nodes. Defaults to None.
+            """            
+            # Paths of the nodes in project that have been traversed
+            visited_nodes = set()
+            if cache is not None:
+                keys = subtree_keys(model, activeNode)
+            
+            write(" " * indent + "<launch>\n")
+            
+            # Either a (node, indent) whose children are still to be written or a chunk to write, the top is next
+            stack = [(activeNode, indent)]
+            
+            while stack:
+                item = stack.pop()
+                if isinstance(item, str):
+                    write(item)
+                    continue
                 
-                elif base_name == "Parameter":
-                    attributes = []
-                    
-                    name = core.get_attribute(child, 'name')
-                    command = core.get_attribute(child, 'command')
-                    value = core.get_attribute(child, 'value')
-                    binfile = core.get_attribute(child, 'binfile')
-                    textfile = core.get_attribute(child, 'textfile')
-                    type_attr = core.get_attribute(child, 'type')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if name:
-                        attributes.append(f'name="{escape_ros_attribute(name)}"')
-                    if command:
-                        attributes.append(f'command="{escape_ros_attribute(command)}"')
-                    if value:
-                        attributes.append(f'value="{escape_ros_attribute(value)}"')
-                    if binfile:
-                        attributes.append(f'binfile="{escape_ros_attribute(binfile)}"')
-                    if textfile:
-                        attributes.append(f'textfile="{escape_ros_attribute(textfile)}"')
-                    if type_attr:
-                        attributes.append(f'type="{escape_ros_attribute(type_attr)}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                        
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<param {attribute_string}/>\n"
+                node, node_indent = item
+                node_path = model.get_path(node)
                 
-                elif base_name == "rosparam":
-                    attributes = []
-                    
-                    name = core.get_attribute(child, 'name')
-                    command = core.get_attribute(child, 'command')
-                    file = core.get_attribute(child, 'file')
-                    param = core.get_attribute(child, 'param')
-                    ns = core.get_attribute(child, 'ns')
-                    subst_value = core.get_attribute(child, 'subst_value')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if command:
-                        attributes.append(f'command="{escape_ros_attribute(command)}"')
-                    if file:
-                        attributes.append(f'file="{escape_ros_attribute(file)}"')
-                    if param:
-                        attributes.append(f'param="{escape_ros_attribute(param)}"')
-                    if ns:
-                        attributes.append(f'ns="{escape_ros_attribute(ns)}"')
-                    if subst_value == False:
-                        attributes.append(f'subst_value="{str(subst_value).lower()}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                    
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<rosparam {attribute_string}>\n"
-                    result += xml_generator(child, indent + 4, topLevel = False)
-                    result += f"{' ' * (indent + 2)}</rosparam>\n"
-                    
-                elif base_name == "Machine":
-                    attributes = []
-                    
-                    name = core.get_attribute(child, 'name')
-                    address = core.get_attribute(child, 'address')
-                    env_loader = core.get_attribute(child, 'env-loader')
-                    default = core.get_attribute(child, 'default')
-                    user = core.get_attribute(child, 'user')
-                    password = core.get_attribute(child, 'password')
-                    timeout = core.get_attribute(child, 'timeout')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if name:
-                        attributes.append(f'name="{escape_ros_attribute(name)}"')
-                    if address:
-                        attributes.append(f'address="{escape_ros_attribute(address)}"')
-                    if env_loader:
-                        attributes.append(f'env-loader="{escape_ros_attribute(env_loader)}"')
-                    if default:
-                        attributes.append(f'default="{escape_ros_attribute(default)}"')
-                    if user:
-                        attributes.append(f'user="{escape_ros_attribute(user)}"')
-                    if password:
-                        attributes.append(f'password="{escape_ros_attribute(password)}"')
-                    if timeout != 10:
-                        attributes.append(f'timeout="{timeout}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                        
-                    attribute_string = " ".join(attributes)
-                        
-                    result += f"{' ' * (indent + 2)}<machine {attribute_string}>\n"           
-                    result += xml_generator(child, indent + 4,topLevel = False)
-                    result += f"{' ' * (indent + 2)}</machine>\n"
+                if node_path in visited_nodes:
+                    write('\n</launch>')
+                    continue
                 
-                elif base_name == "Env":
-                    attributes = []
-                    
-                    name = core.get_attribute(child, 'name')
-                    value = core.get_attribute(child, 'value')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if name:
-                        attributes.append(f'name="{escape_ros_attribute(name)}"')
-                    if value:
-                        attributes.append(f'value="{escape_ros_attribute(value)}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                        
-                    attribute_string = " ".join(attributes)
-                        
-                    result += f"{' ' * (indent + 2)}<env {attribute_string}/>\n"     
+                visited_nodes.add(node_path)
                 
-                elif base_name == "Test":
-                    attributes = []
-                    
-                    test_name = core.get_attribute(child, 'testName')
-                    node_type = core.get_attribute(child, 'type')
-                    pkg = core.get_attribute(child, 'pkg')
-                    name = core.get_attribute(child, 'name')
-                    args = core.get_attribute(child, 'args')
-                    clear_params = core.get_attribute(child, 'clear_params')
-                    cwd = core.get_attribute(child, 'cwd')
-                    launch_prefix = core.get_attribute(child, 'launch-prefix')
-                    ns = core.get_attribute(child, 'ns')
-                    retry = core.get_attribute(child, 'retry')
-                    time_limit = core.get_attribute(child, 'time-limit')
-                    if_attr = core.get_attribute(child, 'if')
-                    unless = core.get_attribute(child, 'unless')
-                    
-                    if pkg:
-                        attributes.append(f'pkg="{escape_ros_attribute(pkg)}"')
-                    if test_name:
-                        attributes.append(f'test-name="{escape_ros_attribute(test_name)}"')
-                    if node_type:
-                        attributes.append(f'type="{escape_ros_attribute(node_type)}"')
-                    if name:
-                        attributes.append(f'name="{escape_ros_attribute(name)}"')
-                    if args:
-                        attributes.append(f'args="{escape_ros_attribute(args)}"')
-                    if clear_params:
-                        attributes.append(f'clear_params="{str(clear_params).lower()}"')    
-                    if cwd:
-                        attributes.append(f'cwd="{escape_ros_attribute(cwd)}"')
-                    if launch_prefix:
-                        attributes.append(f'launch-prefix="{escape_ros_attribute(launch_prefix)}"')
-                    if ns:
-                        attributes.append(f'ns="{escape_ros_attribute(ns)}"')
-                    if retry:
-                        attributes.append(f'retry="{retry}"')
-                    if time_limit != 60:
-                        attributes.append(f'time-limit="{time_limit}"')
-                    if if_attr:
-                        attributes.append(f'if="{escape_ros_attribute(if_attr)}"')
-                    if unless:
-                        attributes.append(f'unless="{escape_ros_attribute(unless)}"')
-                        
-                    attribute_string = " ".join(attributes)
-                    
-                    result += f"{' ' * (indent + 2)}<test {attribute_string}>\n"
-                    result += xml_generator(child, indent + 4, topLevel = False)
-                    result += f"{' ' * (indent + 2)}</test>\n"
-                    
-                elif "rosparamBody":
-                    result += textwrap.indent(core.get_attribute(child, 'body'), f"{' ' * (indent + 2)}") + "\n"
+                fragment = None
+                if cache is not None:
+                    fragment_key = cache.key(keys[node_path], node_indent)
+                    fragment = cache.get(fragment_key)
+                if fragment is None:
+                    fragment = render_children(node, node_indent, keep, overrides)
+                    if cache is not None:
+                        cache.put(fragment_key, fragment)
                 
-            if topLevel:
-                result += " " * indent + "</launch>\n"
+                for chunk in reversed(fragment):
+                    if isinstance(chunk, str):
+                        stack.append(chunk)
+                    else:
+                        stack.append((nodes[f"{node_path}/{chunk[0]}"], node_indent + 4))
+            
+            write(" " * indent + "</launch>\n")
+            
+        def render(launch_file: dict, keep = None, overrides = None) -> str:
+            """Generates one launch file, several can be generated at once from the same snapshot
+
+            Args:
+                launch_file (dict): LaunchFile node to generate
+                keep (set, optional): Paths of the nodes to write, all nodes if None. Defaults to None.
+                overrides (dict, optional): Attribute values used instead of those of the nodes. Defaults to None.
+
+            Returns:
+                str: The launch file
+            """
+            cache = None
+            if use_cache and keep is None:
+                cache = FragmentCache.load(f"{project_id}{launch_file['nodePath']}")
+            
+            buffer = io.StringIO()
+            xml_generator(launch_file, buffer.write, cache=cache, keep=keep, overrides=overrides)
+            output = buffer.getvalue()
+            logger.info(f"Generated {len(output)} characters")
+            if cache is not None:
+                logger.info(f"Reused {cache.hits} of {cache.hits + cache.misses} fragments of the previous export")
+                cache.save()
+            return output
+        
+        def resolve(launch_file: dict) -> str:
+            """Resolves the args, conditions and namespaces of a launch file without roscore
+
+            Args:
+                launch_file (dict): LaunchFile node to resolve
+
+            Returns:
+                str: The params, nodes and includes that would be launched, as json
+            """
+            resolved = LaunchResolver(model, launch_args).resolve(launch_file)
+            for error in resolved["errors"]:
+                logger.warning(f"Could not resolve {error}")
+            logger.info(f"Resolved {len(resolved['params'])} params and {len(resolved['nodes'])} nodes, "
+                        f"{len(resolved['pruned'])} tags left out by their if/unless")
+            return json.dumps(resolved, indent=4)
+        
+        def partition(launch_file: dict, bucket_of) -> tuple:
+            """Splits a launch file into several. Each node, include and test goes to the file of its bucket, with
+            everything inside it and the args, remaps and envs around it. The coordinator file gets what has no
+            bucket and everything that is not started: params, machines.
+
+            Args:
+                launch_file (dict): LaunchFile node to split
+                bucket_of (callable): Returns the bucket of a node, include or test given the node and its type, None
+                    for the coordinator
+
+            Returns:
+                tuple: Paths of the nodes to write for the coordinator (set) and per bucket (dict)
+            """
+            subtree = model.load_sub_tree(launch_file)
+            types = dict(zip((node["nodePath"] for node in subtree), model.get_types(subtree)))
+            
+            coordinator = set()
+            buckets = {}
+            
+            def add(kept: set, node: dict):
+                # The node with everything inside it and the containers it is in
+                for inner in model.load_sub_tree(node):
+                    kept.add(inner["nodePath"])
+                path = node["nodePath"].rpartition("/")[0]
+                while path != launch_file["nodePath"] and path not in kept:
+                    kept.add(path)
+                    path = path.rpartition("/")[0]
+            
+            stack = list(model.load_children(launch_file))
+            while stack:
+                node = stack.pop()
+                node_type = types[node["nodePath"]]
+                if node_type in ("Node", "Include", "Test"):
+                    bucket = bucket_of(node, node_type)
+                    add(coordinator if bucket is None else buckets.setdefault(bucket, set()), node)
+                elif node_type in ("Parameter", "rosparam", "Machine"):
+                    add(coordinator, node)
+                elif node_type == "Group":
+                    stack.extend(model.load_children(node))
+            
+            # Args, remaps and envs go with the containers they are in
+            for node in subtree:
+                if types[node["nodePath"]] in ("Argument", "Remap", "Env"):
+                    parent = node["nodePath"].rpartition("/")[0]
+                    for kept in [coordinator] + list(buckets.values()):
+                        if parent == launch_file["nodePath"] or (parent in kept and types[parent] == "Group"):
+                            kept.add(node["nodePath"])
+            
+            return coordinator, buckets
+        
+        def machines_of(launch_file: dict) -> tuple:
+            """Finds the machine each node of a launch file runs on
+
+            Args:
+                launch_file (dict): LaunchFile node
+
+            Returns:
+                tuple: The machine of a node given the node and its type (callable, None for includes, tests and
+                    nodes without a machine), and the Machine node of each machine name (dict)
+            """
+            resolver = LaunchResolver(model, launch_args)
+            resolver.resolve(launch_file)
+            
+            def resolved(node: dict, name: str) -> str:
+                value = model.get_attribute(node, name) or ""
+                try:
+                    return resolver.substitute(value)
+                except ValueError:
+                    return value
+            
+            machines = {resolved(node, 'name'): node for node in model.load_sub_tree(launch_file)
+                        if get_type(node) == "Machine"}
+            # Nodes without a machine run on the default machine, if there is one
+            default_machine = next((name for name, node in machines.items()
+                                    if resolved(node, 'default').lower() == "true"), "")
+            
+            def machine_of(node: dict, node_type: str):
+                if node_type != "Node":
+                    return None
+                return resolved(node, 'machine') or default_machine or None
+            
+            return machine_of, machines
+        
+        def add_once(name: str, files: dict, add) -> str:
+            """Adds files to the blob storage, unless the same files were added before and their blob still exists
+
+            Args:
+                name (str): Name of the file or artifact
+                files (dict): File name -> content of everything that is added
+                add (callable): Adds the files and returns the metadata hash
+
+            Returns:
+                str: Metadata hash of the new or the existing blob
+            """
+            if index is None:
+                return add()
             
-            return result
+            key = f"{name}:{content_hash(files)}"
+            metadata_hash = index.get(key)
+            if metadata_hash is not None:
+                try:
+                    self.get_file_metadata(metadata_hash)
+                    logger.info(f"{name} is unchanged since the last export, not uploaded again")
+                    self.create_message(snapshot_root, f"{name} is unchanged since the last export: {metadata_hash}")
+                    return metadata_hash
+                except JSError:
+                    # The blob is gone, e.g. the storage was cleaned up
+                    index.discard(key)
             
-        output = xml_generator(active_node)
-        logger.info(f"Output:\n{output}")
+            metadata_hash = add()
+            index.put(key, metadata_hash)
+            return metadata_hash
         
         def clean_filename(filename: str, replacement = "_") -> str:
             """Removes invalid characters from file name
@@ -532,8 +418,137 @@ class ExportLaunch(PluginBase):
             # Ensure the filename is not empty or reduced to dots/spaces
             return cleaned_name if cleaned_name else "output_launch"
 
+        def render_parts(jobs: list) -> dict:
+            """Renders the parts of a split launch file concurrently
+
+            Args:
+                jobs (list): File name, paths of the nodes to write and attribute overrides of each part
+
+            Returns:
+                dict: File name -> launch file
+            """
+            with ContextPool() as pool:
+                outputs = list(pool.map(lambda job: render(active_node, job[1], job[2]), jobs))
+            return {file_name: output for (file_name, _, _), output in zip(jobs, outputs)}
+        
+        stem = os.path.splitext(clean_filename(f'{model.get_attribute(active_node, 'name')}.launch'))[0]
         
-        file_name = clean_filename(f'{core.get_attribute(active_node, 'name')}.launch')
-        file_hash = self.add_file(file_name, output)
+        if split_machines:
+            machine_of, machines = machines_of(active_node)
+            coordinator, hosts = partition(active_node, machine_of)
+            
+            # Hosts start their nodes locally, so the machine attributes are left out of their files
+            jobs = [(f"{stem}.launch", coordinator, None)]
+            jobs += [(f"{stem}_{clean_filename(machine)}.launch", hosts[machine], {"machine": None}) for machine in sorted(hosts)]
+            logger.info(f"Splitting the launch file over {len(hosts)} machines")
+            files = render_parts(jobs)
+            manifest = {"coordinator": jobs[0][0], "machines": []}
+            for (file_name, kept, _), machine in zip(jobs[1:], sorted(hosts)):
+                machine_node = machines.get(machine)
+                manifest["machines"].append({
+                    "machine": machine,
+                    "address": model.get_attribute(machine_node, 'address') if machine_node else None,
+                    "user": model.get_attribute(machine_node, 'user') if machine_node else None,
+                    "file": file_name,
+                    "nodes": sum(1 for path in kept if get_type(nodes[path]) == "Node")
+                })
+                if machine_node is None:
+                    logger.warning(f"No machine tag for {machine}, its address is unknown")
+            if dump_params:
+                manifest["params"] = f"{stem}_params.json"
+                files[manifest["params"]] = resolve(active_node)
+            files["manifest.json"] = json.dumps(manifest, indent=4)
+            
+            artifact_name = f"{stem}_machines"
+            artifact_hash = add_once(artifact_name, files, lambda: self.add_artifact(artifact_name, files))
+            logger.info(f"Launch files of {len(hosts)} machines saved to artifact with hash: {artifact_hash}")
+            if index is not None:
+                index.save()
+            return
+        
+        if stage_startup:
+            report = startup_layers(model, active_node)
+            layer_of = {unit: number for number, layer in enumerate(report["layers"]) for unit in layer}
+            coordinator, stages = partition(active_node, lambda node, node_type: layer_of.get(node["nodePath"]))
+            names = report["names"]
+            
+            jobs = [(f"{stem}.launch", coordinator, None)]
+            jobs += [(f"{stem}_stage{number + 1}.launch", stages[number], None) for number in sorted(stages)]
+            logger.info(f"Staging the launch file in {len(stages)} layers, the critical path has {len(report['critical_path'])} steps")
+            files = render_parts(jobs)
+            
+            manifest = {
+                "coordinator": jobs[0][0],
+                "stages": [{"file": file_name, "units": [names[unit] for unit in report["layers"][number]]}
+                           for (file_name, _, _), number in zip(jobs[1:], sorted(stages))],
+                "criticalPath": [{"units": [names[unit] for unit in step["units"]], "topics": step["topics"]}
+                                 for step in report["critical_path"]],
+                "cycles": [[names[unit] for unit in cycle] for cycle in report["cycles"]]
+            }
+            if dump_params:
+                manifest["params"] = f"{stem}_params.json"
+                files[manifest["params"]] = resolve(active_node)
+            files["manifest.json"] = json.dumps(manifest, indent=4)
+            
+            artifact_name = f"{stem}_stages"
+            artifact_hash = add_once(artifact_name, files, lambda: self.add_artifact(artifact_name, files))
+            logger.info(f"Launch files of {len(stages)} stages saved to artifact with hash: {artifact_hash}")
+            if index is not None:
+                index.save()
+            return
+        
+        if not export_all:
+            output = render(active_node)
+            logger.debug("Output:\n%s", output)
+            
+            file_name = clean_filename(f'{model.get_attribute(active_node, 'name')}.launch')
+            file_hash = add_once(file_name, {file_name: output}, lambda: self.add_file(file_name, output))
+            
+            logger.info(f"Output saved to file with hash: {file_hash}")
+            
+            if dump_params:
+                params_name = f"{os.path.splitext(file_name)[0]}_params.json"
+                params = resolve(active_node)
+                params_hash = add_once(params_name, {params_name: params}, lambda: self.add_file(params_name, params))
+                logger.info(f"Resolved params saved to file with hash: {params_hash}")
+            if index is not None:
+                index.save()
+            return
+        
+        # The libraries are LaunchFile nodes as well, but not launch files of the robot
+        launch_files = [node for node in nodes.values()
+                        if get_type(node) == "LaunchFile" and model.get_attribute(node, 'name') not in LIBRARY_NAMES]
+        logger.info(f"Exporting {len(launch_files)} launch files")
+        with ContextPool() as pool:
+            outputs = list(pool.map(render, launch_files))
+        
+        files = {}
+        manifest = []
+        for launch_file, output in zip(launch_files, outputs):
+            name = model.get_attribute(launch_file, 'name')
+            file_name = clean_filename(f'{name}.launch')
+            # Launch files of the same name are numbered in the order they are found
+            stem, extension = os.path.splitext(file_name)
+            number = 1
+            while file_name in files:
+                file_name = f"{stem}_{number}{extension}"
+                number += 1
+            
+            files[file_name] = output
+            entry = {
+                "file": file_name,
+                "name": name,
+                "path": launch_file["nodePath"],
+                "characters": len(output),
+                "sha1": hashlib.sha1(output.encode("utf-8")).hexdigest()
+            }
+            if dump_params:
+                entry["params"] = f"{os.path.splitext(file_name)[0]}_params.json"
+                files[entry["params"]] = resolve(launch_file)
+            manifest.append(entry)
+        files["manifest.json"] = json.dumps({"launchFiles": manifest}, indent=4)
         
-        logger.info(f"Output saved to file with hash: {file_hash}")
\ No newline at end of file
+        artifact_hash = add_once("launch_files", files, lambda: self.add_artifact("launch_files", files))
+        if index is not None:
+            index.save()
+        logger.info(f"{len(manifest)} launch files saved to artifact with hash: {artifact_hash}")
@@ -29,16 +29,20 @@ if sys.argv[5] != '""':
         ACTIVE_SELECTION_PATHS.pop(0)
 
 NAMESPACE = sys.argv[6].strip('"')
+SNAPSHOT_FILE = sys.argv[7].strip('"') if len(sys.argv) > 7 else ''
 
 logger.debug('commit-hash: {0}'.format(COMMIT_HASH))
 logger.debug('branch-name: {0}'.format(BRANCH_NAME))
 logger.debug('active-node-path: {0}'.format(ACTIVE_NODE_PATH))
 logger.debug('active-selection-paths: {0}'.format(ACTIVE_SELECTION_PATHS))
 logger.debug('name-space: {0}'.format(NAMESPACE))
+logger.debug('snapshot-file: {0}'.format(SNAPSHOT_FILE))
 
 # Create an instance of WebGME and the plugin
 webgme = WebGME(PORT, logger)
 plugin = ExportLaunch(webgme, COMMIT_HASH, BRANCH_NAME, ACTIVE_NODE_PATH, ACTIVE_SELECTION_PATHS, NAMESPACE)
+if SNAPSHOT_FILE:
+    plugin.snapshot_file = SNAPSHOT_FILE
 
 # Do the work
 plugin.main()
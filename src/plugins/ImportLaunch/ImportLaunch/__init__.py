@@ -3,11 +3,20 @@ This is where the implementation of the plugin code goes.
 The ImportLaunch-class is imported from both run_plugin.py and run_debug.py
 """
 import sys
+import os
+import io
 import logging
+import posixpath
 import xml.etree.ElementTree as ET
 import json
+import zipfile
 from webgme_bindings import PluginBase
 
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from launch_common import (LIBRARY_NAMES, ContextPool, IncludeResolver, LibraryLookup, ModelSnapshot, MutationBuffer,
+                           PackageTree, ParseCache, TypeResolver, find_libraries, include_key, node_key, profiled)
+
 # Setup a logger
 logger = logging.getLogger('ImportLaunch')
 logger.setLevel(logging.INFO)
@@ -17,8 +26,27 @@ formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(messag
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+# Files imported from an archive, ROS 1 and ROS 2 XML launch files
+LAUNCH_EXTENSIONS = (".launch", ".launch.xml")
+# Bumped whenever the events of iter_ros_launch change, so parses cached by older versions are not reused
+PARSE_VERSION = 1
+
+# Types of the nodes created for tags, an update leaves the other children (topics, publishers, ...) alone
+IMPORTED_TYPES = ("Argument", "Parameter", "rosparam", "Env", "Remap", "Include", "Group", "Machine", "Node", "Test")
+# Attributes that tell a tag apart from the other tags of its type in the same parent when a launch file is updated,
+# the types not listed are told apart by their name
+IDENTITY_ATTRIBUTES = {
+    "Node": ("pkg", "type", "name"),
+    "Test": ("pkg", "type", "testName"),
+    "Remap": ("from",),
+    "rosparam": ("command", "file", "param", "ns")
+}
+
 
 class ImportLaunch(PluginBase):
+    # Dump of the active node's subtree written by ImportLaunch.js (set in run_plugin.py)
+    snapshot_file = None
+
     def validate_and_update_tag(self, tag: str) -> str:
         """Ensures the tag is lowercase for standardization, except for special cases.
 
@@ -35,293 +63,543 @@ class ImportLaunch(PluginBase):
             return "parameter"
         return tag.lower()  # Default to lowercase
 
-    def parse_ros_launch(self, xml_string: str) -> dict:
-        """Parses a ROS launch file into a structured dictionary.
+    def tag_type(self, tag: str) -> str:
+        """Returns the meta type of the nodes created for a tag
 
         Args:
-            xml_string (str): XML file input represented as string
+            tag (str): Standardized tag, see validate_and_update_tag
 
         Returns:
-            dict: JSON format of XML tag information 
+            str: Name of the meta type
         """
-        root = ET.fromstring(xml_string)
+        return "rosparam" if tag == "rosparam" else tag.capitalize()
 
-        def parse_element(element: ET.Element) -> dict:
-            """Recursively parse an XML element into a dictionary.
+    def iter_ros_launch(self, xml_string: str, chunk_size: int = 65536) -> iter:
+        """Parses a ROS launch file incrementally, so nodes can be created while the rest of the file is read.
+        Elements are dropped as soon as they are closed, so no tree of the whole file is kept in memory.
 
-            Args:
-                element (ET.Element): Element in XML file
+        Args:
+            xml_string (str): XML file input
+            chunk_size (int, optional): Characters fed to the parser at a time. Defaults to 65536.
 
-            Returns:
-                dict: Element translated to dict
-            """            
+        Yields:
+            tuple: ("start", tag, attributes) when an element opens and ("end", tag, text) when it closes. The text
+                is only read for rosparam tags, it is "" for every other tag.
+        """
+        # Elements that are open, the last one is the innermost
+        open_elements = []
+        parser = ET.XMLPullParser(events=("start", "end"))
+        
+        def events() -> iter:
+            for offset in range(0, len(xml_string), chunk_size):
+                parser.feed(xml_string[offset:offset + chunk_size])
+                yield from parser.read_events()
+            parser.close()
+            yield from parser.read_events()
+        
+        for event, element in events():
             tag = self.validate_and_update_tag(element.tag.split('}')[-1])  # Handle namespaces if present
-            attributes = element.attrib
-
-            # Update attributes for special cases like 'include' and 'group'
-            if tag == "include" and "file" in attributes:
-                attributes["name"] = attributes.pop("file")
-            if tag == "group" and "ns" in attributes:
-                attributes["name"] = attributes.pop("ns")
-            if tag == "test" and "test-name" in attributes:
-                attributes["testName"] = attributes.pop("test-name")
-
-            parsed = {
-                "tag": tag,  # Updated tag name
-                "attributes": attributes,  # Attributes from the XML
-                "children": [parse_element(child) for child in element]  # Recursively parse children
-            }
             
-            if tag == "rosparam":
+            if event == "start":
+                attributes = dict(element.attrib)
+                
+                # Update attributes for special cases like 'include' and 'group'
+                if tag == "include" and "file" in attributes:
+                    attributes["name"] = attributes.pop("file")
+                if tag == "group" and "ns" in attributes:
+                    attributes["name"] = attributes.pop("ns")
+                if tag == "test" and "test-name" in attributes:
+                    attributes["testName"] = attributes.pop("test-name")
+                
+                open_elements.append(element)
+                yield "start", tag, attributes
+            else:
                 # Include text content of the rosparam tag
-                parsed["text"] = element.text.strip() if element.text else ""
-            
-            return parsed
+                text = element.text.strip() if tag == "rosparam" and element.text else ""
+                
+                open_elements.pop()
+                element.clear()
+                if open_elements:
+                    # Closed children are removed right away, so it is the last child of its parent
+                    del open_elements[-1][-1]
+                
+                yield "end", tag, text
 
-        return parse_element(root)
+    def read_launch_archive(self, data: bytes) -> list:
+        """Reads the launch files in a zip, e.g. of the launch directories of a robot repository
+
+        Args:
+            data (bytes): Content of the zip
 
+        Returns:
+            list: (path in the zip, name, content) of every launch file, sorted by path. The name is the file name
+                without its extension.
+        """
+        launch_files = []
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for path in sorted(archive.namelist()):
+                file_name = posixpath.basename(path)
+                extension = next((e for e in LAUNCH_EXTENSIONS if file_name.endswith(e)), None)
+                if extension is None or path.startswith("__MACOSX/"):
+                    continue
+                launch_files.append((path, file_name[:-len(extension)], archive.read(path).decode("utf-8")))
+        return launch_files
+
+    @profiled
     def main(self):
         core = self.core
         active_node = self.active_node
         logger = self.logger
 
         config = self.get_current_config()
-        input = self.get_file(config['file'])
+        input = self.get_bin_file(config['file'])
+
+        # A zip imports every launch file in it, all in one commit
+        if zipfile.is_zipfile(io.BytesIO(input)):
+            launch_files = self.read_launch_archive(input)
+            if not launch_files:
+                logger.error("No launch files found in the archive.")
+                self.result_set_success(False)
+                self.result_set_error("No launch files found in the archive.")
+                return
+            logger.info(f"Importing {len(launch_files)} launch files.")
+        else:
+            launch_files = [(None, "launch", input.decode("utf-8"))]
 
-        # Parse the ROS launch file into a structured dictionary
-        launch_data = self.parse_ros_launch(input)
+        # Included launch files are read from a source tree, when one is given, otherwise from the imported archive
+        tree = None
+        in_tree = False
+        try:
+            if config.get("packageArchive"):
+                tree = PackageTree.from_zip(self.get_bin_file(config["packageArchive"]))
+            elif config.get("packageTree"):
+                tree = PackageTree.from_directory(config["packageTree"])
+            elif launch_files[0][0] is not None:
+                tree = PackageTree.from_zip(input)
+                in_tree = True
+        except ValueError as e:
+            logger.error(f"Invalid package tree: {e}")
+            return
+        if tree is not None:
+            logger.info(f"Found {len(tree.packages)} packages in the package tree.")
+
+        # With updateExisting the active LaunchFile is changed to match the input, instead of creating a new one
+        update = bool(config.get("updateExisting", False))
+        if update and TypeResolver(core).get_type(active_node) != "LaunchFile":
+            logger.error("Updating an existing launch file needs a LaunchFile as the active node.")
+            return
+        if update and len(launch_files) > 1:
+            logger.error("A launch file can only be updated from a single launch file, not from an archive.")
+            return
+        if update and core.get_attribute(active_node, "name") in LIBRARY_NAMES:
+            logger.error("Libraries are updated with UpdateLibrary.")
+            return
 
-        def get_type(node: dict) -> str:
-            """Returns the type of the WebGME node
+        # Libraries are read from a snapshot of their subtrees instead of the core, the rest of the project is not
+        # loaded. An update reads the launch file instead and only the library nodes it needs.
+        model = ModelSnapshot.load(core, active_node, self.snapshot_file, names=None if update else LIBRARY_NAMES)
 
-            Args:
-                node (dict): A node in the WebGME project
+        # Changes are buffered and sent to the core in one go before saving
+        changes = MutationBuffer(core, reader=model)
 
-            Returns:
-                str: The type of the node as defined in the Launch File tab in the metamodel
-            """
-            meta_types = ["LaunchFile", "Include", "Argument", "Remap", "Group", "Parameter", "rosparam", "Node", "Topic", "GroupPublisher", "GroupSubscriber", "Subscriber", "Publisher", "Machine", "Env", "Test", "rosparamBody"]
-            base_type = core.get_base(node)
-            while base_type and core.get_attribute(base_type, 'name') not in meta_types:
-                base_type = core.get_base(base_type)
-            return core.get_attribute(base_type, 'name')
+        # Resolves node types, cached for the whole run
+        get_type = model.get_type
 
         # Ensure 'LaunchFile' type exists in the META
         if 'LaunchFile' not in self.META:
             logger.error('LaunchFile type not found in META. Ensure it exists in the meta-model.')
             return
 
+        includes = IncludeResolver(tree) if tree is not None else None
+        # The files of an archive are parsed concurrently, a single file is imported while it is parsed
+        pool = ContextPool() if len(launch_files) > 1 else None
+        # LaunchFile nodes are created in the core right away, they are deleted again if the import fails
+        created_files = []
         try:
-            # Define parameters for the new LaunchFile node
-            params = {
-                'parent': active_node,
-                'base': self.META['LaunchFile']
-            }
-            launch_file_node = core.create_node(params)
-            core.set_attribute(launch_file_node, 'name', 'launch')
-            logger.info(f'Created new LaunchFile node with name: "launch".')
-
             # Load the Node Library for comparison
-            all_children = core.load_sub_tree(active_node)
-            node_lib = next((child for child in all_children if core.get_attribute(child, "name") == "NodeLibrary"), None)
+            libraries = find_libraries(model, self.root_node if update else active_node)
+            node_lib = libraries.get("NodeLibrary")
 
             if not node_lib:
                 logger.error("NodeLibrary not found.")
                 return
             
             # Load the Test Library for comparison
-            all_children = core.load_sub_tree(active_node)
-            test_lib = next((child for child in all_children if core.get_attribute(child, "name") == "TestLibrary"), None)
+            test_lib = libraries.get("TestLibrary")
 
             if not test_lib:
                 logger.error("TestLibrary not found.")
                 return
             
             # Load the Include Library for comparison
-            all_children = core.load_sub_tree(active_node)
-            include_lib = next((child for child in all_children if core.get_attribute(child, "name") == "IncludeLibrary"), None)
+            include_lib = libraries.get("IncludeLibrary")
 
             if not include_lib:
                 logger.error("IncludeLibrary not found.")
                 return
 
-            # Cache all nodes in the node library
-            lib_children = core.load_sub_tree(node_lib)
-            node_library = {
-                (core.get_attribute(node, "pkg"), core.get_attribute(node, "type")): node
-                for node in lib_children
-                if core.get_attribute(node, "pkg") and core.get_attribute(node, "type")
-            }
-            
-            # Cache all tests in the test library
-            test_lib_children = core.load_sub_tree(test_lib)
-            test_library = {
-                (core.get_attribute(node, "pkg"), core.get_attribute(node, "type")): node
-                for node in test_lib_children
-                if core.get_attribute(node, "pkg") and core.get_attribute(node, "type")
-            }
-            
-            # Cache all includes in the include library
-            include_lib_children = core.load_sub_tree(include_lib)
-            include_library = {
-                core.get_attribute(node, "name").replace("/", ""): node
-                for node in include_lib_children
-                if core.get_attribute(node, "name")
-            }
-
-            def find_node_in_library(node_data: dict) -> dict:
+            # Nodes of the libraries by key, from the index UpdateLibrary stored in each library
+            node_library = LibraryLookup(core, model, node_lib, node_key)
+            test_library = LibraryLookup(core, model, test_lib, node_key)
+            include_library = LibraryLookup(core, model, include_lib, include_key)
+            if not (node_library.indexed and test_library.indexed and include_library.indexed):
+                logger.info("No up to date library index, run UpdateLibrary to create it.")
+
+            def find_node_in_library(attributes: dict) -> dict:
                 """Locates node in node library
 
                 Args:
-                    node_data (dict): Node data from XML
+                    attributes (dict): Attributes of the tag in the XML
 
                 Returns:
                     dict: Node in WebGME
                 """                
                 
-                pkg = node_data.get("attributes", {}).get("pkg")
-                node_type = node_data.get("attributes", {}).get("type")
-                return node_library.get((pkg, node_type))
+                return node_library.get(node_key(attributes.get))
             
-            def find_test_in_library(test_data: dict) -> dict:
+            def find_test_in_library(attributes: dict) -> dict:
                 """Locates test in test library
 
                 Args:
-                    test_data (dict): Test data from XML
+                    attributes (dict): Attributes of the tag in the XML
 
                 Returns:
                     dict: Test in WebGME
                 """                 
                 
-                pkg = test_data.get("attributes", {}).get("pkg")
-                test_type = test_data.get("attributes", {}).get("type")
-                return test_library.get((pkg, test_type))
+                return test_library.get(node_key(attributes.get))
 
-            def find_include_in_library(include_data: dict) -> dict:
+            def find_include_in_library(attributes: dict) -> dict:
                 """Locates include in include library
 
                 Args:
-                    include_data (dict): Include data from XML
+                    attributes (dict): Attributes of the tag in the XML
 
                 Returns:
                     dict: Include in WebGME
                 """
-                name = include_data.get("attributes", {}).get("name").replace("/", "") if include_data.get("attributes", {}).get("name") else None
-                return include_library.get(name)
+                return include_library.get(include_key(attributes.get))
+
+            def find_library_node(node_type: str, attributes: dict) -> dict:
+                if node_type == "Node":
+                    return find_node_in_library(attributes)
+                if node_type == "Test":
+                    return find_test_in_library(attributes)
+                if node_type == "Include":
+                    return find_include_in_library(attributes)
+                return None
 
-            def copy_attributes_and_pub_sub(existing_node: dict, child_node: dict):
-                """Copies all attributes and publishers/subscribers from the existing library node to the new child node.
+            def create_child_node(parent_node: dict, tag: str, attributes: dict) -> dict:
+                """Creates the node of a tag, from the library if it is there, otherwise using attributes from the input.
 
                 Args:
-                    existing_node (dict): Node found in library
-                    child_node (dict): Node to receive copies
+                    parent_node (dict): WebGME parent node
+                    tag (str): Standardized tag of the element
+                    attributes (dict): Attributes of the element
+
+                Returns:
+                    dict: The new node
                 """                
-                
-                for attr in core.get_attribute_names(existing_node):
-                    core.set_attribute(child_node, attr, core.get_attribute(existing_node, attr))
 
-                lib_children = core.load_sub_tree(existing_node)
-                new_node_children = core.load_children(child_node)
+                tag = self.tag_type(tag)
+                
+                name_attribute = attributes.get("name")
+
+                # The node is an instance of the library node, so it inherits the attributes and publishers/subscribers
+                # of the library and only the attributes of the tag that differ are written
+                library_node = find_library_node(tag, attributes)
+                if library_node is not None:
+                    logger.info(f"{tag} {attributes.get('testName') if tag == 'Test' else name_attribute} found in library.")
+                    child_node = changes.create_child(parent_node, library_node)
+                else:
+                    child_node = changes.create_child(parent_node, self.META.get(tag, None) if tag in self.META else None)
+                    logger.info(f"Created new node: {name_attribute} with attributes from input.")
+
+                if tag in ("Test", "Group") and "name" not in attributes.keys() and changes.get_attribute(child_node, "name") != "":
+                    changes.set_attribute(child_node, "name", "")
+
+                for attr, value in attributes.items():
+                    attribute_value = changes.get_attribute(child_node, attr)
+                    
+                    if isinstance(attribute_value, bool):
+                        if value.lower() not in ("true", "false"):
+                            continue
+                        value = value.lower() == "true"
+                    if value != attribute_value:
+                        changes.set_attribute(child_node, attr, value)
+                
+                return child_node
 
-                def child_exists(child: dict, children: list) -> bool:
-                    """Check if a child with the same name already exists in the new node.
+            def add_included_interface(include_node: dict, attributes: dict, current_dir: str = None):
+                """Adds the publishers and subscribers of the nodes started by an included file, read from the
+                package tree, that the include does not have from the library yet.
 
-                    Args:
-                        child (dict): Child node to check from library
-                        children (list): Existing children
+                Args:
+                    include_node (dict): The new Include node
+                    attributes (dict): Attributes of the include tag
+                    current_dir (str, optional): Directory of the including file in the package tree. Defaults to None.
+                """
+                nodes = includes.nodes(attributes["name"], current_dir)
+                if nodes is None:
+                    return
+                
+                existing_include = find_include_in_library(attributes)
+                existing = {
+                    (get_type(child), model.get_attribute(child, "name"), model.get_attribute(child, "nodeName"))
+                    for child in (model.load_children(existing_include) if existing_include else [])
+                }
+                
+                for pkg, node_type, node_name in nodes:
+                    existing_node = node_library.get((pkg, node_type))
+                    if not existing_node:
+                        logger.info(f"Node {node_name} of {attributes['name']} not found in library.")
+                        continue
+                    for lib_child in model.load_children(existing_node):
+                        child_type = get_type(lib_child)
+                        if child_type not in ["Publisher", "Subscriber"]:
+                            continue
+                        key = ("Group" + child_type, model.get_attribute(lib_child, "name"), node_name)
+                        if key in existing:
+                            continue
+                        existing.add(key)
+                        new_child = changes.create_child(include_node, self.META.get(key[0], None))
+                        changes.set_attribute(new_child, "name", key[1])
+                        changes.set_attribute(new_child, "nodeName", node_name)
+
+            # Includes whose file is read from the package tree, the files are read while the import goes on
+            included = []
+
+            def create_launch_file(name: str, events, current_dir: str = None):
+                """Creates a LaunchFile node with the nodes of a launch file
 
-                    Returns:
-                        bool: Whether or not a child with the same name already exists in the new node
-                    """                    
+                Args:
+                    name (str): Name of the LaunchFile node
+                    events (iter): Events of the launch file, see iter_ros_launch
+                    current_dir (str, optional): Directory of the launch file in the package tree. Defaults to None.
+                """
+                # Define parameters for the new LaunchFile node
+                params = {
+                    'parent': active_node,
+                    'base': self.META['LaunchFile']
+                }
+                launch_file_node = core.create_node(params)
+                created_files.append(launch_file_node)
+                changes.set_attribute(launch_file_node, 'name', name)
+                logger.info(f'Created new LaunchFile node with name: "{name}".')
+
+                # Nodes are created as their tags open, while the rest of the file is still being parsed. The launch
+                # tag itself is the new LaunchFile node.
+                parents = []
+                for event, tag, data in events:
+                    if event == "start":
+                        parents.append(create_child_node(parents[-1], tag, data) if parents else launch_file_node)
+                        if includes is not None and tag == "include" and data.get("name"):
+                            includes.prefetch(data["name"], current_dir)
+                            included.append((parents[-1], data, current_dir))
+                        continue
                     
-                    child_name = core.get_attribute(child, "name")
-                    return any(core.get_attribute(existing_child, "name") == child_name for existing_child in children)
+                    child_node = parents.pop()
+                    if tag == "rosparam" and data:
+                        rosparam_body_node = changes.create_child(child_node, self.META.get("rosparamBody", None))
+                        changes.set_attribute(rosparam_body_node, 'body', rosparam_body(data))
 
-                for lib_child in lib_children:
-                    child_type = get_type(lib_child)
-                    if child_type in ["Publisher", "Subscriber", "GroupPublisher", "GroupSubscriber"]:
-                        if not child_exists(lib_child, new_node_children):
-                            copied_node = core.copy_node(lib_child, child_node)
-                            logger.info(f"Copied {core.get_attribute(copied_node, 'name')} to {core.get_attribute(child_node, 'name')}.")
+            def rosparam_body(text: str) -> str:
+                return "\n".join(line.strip() for line in text.splitlines() if line.strip())
 
-            def create_child_nodes(parent_node: dict, data: dict):
-                """Creates child nodes using attributes from the input data if the node does not exist in the library.
+            def identity(node_type: str, get) -> tuple:
+                return tuple(get(name) or "" for name in IDENTITY_ATTRIBUTES.get(node_type, ("name",)))
+
+            def existing_children(node: dict) -> dict:
+                """Indexes the children of a node that were created for tags
 
                 Args:
-                    parent_node (dict): WebGME parent node
-                    data (dict): XML dict
-                """                
+                    node (dict): Existing node
 
-                for child in data.get("children", []):
-                    tag = child.get("tag").capitalize()
-                    
-                    if tag == "Rosparam":
-                        tag = "rosparam"
-                    
-                    attributes = child.get("attributes", {})
-                    name_attribute = attributes.get("name")
+                Returns:
+                    dict: (type, identity) -> children, in the order of the model
+                """
+                existing = {}
+                for child in model.load_children(node):
+                    child_type = get_type(child)
+                    if child_type in IMPORTED_TYPES:
+                        key = (child_type, identity(child_type, lambda name: model.get_attribute(child, name)))
+                        existing.setdefault(key, []).append(child)
+                return existing
+
+            def update_attributes(node: dict, node_type: str, attributes: dict) -> bool:
+                """Sets the attributes of an existing node to the values a new import of its tag would give it
+
+                Args:
+                    node (dict): Existing node
+                    node_type (str): Type of the node
+                    attributes (dict): Attributes of the tag
 
-                    # Check if the node already exists in the library
-                    existing_node = find_node_in_library(child)
+                Returns:
+                    bool: Whether any attribute changed
+                """
+                # Attributes the tag does not set have the value of the library node or the meta type
+                defaults = find_library_node(node_type, attributes) or self.META.get(node_type)
+                changed = False
+                for name in sorted(set(model.get_attribute_names(node)) | set(attributes)):
+                    current = model.get_attribute(node, name)
+                    if name in attributes:
+                        value = attributes[name]
+                        if isinstance(current, bool):
+                            value = value.lower() == "true" if value.lower() in ("true", "false") else current
+                    elif name == "name" and node_type in ("Test", "Group"):
+                        value = ""
+                    else:
+                        value = model.get_attribute(defaults, name) if defaults else current
+                    if value != current:
+                        changes.set_attribute(node, name, value)
+                        changed = True
+                return changed
+
+            def update_launch_file(launch_file_node: dict, events) -> dict:
+                """Updates an existing LaunchFile node to match a launch file. Tags are matched to the existing
+                children of their parent by type and identity (IDENTITY_ATTRIBUTES), matched nodes keep their
+                identity and connections and only get the attributes that changed. Tags without a match are
+                created, children without a tag are deleted, with the topics connected to them.
+
+                Args:
+                    launch_file_node (dict): The LaunchFile node
+                    events (iter): Events of the launch file, see iter_ros_launch
+
+                Returns:
+                    dict: Number of nodes created, updated and deleted
+                """
+                counts = {"created": 0, "updated": 0, "deleted": 0}
+                deleted = []
+                # (node, existing children not matched yet, whether the node is new)
+                frames = []
+                for event, tag, data in events:
+                    if event == "start":
+                        if not frames:
+                            frames.append((launch_file_node, existing_children(launch_file_node), False))
+                            continue
+                        parent_node, existing, created = frames[-1]
+                        node_type = self.tag_type(tag)
+                        matches = existing.get((node_type, identity(node_type, data.get))) if not created else None
+                        if matches:
+                            node = matches.pop(0)
+                            counts["updated"] += update_attributes(node, node_type, data)
+                            frames.append((node, existing_children(node), False))
+                            continue
+                        node = create_child_node(parent_node, tag, data)
+                        counts["created"] += 1
+                        if includes is not None and tag == "include" and data.get("name"):
+                            includes.prefetch(data["name"])
+                            included.append((node, data, None))
+                        frames.append((node, None, True))
+                        continue
                     
-                    # Check if the test already exists in the library
-                    existing_test = find_test_in_library(child)
+                    node, existing, created = frames.pop()
+                    if created:
+                        if tag == "rosparam" and data:
+                            rosparam_body_node = changes.create_child(node, self.META.get("rosparamBody", None))
+                            changes.set_attribute(rosparam_body_node, 'body', rosparam_body(data))
+                        continue
                     
-                    # Check if the include already exists in the library
-                    existing_include = find_include_in_library(child)
-
-                    if existing_node and tag == "Node":
-                        logger.info(f"Node {name_attribute} found in library. Copying attributes and publishers/subscribers.")
-                        child_node = core.create_child(parent_node, core.get_meta_type(existing_node))
-                        copy_attributes_and_pub_sub(existing_node, child_node)
-                    elif existing_test and tag == "Test":
-                        logger.info(f"Test {attributes.get("testName")} found in library. Copying attributes and publishers/subscribers.")
-                        child_node = core.create_child(parent_node, core.get_meta_type(existing_test))
-                        copy_attributes_and_pub_sub(existing_test, child_node)
-                    elif existing_include and tag == "Include":
-                        logger.info(f"Include {name_attribute} found in library. Copying publishers/subscribers.")
-                        child_node = core.create_child(parent_node, core.get_meta_type(existing_include))
-                        copy_attributes_and_pub_sub(existing_include, child_node)
-                    else:
-                        child_node = core.create_child(parent_node, self.META.get(tag, None) if tag in self.META else None)
-                        logger.info(f"Created new node: {name_attribute} with attributes from input.")
-                        
-                        if tag == "rosparam":
-                            text = child.get("text", {})
-                            if text:
-                                rosparam_body_node = core.create_child(child_node, self.META.get("rosparamBody", None))
-                                core.set_attribute(rosparam_body_node, 'body', "\n".join(line.strip() for line in text.splitlines() if line.strip()))
-
-                    if tag == "Test" and "name" not in attributes.keys():
-                        core.set_attribute(child_node, "name", "")
-
-                    if tag == "Group" and "name" not in attributes.keys():
-                        core.set_attribute(child_node, "name", "")
-
-                    for attr, value in attributes.items():
-                        attribute_value = core.get_attribute(child_node, attr)
-                        
-                        if isinstance(attribute_value, bool):
-                            if value.lower() == "true":
-                                core.set_attribute(child_node, attr, True)
-                            elif value.lower() == "false":
-                                core.set_attribute(child_node, attr, False)
-                        else:
-                            core.set_attribute(child_node, attr, value)
-
-                    create_child_nodes(child_node, child)
-
-            # Create child nodes from launch_data
-            create_child_nodes(launch_file_node, launch_data)
+                    for unmatched in (child for children in existing.values() for child in children):
+                        changes.delete_node(unmatched)
+                        deleted.append(unmatched["nodePath"])
+                        counts["deleted"] += 1
+                    if tag == "rosparam":
+                        # The body is kept in a rosparamBody child, there is at most one
+                        bodies = [child for child in model.load_children(node) if get_type(child) == "rosparamBody"]
+                        body = rosparam_body(data) if data else None
+                        current = model.get_attribute(bodies[0], 'body') if bodies else None
+                        if body is not None and not bodies:
+                            changes.set_attribute(changes.create_child(node, self.META.get("rosparamBody", None)), 'body', body)
+                        elif body is not None and current != body:
+                            changes.set_attribute(bodies[0], 'body', body)
+                        for extra in (bodies[1:] if body is not None else bodies):
+                            changes.delete_node(extra)
+                        if body != current or len(bodies) > 1:
+                            counts["updated"] += 1
+                
+                def is_deleted(path: str) -> bool:
+                    return path is not None and any(path == d or path.startswith(d + "/") for d in deleted)
+                
+                # Connections of deleted nodes go with them, MakeConnections adds those of the new ones
+                if deleted:
+                    for node in model.load_sub_tree(launch_file_node):
+                        if get_type(node) == "Topic" and not is_deleted(node["nodePath"]) and (
+                                is_deleted(model.get_pointer_path(node, "src")) or is_deleted(model.get_pointer_path(node, "dst"))):
+                            changes.delete_node(node)
+                            counts["deleted"] += 1
+                return counts
+
+            # Files imported before are read from the cache instead of being parsed again
+            parse_cache = ParseCache.load() if config.get("parseCache", True) else None
+
+            def launch_events(text: str) -> iter:
+                if parse_cache is None:
+                    return self.iter_ros_launch(text)
+                return parse_cache.events(ParseCache.key(text, PARSE_VERSION), lambda: self.iter_ros_launch(text))
+
+            def parse(launch_file: tuple) -> list:
+                """Parses a launch file of the archive, see iter_ros_launch
+
+                Args:
+                    launch_file (tuple): (path in the zip, name, content)
+
+                Returns:
+                    list: Events of the launch file
+                """
+                path, _, text = launch_file
+                try:
+                    return list(launch_events(text))
+                except ET.ParseError as e:
+                    raise ValueError(f"{path}: {e}") from e
+
+            if pool is None:
+                parsed = [launch_events(launch_files[0][2])]
+            else:
+                # In the order of the archive, each file is created as soon as it and the ones before are parsed
+                parsed = pool.map(parse, launch_files)
+            if update:
+                counts = update_launch_file(active_node, parsed[0])
+                logger.info(f"Updated launch file: {counts['created']} created, {counts['updated']} updated, "
+                            f"{counts['deleted']} deleted.")
+                if not any(counts.values()) and not included:
+                    logger.info("Launch file is up to date.")
+                    return
+            else:
+                for (path, name, _), events in zip(launch_files, parsed):
+                    create_launch_file(name, events, posixpath.dirname(path) if in_tree else None)
+
+            for include_node, attributes, current_dir in included:
+                add_included_interface(include_node, attributes, current_dir)
+            if parse_cache is not None and parse_cache.hits:
+                logger.info(f"Read {parse_cache.hits} of {len(launch_files)} launch files from the parse cache.")
+            if includes is not None:
+                logger.info(f"Parsed {includes.parsed} included files.")
+                for file in sorted(includes.unresolved):
+                    # An imported archive is not expected to hold every package
+                    (logger.info if in_tree else logger.warning)(f"Included file {file} not found in the package tree.")
 
             # Save the changes
-            new_commit_hash = self.util.save(launch_file_node, self.commit_hash)
+            changes.flush()
+            new_commit_hash = self.util.save(self.root_node, self.commit_hash)
             self.project.set_branch_hash(
                 branch_name=self.branch_name,
                 new_hash=new_commit_hash["hash"],
                 old_hash=self.commit_hash
             )
             logger.info("All nodes successfully created and saved.")
+        except (ET.ParseError, ValueError) as e:
+            # A launch file that can not be parsed fails the run, nothing of it is kept
+            for launch_file_node in created_files:
+                core.delete_node(launch_file_node)
+            logger.error(f"Invalid launch file: {str(e)}")
+            self.result_set_success(False)
+            self.result_set_error(f"Invalid launch file: {str(e)}")
         except Exception as e:
             logger.error(f"Error during node creation: {str(e)}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if includes is not None:
+                includes.close()
 
@@ -5,6 +5,10 @@ Rather than relying on be called from a node-process with a corezmq server alrea
 
 To change the context (project-name etc.) modify the CAPITALIZED options passed to the spawned node-js server.
 
+Set OFFLINE_MODEL to a .webgmex export or an offline snapshot to run without the node-process (and without mongo),
+the model is then kept in memory (see launch_common/offline.py), e.g.
+    OFFLINE_MODEL=src/seeds/ROSLaunch/ROSLaunch.webgmex python src/plugins/ImportLaunch/run_debug.py
+
 Note! This must run with the root of the webgme-repository as cwd.
 """
 
@@ -17,10 +21,16 @@ import logging
 from webgme_bindings import WebGME
 from ImportLaunch import ImportLaunch
 
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from launch_common import find_free_port
+from launch_common.offline import OfflineWebGME
+
 logger = logging.getLogger('ImportLaunch')
 
 # Modify these or add option or parse from sys.argv (as in done in run_plugin.py)
-PORT = '5555'
+# First free port from 5555 on, so several debug sessions (or a running server) do not collide
+PORT = str(find_free_port())
 PROJECT_NAME = 'Example'
 BRANCH_NAME = 'master'
 ACTIVE_NODE_PATH = ''
@@ -28,27 +38,36 @@ ACTIVE_SELECTION_PATHS = []
 NAMESPACE = ''
 METADATA_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'metadata.json')
 
-COREZMQ_SERVER_FILE = os.path.join(os.getcwd(), 'node_modules', 'webgme-bindings', 'bin', 'corezmq_server.js')
+# Only used when running offline: local files for the asset options of the config (e.g. {'file': 'my.launch'}) and
+# the directory the files added by the plugin are written to. When OFFLINE_SNAPSHOT is set the model is written there
+# after the run, so the next plugin can be debugged on it (OFFLINE_MODEL=<snapshot>).
+OFFLINE_MODEL = os.environ.get('OFFLINE_MODEL')
+OFFLINE_SNAPSHOT = os.environ.get('OFFLINE_SNAPSHOT')
+OFFLINE_ASSET_FILES = {}
+OFFLINE_OUTPUT_DIR = 'offline_output'
 
-if not os.path.isfile(COREZMQ_SERVER_FILE):
-    COREZMQ_SERVER_FILE = os.path.join(os.getcwd(), 'bin', 'corezmq_server.js')
+if OFFLINE_MODEL:
+    webgme = OfflineWebGME.open(OFFLINE_MODEL, logger, METADATA_PATH, OFFLINE_ASSET_FILES, OFFLINE_OUTPUT_DIR)
+else:
+    COREZMQ_SERVER_FILE = os.path.join(os.getcwd(), 'node_modules', 'webgme-bindings', 'bin', 'corezmq_server.js')
 
-# Star the server (see bin/corezmq_server.js for more options e.g. for how to pass a pluginConfig)
-node_process = subprocess.Popen(['node', COREZMQ_SERVER_FILE, PROJECT_NAME, '-p', PORT, '-m', METADATA_PATH],
-                                stdout=sys.stdout, stderr=sys.stderr)
+    if not os.path.isfile(COREZMQ_SERVER_FILE):
+        COREZMQ_SERVER_FILE = os.path.join(os.getcwd(), 'bin', 'corezmq_server.js')
 
-logger.info('Node-process running at PID {0}'.format(node_process.pid))
-# Create an instance of WebGME and the plugin
-webgme = WebGME(PORT, logger)
+    # Star the server (see bin/corezmq_server.js for more options e.g. for how to pass a pluginConfig)
+    node_process = subprocess.Popen(['node', COREZMQ_SERVER_FILE, PROJECT_NAME, '-p', PORT, '-m', METADATA_PATH],
+                                    stdout=sys.stdout, stderr=sys.stderr)
 
+    logger.info('Node-process running at PID {0}'.format(node_process.pid))
+    # Create an instance of WebGME and the plugin
+    webgme = WebGME(PORT, logger)
 
-def exit_handler():
-    logger.info('Cleaning up!')
-    webgme.disconnect()
-    node_process.send_signal(signal.SIGTERM)
+    def exit_handler():
+        logger.info('Cleaning up!')
+        webgme.disconnect()
+        node_process.send_signal(signal.SIGTERM)
 
-
-atexit.register(exit_handler)
+    atexit.register(exit_handler)
 
 commit_hash = webgme.project.get_branch_hash(BRANCH_NAME)
 plugin = ImportLaunch(webgme, commit_hash, BRANCH_NAME, ACTIVE_NODE_PATH, ACTIVE_SELECTION_PATHS, NAMESPACE)
@@ -56,4 +75,7 @@ plugin = ImportLaunch(webgme, commit_hash, BRANCH_NAME, ACTIVE_NODE_PATH, ACTIVE
 # Do the work
 plugin.main()
 
+if OFFLINE_MODEL and OFFLINE_SNAPSHOT:
+    webgme.save_snapshot(OFFLINE_SNAPSHOT, BRANCH_NAME)
+
 # The exit_handler will be invoked after this line
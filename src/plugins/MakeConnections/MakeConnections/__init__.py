@@ -3,10 +3,15 @@ This is where the implementation of the plugin code goes.
 The MakeConnections-class is imported from both run_plugin.py and run_debug.py
 """
 import sys
+import os
 import logging
 from webgme_bindings import PluginBase
 from itertools import chain
 
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from launch_common import ModelSnapshot, MutationBuffer, profiled, rpc_phase
+
 # Setup a logger
 logger = logging.getLogger('MakeConnections')
 logger.setLevel(logging.INFO)
@@ -18,6 +23,10 @@ logger.addHandler(handler)
 
 
 class MakeConnections(PluginBase):
+    # Dump of the active node's subtree written by MakeConnections.js (set in run_plugin.py)
+    snapshot_file = None
+
+    @profiled
     def main(self):
         active_node = self.active_node
         core = self.core
@@ -25,20 +34,16 @@ class MakeConnections(PluginBase):
         
         launch_file = active_node
         
-        def get_type(node: dict) -> str:
-            """Returns the type of the WebGME node
-
-            Args:
-                node (dict): A node in the WebGME project
-
-            Returns:
-                str: The type of the node as defined in the Launch File tab in the metamodel
-            """
-            meta_types = ["LaunchFile", "Include", "Argument", "Remap", "Group", "Parameter", "rosparam", "Node", "Topic", "GroupPublisher", "GroupSubscriber", "Subscriber", "Publisher", "Machine", "Env", "Test", "rosparamBody"]
-            base_type = core.get_base(node)
-            while base_type and core.get_attribute(base_type, 'name') not in meta_types:
-                base_type = core.get_base(base_type)
-            return core.get_attribute(base_type, 'name')
+        # Changes are buffered and sent to the core in one go before saving
+        rpc_phase(self, "Load snapshot")
+        changes = MutationBuffer(core)
+        
+        # Reads go through a snapshot of the launch file, changes are written through it to the buffer
+        model = ModelSnapshot.load(changes, active_node, self.snapshot_file)
+        meta = self.util.META(active_node)
+        
+        # Resolves node types, cached for the whole run
+        get_type = model.get_type
         
         publishers = []
         subscribers = []
@@ -55,10 +60,7 @@ class MakeConnections(PluginBase):
                 node (dict): Current node
             """            
             
-            meta_node = core.get_base_type(node)
-            meta_type = 'undefined'
-            if meta_node:
-                meta_type = core.get_attribute(meta_node, 'name')
+            meta_type = get_type(node)
             if meta_type == "Publisher":
                 publishers.append(node)
             if meta_type == "Subscriber":
@@ -87,12 +89,11 @@ class MakeConnections(PluginBase):
             pubs = []
             subs = []
             
-            children = core.load_children(node)
+            children = model.load_children(node)
             for c in children:
-                grand_children = core.load_children(c)
+                grand_children = model.load_children(c)
                 for g in grand_children:
-                    meta_node = core.get_base_type(g)
-                    meta_type = core.get_attribute(meta_node, 'name')
+                    meta_type = get_type(g)
                     if meta_type == "Publisher" or meta_type == "GroupPublisher":
                         pubs.append(g)
                     if meta_type == "Subscriber" or meta_type == "GroupSubscriber":
@@ -110,13 +111,13 @@ class MakeConnections(PluginBase):
                 name (str): Name of topic being communicated
             """            
             
-            parent = core.get_common_parent([pub, sub])
+            parent = model.get_common_parent([pub, sub])
             
-            new_topic = core.create_child(parent, self.util.META(active_node)["Topic"])
+            new_topic = model.create_child(parent, meta["Topic"])
             
-            core.set_pointer(new_topic, 'src', pub)
-            core.set_pointer(new_topic, 'dst', sub)
-            core.set_attribute(new_topic, 'name', name)
+            model.set_pointer(new_topic, 'src', pub)
+            model.set_pointer(new_topic, 'dst', sub)
+            model.set_attribute(new_topic, 'name', name)
             
         def count_slashes(string: dict) -> int:
             """Counts the number of slashes / in a node path of a node
@@ -153,7 +154,7 @@ class MakeConnections(PluginBase):
                 return name
             
         def get_remap_children(node: dict) -> list:
-            children = core.load_children(node)
+            children = model.load_children(node)
             
             remap_children = []
             
@@ -165,33 +166,36 @@ class MakeConnections(PluginBase):
         
         def get_grandparent(node: dict) -> dict:
             try:
-                return core.get_parent(core.get_parent(node))
+                return model.get_parent(model.get_parent(node))
             except:
                 return
                 
         # Get list of publishers, subscribers, topics, group pubs, group subs    
-        self.util.traverse(active_node, find_types)
+        rpc_phase(self, "Traverse")
+        model.traverse(active_node, find_types)
         
         # Delete all existing topics, group pubs, group subs
+        rpc_phase(self, "Delete old topics")
         for t in topics:
-            core.delete_node(t)
+            model.delete_node(t)
         
         include_group_pubs = []
         include_group_subs = []
         
         for p in group_pubs:
-            if get_type(core.get_parent(p)) == "Group":
-                core.delete_node(p)
+            if get_type(model.get_parent(p)) == "Group":
+                model.delete_node(p)
             else:
                 include_group_pubs.append(p)
         
         for s in group_subs:
-            if get_type(core.get_parent(s)) == "Group":
-                core.delete_node(s)
+            if get_type(model.get_parent(s)) == "Group":
+                model.delete_node(s)
             else:
                 include_group_subs.append(s)
         
         # Add new group nodes
+        rpc_phase(self, "Add group ports")
         sorted_groups = sorted(groups, key = lambda x: -1 * count_slashes(x))
         new_group_pubs = []
         new_group_subs = []
@@ -201,37 +205,37 @@ class MakeConnections(PluginBase):
             for node in chain(pubs, subs):
                 meta_type = get_type(node)
             
-                name = core.get_attribute(node, 'name')
+                name = model.get_attribute(node, 'name')
                 
-                parent = core.get_parent(node)
+                parent = model.get_parent(node)
                 parent_name = None
                 if get_type(parent) == "Node":
-                    parent_name = core.get_attribute(parent, "name")
+                    parent_name = model.get_attribute(parent, "name")
                 elif get_type(parent) == "Test":
-                    parent_name = core.get_attribute(parent, "testName")
+                    parent_name = model.get_attribute(parent, "testName")
 
                 remap_children = get_remap_children(parent)
                 if len(remap_children) > 0:
                     for r in remap_children:
-                        r_from = core.get_attribute(r, 'from')
-                        r_to = core.get_attribute(r, 'to')
+                        r_from = model.get_attribute(r, 'from')
+                        r_to = model.get_attribute(r, 'to')
                         name = remap_name(r_from, r_to, name)
 
                 if name[0] != "/":
                     parent_type = get_type(parent)
                     if parent_type in ["Node", "Test", "Include"]:
-                        ns = core.get_attribute(parent, "ns")
+                        ns = model.get_attribute(parent, "ns")
                         if ns != "":
                             name = ns + "/" + name
 
                 remap_group_children = get_remap_children(g)
                 if len(remap_group_children) > 0:
                     for r in remap_group_children:
-                        r_from = core.get_attribute(r, 'from')
-                        r_to = core.get_attribute(r, 'to')
+                        r_from = model.get_attribute(r, 'from')
+                        r_to = model.get_attribute(r, 'to')
                         name = remap_name(r_from, r_to, name)
 
-                g_name = core.get_attribute(g, "name")
+                g_name = model.get_attribute(g, "name")
                 ns = ""
                 if g_name and name[0] != "/":
                     ns = g_name + "/"
@@ -239,36 +243,36 @@ class MakeConnections(PluginBase):
                 group_xub_name = ns + name
 
                 if meta_type == "Publisher":
-                    new_group_pub = core.create_child(g, self.util.META(active_node)["GroupPublisher"])
-                    core.set_attribute(new_group_pub, 'name', group_xub_name)
-                    core.set_attribute(new_group_pub, 'nodeName', parent_name)
+                    new_group_pub = model.create_child(g, meta["GroupPublisher"])
+                    model.set_attribute(new_group_pub, 'name', group_xub_name)
+                    model.set_attribute(new_group_pub, 'nodeName', parent_name)
                     new_group_pubs.append(new_group_pub)
                 if meta_type == "Subscriber":
-                    new_group_sub = core.create_child(g, self.util.META(active_node)["GroupSubscriber"])
-                    core.set_attribute(new_group_sub, 'name', group_xub_name)
-                    core.set_attribute(new_group_sub, 'nodeName', parent_name)
+                    new_group_sub = model.create_child(g, meta["GroupSubscriber"])
+                    model.set_attribute(new_group_sub, 'name', group_xub_name)
+                    model.set_attribute(new_group_sub, 'nodeName', parent_name)
                     new_group_subs.append(new_group_sub)
 
                 if meta_type == "GroupPublisher" and get_type(parent) == "Include":
-                    new_group_pub = core.create_child(g, self.util.META(active_node)["GroupPublisher"])
-                    core.set_attribute(new_group_pub, 'name', group_xub_name)
-                    core.set_attribute(new_group_pub, 'nodeName', core.get_attribute(node, 'nodeName'))
+                    new_group_pub = model.create_child(g, meta["GroupPublisher"])
+                    model.set_attribute(new_group_pub, 'name', group_xub_name)
+                    model.set_attribute(new_group_pub, 'nodeName', model.get_attribute(node, 'nodeName'))
                     new_group_pubs.append(new_group_pub)
                 if meta_type == "GroupSubscriber" and get_type(parent) == "Include":
-                    new_group_sub = core.create_child(g, self.util.META(active_node)["GroupSubscriber"])
-                    core.set_attribute(new_group_sub, 'name', group_xub_name)
-                    core.set_attribute(new_group_sub, 'nodeName', core.get_attribute(node, 'nodeName'))
+                    new_group_sub = model.create_child(g, meta["GroupSubscriber"])
+                    model.set_attribute(new_group_sub, 'name', group_xub_name)
+                    model.set_attribute(new_group_sub, 'nodeName', model.get_attribute(node, 'nodeName'))
                     new_group_subs.append(new_group_sub)
                     
                 if meta_type == "GroupPublisher" and get_type(parent) == "Group":
-                    new_group_pub = core.create_child(g, self.util.META(active_node)["GroupPublisher"])
-                    core.set_attribute(new_group_pub, 'name', group_xub_name)
-                    core.set_attribute(new_group_pub, 'nodeName', core.get_attribute(node, 'nodeName'))
+                    new_group_pub = model.create_child(g, meta["GroupPublisher"])
+                    model.set_attribute(new_group_pub, 'name', group_xub_name)
+                    model.set_attribute(new_group_pub, 'nodeName', model.get_attribute(node, 'nodeName'))
                     new_group_pubs.append(new_group_pub)
                 if meta_type == "GroupSubscriber" and get_type(parent) == "Group":
-                    new_group_sub = core.create_child(g, self.util.META(active_node)["GroupSubscriber"])
-                    core.set_attribute(new_group_sub, 'name', group_xub_name)
-                    core.set_attribute(new_group_sub, 'nodeName', core.get_attribute(node, 'nodeName'))
+                    new_group_sub = model.create_child(g, meta["GroupSubscriber"])
+                    model.set_attribute(new_group_sub, 'name', group_xub_name)
+                    model.set_attribute(new_group_sub, 'nodeName', model.get_attribute(node, 'nodeName'))
                     new_group_subs.append(new_group_sub)
         
         # Set up empty dictionary for pubs and subs
@@ -276,39 +280,41 @@ class MakeConnections(PluginBase):
         sub_dict = dict()
         
         # Set up publisher and subscriber dictionary before remap
+        rpc_phase(self, "Resolve names")
         for p in chain(publishers, include_group_pubs, new_group_pubs):
-            name = core.get_attribute(p, 'name')
+            name = model.get_attribute(p, 'name')
             
             if name[0] != "/":
-                parent = core.get_parent(p)
+                parent = model.get_parent(p)
                 parent_type = get_type(parent)
                 if parent_type in ["Node", "Test", "Include"]:
-                    ns = core.get_attribute(parent, "ns")
+                    ns = model.get_attribute(parent, "ns")
                     if ns != "":
                         name = ns + "/" + name
             
             pub_dict[p["nodePath"]] = {"node": p, "old_name": name, "remap_name": name}
             
         for s in chain(subscribers, include_group_subs, new_group_subs):
-            name = core.get_attribute(s, 'name')
+            name = model.get_attribute(s, 'name')
             
             if name[0] != "/":
-                parent = core.get_parent(s)
+                parent = model.get_parent(s)
                 parent_type = get_type(parent)
                 if parent_type in ["Node", "Test", "Include"]:
-                    ns = core.get_attribute(parent, "ns")
+                    ns = model.get_attribute(parent, "ns")
                     if ns != "":
                         name = ns + "/" + name
                     
             sub_dict[s["nodePath"]] = {"node": s,"old_name": name, "remap_name": name}
         
         # Apply remaps in correct order
+        rpc_phase(self, "Apply remaps")
         sorted_remaps = sorted(remaps, key=count_slashes)
         for r in reversed(sorted_remaps):
-            r_parent = core.get_parent(r)
+            r_parent = model.get_parent(r)
 
-            r_from = core.get_attribute(r, 'from')
-            r_to = core.get_attribute(r, 'to')
+            r_from = model.get_attribute(r, 'from')
+            r_to = model.get_attribute(r, 'to')
             
             def remap_fcn(node: dict):
                 """Builds a dictionary containing the remap names of all publishers and subscribers
@@ -317,19 +323,19 @@ class MakeConnections(PluginBase):
                     node (dict): Node to traverse
                 """                
                 
-                meta_node = core.get_base_type(node)
-                meta_type = core.get_attribute(meta_node, 'name')
+                meta_type = get_type(node)
                 if meta_type in ["Publisher", "Subscriber", "GroupPublisher", "GroupSubscriber"]:
                     if node["nodePath"] in pub_dict:
                         pub_dict[node["nodePath"]]["remap_name"] = remap_name(r_from, r_to, pub_dict[node["nodePath"]]["remap_name"])
                     if node["nodePath"] in sub_dict:
                         sub_dict[node["nodePath"]]["remap_name"] = remap_name(r_from, r_to, sub_dict[node["nodePath"]]["remap_name"])
                 
-            children = core.load_children(r_parent)
+            children = model.load_children(r_parent)
             for c in children:
-                self.util.traverse(c, remap_fcn)
+                model.traverse(c, remap_fcn)
         
         # Draw connections at launch file and within each group
+        rpc_phase(self, "Draw connections")
         for g in chain(sorted_groups, [launch_file]):
             pubs, subs = get_connectable_ports(g)
             for p in pubs:
@@ -340,10 +346,12 @@ class MakeConnections(PluginBase):
                     s_name = sub_dict[s["nodePath"]]["remap_name"]
                     if s_name[0] == "/":
                         s_name = s_name[1:]
-                    if p_name == s_name and core.get_parent(s) != core.get_parent(p) and get_grandparent(s) == get_grandparent(p):
+                    if p_name == s_name and model.get_parent(s) != model.get_parent(p) and get_grandparent(s) == get_grandparent(p):
                         draw_connection(p, s, p_name)
         
         # Save updates
+        rpc_phase(self, "Save")
+        changes.flush()
         new_commit_hash = self.util.save(core.load_root(self.project.get_root_hash(self.commit_hash)), self.commit_hash)    
         self.project.set_branch_hash(
             branch_name=self.branch_name,
@@ -12,21 +12,18 @@ define([
     'plugin/PluginConfig',
     'text!./metadata.json',
     'plugin/PluginBase',
-    'module'
+    'mic_fall24_ros_continued/ModelSnapshot',
+    'mic_fall24_ros_continued/PythonPlugin'
 ], function (
     Q,
     PluginConfig,
     pluginMetadata,
     PluginBase,
-    module) {
+    ModelSnapshot,
+    PythonPlugin) {
     'use strict';
 
     pluginMetadata = JSON.parse(pluginMetadata);
-    const path = require('path');
-    // Modify these as needed..
-    const START_PORT = 5555;
-    const COMMAND = 'python';
-    const SCRIPT_FILE = path.join(path.dirname(module.uri), 'run_plugin.py');
 
     /**
      * Initializes a new instance of PythonBindings.
@@ -62,80 +59,13 @@ define([
      * @param {function(null|Error|string, plugin.PluginResult)} callback - the result callback
      */
     UpdateLibrary.prototype.main = function (callback) {
-        const CoreZMQ = require('webgme-bindings').CoreZMQ;
-        const cp = require('child_process');
-        const logger = this.logger;
-
-        // due to the limited options on the script return values, we need this hack
-        this.result.setSuccess(null);
-
-        const callScript = (program, scriptPath, port) => {
-            let deferred = Q.defer(),
-                options = {},
-                args = [
-                    scriptPath,
-                    port,
-                    `"${this.commitHash}"`,
-                    `"${this.branchName}"`,
-                    `"${this.core.getPath(this.activeNode)}"`,
-                    `"${this.activeSelection.map(node => this.core.getPath(node)).join(',')}"`,
-                    `"${this.namespace}"`,
-                ];
-
-            const childProc = cp.spawn(program, args, options);
-
-            childProc.stdout.on('data', data => {
-                logger.info(data.toString());
-                // logger.debug(data.toString());
-            });
-
-            childProc.stderr.on('data', data => {
-                logger.error(data.toString());
-            });
-
-            childProc.on('close', (code) => {
-                if (code > 0) {
-                    // This means an execution error or crash, so we are failing the plugin
-                    deferred.reject(new Error(`${program} ${args.join(' ')} exited with code ${code}.`));
-                    this.result.setSuccess(false);
-                } else {
-                    if(this.result.getSuccess() === null) {
-                        // The result have not been set inside the python, but it suceeded, so we go with the true value
-                        this.result.setSuccess(true);
-                    }
-                    deferred.resolve();
-                }
-            });
-
-            childProc.on('error', (err) => {
-                // This is a hard execution error, like the child process cannot be instantiated...
-                logger.error(err);
-                this.result.setSuccess(false);
-                deferred.reject(err);
-            });
-
-            return deferred.promise;
-        };
-
-        const corezmq = new CoreZMQ(this.project, this.core, this.logger, {port: START_PORT, plugin: this});
-        corezmq.startServer()
-            .then((port) => {
-                logger.info(`zmq-server listening at port ${port}`);
-                return callScript(COMMAND, SCRIPT_FILE, port);
-            })
-            .then(() => {
-                return corezmq.stopServer();
-            })
+        // Only the libraries are read, the launch files next to them are left out of the dump
+        // Dumps the model, starts the CoreZMQ server and runs run_plugin.py (or the python worker), see PythonPlugin
+        PythonPlugin.runPythonPlugin(this, this.activeNode, ModelSnapshot.LIBRARY_NAMES)
             .then(() => {
                 callback(null, this.result);
-            })
-            .catch((err) => {
-                this.logger.error(err.stack);
-                corezmq.stopServer()
-                    .finally(() => {
-                        // Result success is false at invocation.
-                        callback(err, this.result);
-                    });
+            }, (err) => {
+                callback(err, this.result);
             });
     };
 
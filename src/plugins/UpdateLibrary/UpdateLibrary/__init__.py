@@ -3,10 +3,15 @@ This is where the implementation of the plugin code goes.
 The UpdateLibrary-class is imported from both run_plugin.py and run_debug.py
 """
 import sys
+import os
 import logging
 from webgme_bindings import PluginBase
 import json
 
+# Shared python modules live in src/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from launch_common import LIBRARY_NAMES, ModelSnapshot, MutationBuffer, find_libraries, include_key, node_key, profiled, store_index
+
 # Setup a logger
 logger = logging.getLogger('UpdateLibrary')
 logger.setLevel(logging.INFO)
@@ -18,25 +23,33 @@ logger.addHandler(handler)
 
 
 class UpdateLibrary(PluginBase):
+    # Dump of the active node's subtree written by UpdateLibrary.js (set in run_plugin.py)
+    snapshot_file = None
+
+    # Meta sheet registry of the root, read once per run
+    meta_sheets = None
+
     # helper function to lookup sheet id from the sheet's name
     def MetaSheetIdFromName(self, sheet):
         root = self.root_node
         core = self.core
-        sheet_info = core.get_registry(root,'MetaSheets')
-        for info in sheet_info:
+        if self.meta_sheets is None:
+            self.meta_sheets = core.get_registry(root,'MetaSheets')
+        for info in self.meta_sheets:
             if(info['title'] == sheet):
                 return info['SetID']
         return None
     
     # helper that takes care of adding node to meta sheet(s) properly
-    def addNodeToMeta(self, sheet, node):
-        core = self.core
+    def addNodeToMeta(self, sheet, node, core=None):
+        core = core or self.core
         root = self.root_node
         sheet_id = self.MetaSheetIdFromName(sheet)
         core.add_member(root, sheet_id, node)
         # this is a global set collecting all meta nodes
         core.add_member(root, "MetaAspectSet", node)
 
+    @profiled
     def main(self):
         core = self.core
         active_node = self.active_node
@@ -45,82 +58,93 @@ class UpdateLibrary(PluginBase):
         config = self.get_current_config()
         library_config = self.get_file(config['file'])
         
-        # Find libraries for node, test, and include and load current elements
-        all_children = core.load_sub_tree(active_node)
+        # Find libraries for node, test, and include and load current elements, the rest of the project is not loaded
+        model = ModelSnapshot.load(core, active_node, self.snapshot_file, names=LIBRARY_NAMES)
+        libraries = find_libraries(model, active_node)
         
-        node_lib = next((child for child in all_children if core.get_attribute(child, "name") == "NodeLibrary"), None)
+        node_lib = libraries.get("NodeLibrary")
         if not node_lib:
             logger.error("NodeLibrary not found.")
             return
         
-        test_lib = next((child for child in all_children if core.get_attribute(child, "name") == "TestLibrary"), None)
+        test_lib = libraries.get("TestLibrary")
         if not test_lib:
             logger.error("TestLibrary not found.")
             return
         
-        include_lib = next((child for child in all_children if core.get_attribute(child, "name") == "IncludeLibrary"), None)
+        include_lib = libraries.get("IncludeLibrary")
         if not include_lib:
             logger.error("IncludeLibrary not found.")
             return
         
-        node_lib_children = core.load_children(node_lib)
+        node_lib_children = model.load_children(node_lib)
+        
+        test_lib_children = model.load_children(test_lib)
         
-        test_lib_children = core.load_children(test_lib)
+        include_lib_children = model.load_children(include_lib)
         
-        include_lib_children = core.load_children(include_lib)
+        # Changes are buffered and sent to the core in one go before saving
+        changes = MutationBuffer(core, reader=model)
         
         # Delete current library contents
         for node in node_lib_children:
-            core.delete_node(node)
+            changes.delete_node(node)
             
         for test in test_lib_children:
-            core.delete_node(test)
+            changes.delete_node(test)
             
         for include in include_lib_children:
-            core.delete_node(include)
+            changes.delete_node(include)
             
         # Set up config as json
         library_config_json = json.loads(library_config)
         
+        # (key, node) of the new nodes of each library, stored as the index of the library read by ImportLaunch
+        node_index = []
+        test_index = []
+        include_index = []
+        
         # Parse json to build libraries
         for package in library_config_json:
             for node in package["nodes"]:
                 # Creating a new node
-                new_node = core.create_child(node_lib, self.META.get("Node", None))
-                core.set_attribute(new_node, "name", node["node"])
-                core.set_attribute(new_node, "type", node["node"])
-                core.set_attribute(new_node, "pkg", package["package"])
-                self.addNodeToMeta("Node Library", new_node)
+                new_node = changes.create_child(node_lib, self.META.get("Node", None))
+                changes.set_attribute(new_node, "name", node["node"])
+                changes.set_attribute(new_node, "type", node["node"])
+                changes.set_attribute(new_node, "pkg", package["package"])
+                self.addNodeToMeta("Node Library", new_node, changes)
+                node_index.append((node_key({"pkg": package["package"], "type": node["node"]}.get), new_node))
                 
                 # Creating a new test
-                new_test = core.create_child(test_lib, self.META.get("Test", None))
-                core.set_attribute(new_test, "testName", node["node"])
-                core.set_attribute(new_test, "name", "test_" + node["node"])
-                core.set_attribute(new_test, "type", node["node"])
-                core.set_attribute(new_test, "pkg", package["package"])
-                self.addNodeToMeta("Test Library", new_test)
+                new_test = changes.create_child(test_lib, self.META.get("Test", None))
+                changes.set_attribute(new_test, "testName", node["node"])
+                changes.set_attribute(new_test, "name", "test_" + node["node"])
+                changes.set_attribute(new_test, "type", node["node"])
+                changes.set_attribute(new_test, "pkg", package["package"])
+                self.addNodeToMeta("Test Library", new_test, changes)
+                test_index.append((node_key({"pkg": package["package"], "type": node["node"]}.get), new_test))
 
                 # Adding publishers
                 if node["publishers"] is not None:
                     for pub in node["publishers"]:
-                        node_pub = core.create_child(new_node, self.META.get("Publisher", None))
-                        core.set_attribute(node_pub, "name", pub)
+                        node_pub = changes.create_child(new_node, self.META.get("Publisher", None))
+                        changes.set_attribute(node_pub, "name", pub)
                         
-                        test_pub = core.create_child(new_test, self.META.get("Publisher", None))
-                        core.set_attribute(test_pub, "name", pub)
+                        test_pub = changes.create_child(new_test, self.META.get("Publisher", None))
+                        changes.set_attribute(test_pub, "name", pub)
                     
                 # Adding subscribers
                 if node["subscribers"] is not None:
                     for sub in node["subscribers"]:
-                        node_sub = core.create_child(new_node, self.META.get("Subscriber", None))
-                        core.set_attribute(node_sub, "name", sub)
+                        node_sub = changes.create_child(new_node, self.META.get("Subscriber", None))
+                        changes.set_attribute(node_sub, "name", sub)
                         
-                        test_sub = core.create_child(new_test, self.META.get("Subscriber", None))
-                        core.set_attribute(test_sub, "name", sub)
+                        test_sub = changes.create_child(new_test, self.META.get("Subscriber", None))
+                        changes.set_attribute(test_sub, "name", sub)
             
             for launch_file in package["launch_files"]:
-                new_include = core.create_child(include_lib, self.META.get("Include", None))
-                core.set_attribute(new_include, "name", f"$(find {package["package"]})/" + launch_file["relative_path"])
+                new_include = changes.create_child(include_lib, self.META.get("Include", None))
+                changes.set_attribute(new_include, "name", f"$(find {package["package"]})/" + launch_file["relative_path"])
                 
                 if launch_file["nodes"] is not None:
                     for node in launch_file["nodes"]:
@@ -128,19 +152,25 @@ class UpdateLibrary(PluginBase):
                         
                         if node["publishers"] is not None:
                             for p in node["publishers"]:
-                                new_pub = core.create_child(new_include, self.META.get("GroupPublisher", None))
-                                core.set_attribute(new_pub, "name", p)
-                                core.set_attribute(new_pub, "nodeName", node_name)
+                                new_pub = changes.create_child(new_include, self.META.get("GroupPublisher", None))
+                                changes.set_attribute(new_pub, "name", p)
+                                changes.set_attribute(new_pub, "nodeName", node_name)
                             
                         
                         if node["subscribers"] is not None:
                             for s in node["subscribers"]:
-                                new_sub = core.create_child(new_include, self.META.get("GroupSubscriber", None))
-                                core.set_attribute(new_sub, "name", s)
-                                core.set_attribute(new_sub, "nodeName", node_name)
+                                new_sub = changes.create_child(new_include, self.META.get("GroupSubscriber", None))
+                                changes.set_attribute(new_sub, "name", s)
+                                changes.set_attribute(new_sub, "nodeName", node_name)
                 
-                self.addNodeToMeta("Include Library", new_include)
+                self.addNodeToMeta("Include Library", new_include, changes)
+                include_index.append((include_key(lambda name: changes.get_attribute(new_include, name)), new_include))
         
         # Save updates
+        changes.flush()
+        # The new nodes have their paths now
+        store_index(core, node_lib, node_index)
+        store_index(core, test_lib, test_index)
+        store_index(core, include_lib, include_index)
         self.util.save(self.root_node, self.commit_hash, self.branch_name, 'Update library from external source')    
         
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Runs the python plugins on an in-memory project made from the ROSLaunch seed (see launch_common/offline.py).
+"""
+import atexit
+import importlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+PLUGINS_DIR = os.path.join(ROOT_DIR, 'src', 'plugins')
+SEED = os.path.join(ROOT_DIR, 'src', 'seeds', 'ROSLaunch', 'ROSLaunch.webgmex')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src', 'common'))
+from launch_common.offline import OfflineWebGME
+
+# The caches of the plugins are kept out of the temp directory of the user
+for variable in ("LAUNCH_EXPORT_CACHE", "LAUNCH_PARSE_CACHE"):
+    if variable not in os.environ:
+        os.environ[variable] = tempfile.mkdtemp(prefix="launch_test_cache")
+        atexit.register(shutil.rmtree, os.environ[variable], True)
+
+LIBRARY = [
+    {"package": "rospy_tutorials",
+     "nodes": [
+         {"node": "talker", "publishers": ["chatter"], "subscribers": None},
+         {"node": "listener", "publishers": None, "subscribers": ["chatter"]}
+     ],
+     "launch_files": []}
+]
+
+
+def load_plugin(name: str):
+    """Imports the plugin class of the given plugin, with its logging turned down"""
+    plugin_dir = os.path.join(PLUGINS_DIR, name)
+    if plugin_dir not in sys.path:
+        sys.path.append(plugin_dir)
+    module = importlib.import_module(name)
+    logging.getLogger(name).setLevel(logging.WARNING)
+    return getattr(module, name)
+
+
+def plugin_defaults(name: str) -> dict:
+    """Returns the default config of the given plugin"""
+    with open(os.path.join(PLUGINS_DIR, name, 'metadata.json'), 'r', encoding='utf-8') as f:
+        return {entry['name']: entry['value'] for entry in json.load(f)['configStructure']}
+
+
+class OfflineProject(object):
+    """A project made from the ROSLaunch seed, with the plugins run on its master branch"""
+
+    def __init__(self, library: list = None):
+        """
+        Args:
+            library (list, optional): Library config to run UpdateLibrary with first. Defaults to LIBRARY.
+        """
+        logger = logging.getLogger('offline')
+        logger.setLevel(logging.WARNING)
+        self.webgme = OfflineWebGME.open(SEED, logger)
+        self.core = self.webgme.core
+        self.run('UpdateLibrary', file=self.webgme.put_file('library.json', json.dumps(library or LIBRARY)))
+
+    @property
+    def commit_hash(self) -> str:
+        return self.webgme.project.get_branch_hash('master')
+
+    def root(self) -> dict:
+        return self.core.load_root(self.webgme.project.get_root_hash('master'))
+
+    def load(self, path: str) -> dict:
+        return self.core.load_by_path(self.root(), path)
+
+    def save(self, root: dict):
+        """Commits the changes made through the core to root on master"""
+        self.webgme.util.save(root, self.commit_hash, 'master')
+
+    def run(self, name: str, active_path: str = '', **config):
+        """Runs a plugin on the head of master with its default config, updated with config"""
+        self.webgme.config = dict(plugin_defaults(name), **config)
+        self.webgme.results = {}
+        self.webgme.success = self.webgme.error = None
+        # Kept so the state the plugin left its core in can be checked
+        self.plugin = load_plugin(name)(self.webgme, self.commit_hash, 'master', active_path, [], '')
+        self.plugin.main()
+
+    def import_launch(self, text, active_path: str = '', **config) -> str:
+        """Imports a launch file (text) or a zip of them (bytes) and returns the path of a new LaunchFile"""
+        before = set(self.core.get_children_paths(self.root()))
+        self.run('ImportLaunch', active_path, file=self.webgme.put_file('test.launch', text), **config)
+        created = set(self.core.get_children_paths(self.root())) - before
+        return created.pop() if created else None
+
+    def export_launch(self, path: str, **config) -> str:
+        """Returns the launch file ExportLaunch writes for the LaunchFile, by default without the export cache"""
+        self.run('ExportLaunch', path, **dict({'exportCache': False}, **config))
+        launch_files = [data for name, data in self.webgme.results.items() if name.endswith('.launch')]
+        return launch_files[0].decode('utf-8')
+
+    def subtree_paths(self, path: str) -> set:
+        return {node['nodePath'] for node in self.core.load_sub_tree(self.load(path))}
@@ -0,0 +1,135 @@
+import unittest
+
+from offline_project import OfflineProject
+
+LAUNCH = """<launch>
+  <arg name="rate" default="10"/>
+  <group ns="robot">
+    <group ns="inner">
+      <node pkg="rospy_tutorials" type="talker" name="talker">
+        <param name="deep" value="1"/>
+      </node>
+      <node pkg="rospy_tutorials" type="listener" name="listener"/>
+    </group>
+    <node pkg="x" type="y" name="other"/>
+  </group>
+</launch>
+"""
+
+# Every tag, with attributes at and away from their defaults
+ALL_TAGS = """<launch>
+  <arg name="a" value="1" doc="d &amp; &lt;e&gt;" if="x"/>
+  <arg name="b" default="2" unless="y"/>
+  <machine name="m1" address="h" env-loader="e" default="true" user="u" password="p" timeout="10"/>
+  <machine name="m2" address="h2" timeout="20"/>
+  <machine name="m3" address="h3"/>
+  <env name="E" value="v"/>
+  <param name="p1" value="1" type="int"/>
+  <param name="p2" command="cmd"/>
+  <param name="p3" textfile="t"/>
+  <param name="p4" binfile="b"/>
+  <rosparam command="load" file="f" param="pp" ns="n" subst_value="false"/>
+  <rosparam subst_value="true">a: 1</rosparam>
+  <group ns="g" clear_params="true" if="c">
+    <node name="n1" pkg="p" type="t" args="a &quot;b&quot;" respawn="true" respawn_delay="5" clear_params="true" cwd="node" launch-prefix="gdb" ns="ns" output="screen" required="false" machine="m1">
+      <remap from="a" to="b" unless="u"/>
+    </node>
+    <node name="n2" pkg="p" type="t" respawn="true" respawn_delay="0" required="true"/>
+    <node name="n4" pkg="p" type="t"/>
+    <node name="n3" pkg="p" type="t" respawn="false" respawn_delay="3" clear_params="false"/>
+  </group>
+  <group ns="h"/>
+  <include file="$(find p)/x.launch" clear_params="true" ns="i" pass_all_args="true" if="c"><arg name="z" value="1"/></include>
+  <include file="y.launch" pass_all_args="false"/>
+  <test test-name="t1" pkg="p" type="t" name="tn" args="a" clear_params="true" cwd="node" launch-prefix="x" ns="n" retry="2" time-limit="60" if="c"/>
+  <test test-name="t3" pkg="p" type="t"/>
+  <test test-name="t2" pkg="p" type="t" time-limit="120" retry="0"/>
+</launch>
+"""
+
+# What the per-tag chain of ExportLaunch that TAGS replaced wrote: attributes left at their meta default (m3, n4, t3)
+# are left out, a false required or subst_value is written
+ALL_TAGS_EXPORT = """<launch>
+  <arg name="a" value="1" doc="d &amp; &lt;e>" if="x"/>
+  <arg name="b" default="2" unless="y"/>
+  <rosparam command="load" file="f" param="pp" ns="n" subst_value="false">
+  </rosparam>
+  <rosparam >
+      a: 1
+  </rosparam>
+  <param name="p1" value="1" type="int"/>
+  <param name="p2" command="cmd"/>
+  <param name="p3" textfile="t"/>
+  <param name="p4" binfile="b"/>
+  <env name="E" value="v"/>
+  <include file="$(find p)/x.launch" clear_params="true" ns="i" pass_all_args="true" if="c">
+      <arg name="z" value="1"/>
+  </include>
+  <include file="y.launch">
+  </include>
+  <group ns="g" clear_params="true" if="c">
+      <node name="n1" pkg="p" type="t" args="a &quot;b&quot;" respawn="true" respawn_delay="5" clear_params="true" cwd="node" launch-prefix="gdb" ns="ns" output="screen" required="false" machine="m1">
+          <remap from="a" to="b" unless="u"/>
+      </node>
+      <node name="n2" pkg="p" type="t" respawn="true" respawn_delay="0">
+      </node>
+      <node name="n4" pkg="p" type="t">
+      </node>
+      <node name="n3" pkg="p" type="t">
+      </node>
+  </group>
+  <group ns="h">
+  </group>
+  <machine name="m1" address="h" env-loader="e" default="true" user="u" password="p" timeout="10">
+  </machine>
+  <machine name="m2" address="h2" timeout="20">
+  </machine>
+  <machine name="m3" address="h3">
+  </machine>
+  <test pkg="p" test-name="t1" type="t" name="tn" args="a" clear_params="true" cwd="node" launch-prefix="x" ns="n" retry="2" time-limit="60" if="c">
+  </test>
+  <test pkg="p" test-name="t3" type="t">
+  </test>
+  <test pkg="p" test-name="t2" type="t" retry="0" time-limit="120">
+  </test>
+</launch>
+"""
+
+
+class ExportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project = OfflineProject()
+        self.launch_file = self.project.import_launch(LAUNCH)
+
+    def test_changed_subtree_is_rendered_again(self):
+        first = self.project.export_launch(self.launch_file, exportCache=True)
+        self.assertEqual(first, self.project.export_launch(self.launch_file))
+        self.assertIn('value="1"', first)
+
+        core = self.project.core
+        root = self.project.root()
+        param = next(node for node in core.load_sub_tree(core.load_by_path(root, self.launch_file))
+                     if core.get_attribute(node, 'name') == 'deep')
+        core.set_attribute(param, 'value', '2')
+        self.project.save(root)
+
+        with self.assertLogs('offline', 'INFO') as logs:
+            cached = self.project.export_launch(self.launch_file, exportCache=True)
+        # Only the fragments on the way to the changed param are rendered again
+        reused, = [line for line in logs.output if "Reused" in line]
+        self.assertNotIn("Reused 0 of", reused)
+        self.assertEqual(cached, self.project.export_launch(self.launch_file))
+        self.assertNotEqual(cached, first)
+        self.assertIn('value="2"', cached)
+
+
+class TagsTest(unittest.TestCase):
+
+    def test_every_tag_is_written_like_before(self):
+        project = OfflineProject()
+        self.assertEqual(project.export_launch(project.import_launch(ALL_TAGS)), ALL_TAGS_EXPORT)
+
+
+if __name__ == '__main__':
+    unittest.main()
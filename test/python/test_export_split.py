@@ -0,0 +1,50 @@
+import io
+import json
+import unittest
+import zipfile
+
+from offline_project import OfflineProject
+
+LAUNCH = """<launch>
+  <arg name="host" default="robot"/>
+  <machine name="robot" address="10.0.0.2"/>
+  <machine name="base" address="10.0.0.1"/>
+  <param name="rate" value="10"/>
+  <node pkg="rospy_tutorials" type="talker" name="talker" machine="$(arg host)"/>
+  <node pkg="rospy_tutorials" type="listener" name="listener" machine="base"/>
+  <node pkg="x" type="y" name="local"/>
+</launch>
+"""
+
+
+class SplitByMachineTest(unittest.TestCase):
+
+    def export(self, **config) -> dict:
+        project = OfflineProject()
+        path = project.import_launch(LAUNCH)
+        project.run('ExportLaunch', path, splitByMachine=True, **config)
+        (name, data), = project.webgme.results.items()
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {file_name: archive.read(file_name).decode('utf-8') for file_name in archive.namelist()}
+
+    def test_files_per_machine(self):
+        files = self.export(launchArgs="host:=base")
+        manifest = json.loads(files["manifest.json"])
+        self.assertEqual([machine["machine"] for machine in manifest["machines"]], ["base"])
+        self.assertNotIn("params", manifest)
+        base = files[manifest["machines"][0]["file"]]
+        self.assertIn('name="talker"', base)
+        self.assertIn('name="listener"', base)
+        self.assertNotIn('name="local"', base)
+
+    def test_params_are_added(self):
+        files = self.export(dumpParams=True)
+        manifest = json.loads(files["manifest.json"])
+        params = json.loads(files[manifest["params"]])
+        self.assertEqual(params["params"], {"/rate": 10})
+        machines = {node["name"]: node["machine"] for node in params["nodes"]}
+        self.assertEqual(machines, {"/talker": "robot", "/listener": "base", "/local": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import offline_project  # noqa: F401, puts src/common on sys.path
+from launch_common import FragmentCache
+from launch_common.fragments import private_directory
+
+
+@unittest.skipUnless(hasattr(os, "getuid"), "needs uids")
+class PrivateDirectoryTest(unittest.TestCase):
+
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.path = os.path.join(temp.name, "cache")
+
+    def directory(self):
+        with mock.patch.dict(os.environ, {"TEST_CACHE": self.path}):
+            return private_directory("TEST_CACHE", "test_cache")
+
+    def test_created_for_the_user_only(self):
+        self.assertEqual(self.directory(), self.path)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o700)
+
+    def test_writable_by_others_is_not_used(self):
+        os.makedirs(self.path, mode=0o777)
+        os.chmod(self.path, 0o777)
+        with self.assertLogs('launch_common', 'WARNING'):
+            self.assertIsNone(self.directory())
+
+    def test_owned_by_another_user_is_not_used(self):
+        os.makedirs(self.path, mode=0o700)
+        with mock.patch.object(os, "getuid", return_value=os.getuid() + 1):
+            with self.assertLogs('launch_common', 'WARNING'):
+                self.assertIsNone(self.directory())
+
+    def test_default_is_per_user(self):
+        with mock.patch.dict(os.environ, {"TEST_CACHE": ""}), mock.patch.object(tempfile, "gettempdir",
+                                                                                 return_value=self.path):
+            self.assertEqual(private_directory("TEST_CACHE", "test_cache"),
+                             os.path.join(self.path, f"test_cache-{os.getuid()}"))
+
+    def test_no_fragment_cache_without_a_directory(self):
+        os.makedirs(self.path, mode=0o777)
+        os.chmod(self.path, 0o777)
+        with mock.patch.dict(os.environ, {"LAUNCH_EXPORT_CACHE": self.path}), self.assertLogs('launch_common'):
+            self.assertIsNone(FragmentCache.load("launch"))
+
+
+if __name__ == '__main__':
+    unittest.main()
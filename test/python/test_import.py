@@ -0,0 +1,103 @@
+import io
+import unittest
+import zipfile
+
+from offline_project import OfflineProject
+
+LAUNCH = """<launch>
+  <node pkg="rospy_tutorials" type="talker" name="talker"/>
+  <node pkg="rospy_tutorials" type="listener" name="listener"/>
+</launch>
+"""
+
+
+def archive(files: dict) -> bytes:
+    """Returns a zip holding the given files (path -> content)"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for path, content in files.items():
+            zip_file.writestr(path, content)
+    return buffer.getvalue()
+
+
+class ImportLaunchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project = OfflineProject()
+
+    def test_malformed_file_fails_the_run(self):
+        commit_hash = self.project.commit_hash
+        before = set(self.project.core.get_children_paths(self.project.root()))
+        self.assertIsNone(self.project.import_launch('<launch><node pkg="p" type="t"></launch>'))
+
+        self.assertIs(self.project.webgme.success, False)
+        self.assertIn("mismatched tag", self.project.webgme.error)
+        self.assertEqual(self.project.commit_hash, commit_hash)
+        # The LaunchFile created before the error is gone from the core as well
+        self.assertEqual(set(self.project.core.get_children_paths(self.project.plugin.root_node)), before)
+
+    def test_malformed_file_in_an_archive_fails_the_run(self):
+        commit_hash = self.project.commit_hash
+        before = set(self.project.core.get_children_paths(self.project.root()))
+        self.project.import_launch(archive({"a/good.launch": LAUNCH, "b/bad.launch": "<launch><node></launch>"}))
+
+        self.assertIs(self.project.webgme.success, False)
+        self.assertIn("b/bad.launch", self.project.webgme.error)
+        self.assertEqual(self.project.commit_hash, commit_hash)
+        self.assertEqual(set(self.project.core.get_children_paths(self.project.plugin.root_node)), before)
+
+    def test_archive_is_imported_in_one_commit(self):
+        commits = len(self.project.webgme.commits)
+        before = set(self.project.core.get_children_paths(self.project.root()))
+        self.project.import_launch(archive({
+            "robot/launch/robot.launch": LAUNCH,
+            # Same file name in another package
+            "other/launch/robot.launch": "<launch><arg name=\"x\" default=\"1\"/></launch>",
+            "robot/README.md": "not a launch file",
+            "__MACOSX/robot/launch/._robot.launch": "resource fork"
+        }))
+
+        self.assertIsNot(self.project.webgme.success, False)
+        self.assertEqual(len(self.project.webgme.commits), commits + 1)
+        core = self.project.core
+        created = [core.load_by_path(self.project.root(), path)
+                   for path in set(core.get_children_paths(self.project.root())) - before]
+        self.assertEqual([core.get_attribute(node, 'name') for node in created], ['robot', 'robot'])
+        exports = sorted(self.project.export_launch(node['nodePath']) for node in created)
+        self.assertIn('<arg name="x" default="1"/>', exports[0])
+        self.assertIn('<node name="talker"', exports[1])
+
+    def test_archive_without_launch_files_fails_the_run(self):
+        commit_hash = self.project.commit_hash
+        self.project.import_launch(archive({"README.md": "nothing to import"}))
+        self.assertIs(self.project.webgme.success, False)
+        self.assertEqual(self.project.webgme.error, "No launch files found in the archive.")
+        self.assertEqual(self.project.commit_hash, commit_hash)
+
+    def test_library_nodes_are_instantiated_with_their_overrides_only(self):
+        core = self.project.core
+        launch_file = self.project.load(self.project.import_launch("""<launch>
+  <node pkg="rospy_tutorials" type="talker" name="talker" output="screen"/>
+  <node pkg="rospy_tutorials" type="listener" name="renamed"/>
+  <node pkg="other" type="unknown" name="new"/>
+</launch>
+"""))
+        nodes = {core.get_attribute(node, 'name'): node for node in core.load_children(launch_file)}
+
+        for name, library_name, overrides in (("talker", "talker", {"output"}), ("renamed", "listener", {"name"})):
+            base = core.get_base(nodes[name])
+            self.assertEqual(core.get_attribute(core.get_parent(base), 'name'), 'NodeLibrary')
+            self.assertEqual(core.get_attribute(base, 'name'), library_name)
+            self.assertEqual(set(core.get_own_attribute_names(nodes[name])), overrides)
+            # The publishers and subscribers come from the library node
+            self.assertTrue(core.load_children(base))
+            self.assertEqual(len(core.load_children(nodes[name])), len(core.load_children(base)))
+
+        # A node that is not in the library is a plain Node with every attribute of the tag
+        new = nodes["new"]
+        self.assertEqual(core.get_attribute(core.get_base(new), 'name'), 'Node')
+        self.assertEqual(set(core.get_own_attribute_names(new)), {"name", "pkg", "type"})
+
+
+if __name__ == '__main__':
+    unittest.main()
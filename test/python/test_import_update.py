@@ -0,0 +1,81 @@
+import unittest
+
+from offline_project import OfflineProject
+
+LAUNCH = """<launch>
+  <arg name="rate" default="10"/>
+  <node pkg="rospy_tutorials" type="talker" name="talker" output="screen">
+    <remap from="chatter" to="chat"/>
+  </node>
+  <node pkg="rospy_tutorials" type="listener" name="listener"/>
+  <group ns="robot">
+    <node pkg="x" type="y" name="other"/>
+  </group>
+</launch>
+"""
+
+
+class UpdateExistingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project = OfflineProject()
+        self.launch_file = self.project.import_launch(LAUNCH)
+        self.project.run('MakeConnections', self.launch_file)
+
+    def update(self, text: str):
+        created = self.project.import_launch(text, self.launch_file, updateExisting=True)
+        self.assertIsNone(created)
+
+    def child(self, parent_path: str, name: str) -> dict:
+        core = self.project.core
+        for child in core.load_children(self.project.load(parent_path)):
+            if core.get_attribute(child, 'name') == name:
+                return child
+        return None
+
+    def test_identical_import_is_a_no_op(self):
+        commit_hash = self.project.commit_hash
+        self.update(LAUNCH)
+        self.assertEqual(self.project.commit_hash, commit_hash)
+
+    def test_without_the_option_the_launch_file_is_left_alone(self):
+        commit_hash = self.project.commit_hash
+        self.project.import_launch(LAUNCH.replace('to="chat"', 'to="chat2"'), self.launch_file)
+        self.assertEqual(self.project.commit_hash, commit_hash)
+
+    def test_removed_node_is_deleted(self):
+        listener = self.child(self.launch_file, 'listener')
+        self.assertIsNotNone(listener)
+        paths = self.project.subtree_paths(self.launch_file)
+        self.update(LAUNCH.replace('  <node pkg="rospy_tutorials" type="listener" name="listener"/>\n', ''))
+
+        self.assertIsNone(self.child(self.launch_file, 'listener'))
+        remaining = self.project.subtree_paths(self.launch_file)
+        self.assertFalse(any(path.startswith(listener['nodePath']) for path in remaining))
+        # The topic from the talker to the listener went with it, everything else is kept
+        core = self.project.core
+        topics = [node for node in core.load_sub_tree(self.project.load(self.launch_file))
+                  if core.get_attribute(core.get_meta_type(node), 'name') == 'Topic']
+        self.assertEqual(topics, [])
+        self.assertTrue(remaining < paths)
+
+    def test_changed_remap_is_updated_in_place(self):
+        talker = self.child(self.launch_file, 'talker')
+        remap = self.child(talker['nodePath'], 'Remap')
+        self.update(LAUNCH.replace('to="chat"', 'to="chat2"'))
+
+        updated = self.project.load(remap['nodePath'])
+        self.assertIsNotNone(updated)
+        self.assertEqual(self.project.core.get_attribute(updated, 'to'), 'chat2')
+
+    def test_update_exports_like_a_fresh_import(self):
+        changed = (LAUNCH.replace('to="chat"', 'to="chat2"')
+                   .replace('name="listener"/>', 'name="listener" respawn="true"/>')
+                   .replace('<node pkg="x" type="y" name="other"/>', '<node pkg="x" type="z" name="new"/>'))
+        self.update(changed)
+        fresh = self.project.import_launch(changed)
+        self.assertEqual(self.project.export_launch(self.launch_file), self.project.export_launch(fresh))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'common'))
+from launch_common import PackageTree
+
+PACKAGE_XML = "<package><name>{}</name></package>"
+
+
+class PackageTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = os.path.join(self.directory.name, "ws", "src")
+        for package in ("talker", "listener"):
+            os.makedirs(os.path.join(self.root, package, "launch"))
+            with open(os.path.join(self.root, package, "package.xml"), "w") as f:
+                f.write(PACKAGE_XML.format(package))
+
+    def test_from_directory_requires_an_allowed_root(self):
+        with self.assertRaises(ValueError):
+            PackageTree.from_directory(self.root, [])
+        with self.assertRaises(ValueError):
+            PackageTree.from_directory(self.root, [os.path.join(self.directory.name, "other")])
+        tree = PackageTree.from_directory(self.root, [self.directory.name])
+        self.assertEqual(sorted(tree.packages), ["listener", "talker"])
+
+    def test_resolve_stays_in_the_package_and_tree(self):
+        tree = PackageTree.from_directory(self.root, [self.directory.name])
+        talker = tree.packages["talker"]
+        self.assertEqual(tree.resolve("$(find talker)/launch/a.launch"), os.path.join(talker, "launch", "a.launch"))
+        self.assertIsNone(tree.resolve("$(find talker)/../../../../etc/passwd"))
+        self.assertIsNone(tree.resolve("$(find talker)/../listener/launch/a.launch"))
+        self.assertEqual(tree.resolve("$(dirname)/../listener/b.launch", talker),
+                         os.path.join(tree.packages["listener"], "b.launch"))
+        self.assertIsNone(tree.resolve("../../../../etc/passwd", talker))
+
+    def test_resolve_in_zip(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("src/talker/package.xml", PACKAGE_XML.format("talker"))
+        tree = PackageTree.from_zip(buffer.getvalue())
+        self.assertEqual(tree.resolve("$(find talker)/launch/a.launch"), "src/talker/launch/a.launch")
+        self.assertIsNone(tree.resolve("$(find talker)/../../../etc/passwd"))
+        self.assertIsNone(tree.resolve("../../../x.launch", "src/talker"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import logging
+import unittest
+
+from offline_project import SEED
+from launch_common import MutationBuffer
+from launch_common.mutations import PROVISIONAL_MARK
+from launch_common.offline import OfflineWebGME
+
+
+class MutationBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        webgme = OfflineWebGME.open(SEED, logging.getLogger('offline'))
+        self.core = core = webgme.core
+        self.root = core.load_root(webgme.project.get_root_hash('master'))
+        self.fco = next(child for child in core.load_children(self.root) if core.get_attribute(child, 'name') == 'FCO')
+        # A base with a child, its instances inherit the child
+        self.proto = core.create_child(self.root, self.fco)
+        core.set_attribute(self.proto, 'name', 'proto')
+        self.proto_child = core.create_child(self.proto, self.fco)
+        core.set_attribute(self.proto_child, 'name', 'port')
+        self.changes = MutationBuffer(core)
+
+    def names(self, node: dict) -> list:
+        return sorted(self.core.get_attribute(child, 'name') for child in self.core.load_children(node))
+
+    def test_changes_are_sent_on_flush(self):
+        node = self.changes.create_child(self.root, self.fco)
+        self.changes.set_attribute(node, 'name', 'new')
+        self.assertIn(PROVISIONAL_MARK, node['nodePath'])
+        self.assertNotIn('new', self.names(self.root))
+        self.assertEqual(self.changes.get_attribute(node, 'name'), 'new')
+
+        self.changes.flush()
+        self.assertNotIn(PROVISIONAL_MARK, node['nodePath'])
+        self.assertEqual(self.core.get_attribute(node, 'name'), 'new')
+        self.assertEqual(len(self.changes), 0)
+
+    def test_provisional_nodes_as_parents_pointers_and_members(self):
+        parent = self.changes.create_child(self.root, self.fco)
+        child = self.changes.create_child(parent, self.fco)
+        self.changes.set_attribute(child, 'name', 'child')
+        self.changes.set_pointer(child, 'target', parent)
+        self.changes.add_member(parent, 'members', child)
+        self.assertEqual(self.changes.get_pointer_path(child, 'target'), parent['nodePath'])
+
+        self.changes.flush()
+        self.assertEqual(self.names(parent), ['child'])
+        self.assertEqual(self.core.get_pointer_path(child, 'target'), parent['nodePath'])
+        self.assertEqual(self.core.get_member_paths(parent, 'members'), [child['nodePath']])
+
+    def test_pending_nodes_read_their_base(self):
+        instance = self.changes.create_child(self.root, self.proto)
+        self.assertEqual(self.changes.get_attribute(instance, 'name'), 'proto')
+        self.assertEqual(self.changes.get_base(instance), self.proto)
+        self.assertEqual(self.changes.get_parent(instance), self.root)
+
+    def test_inherited_children_of_pending_nodes(self):
+        instance = self.changes.create_child(self.root, self.proto)
+        port, = self.changes.load_children(instance)
+        unused_instance = self.changes.create_child(self.root, self.proto)
+        unused_port, = self.changes.load_children(unused_instance)
+        self.changes.set_attribute(port, 'name', 'renamed')
+
+        self.changes.flush()
+        self.assertEqual(self.names(instance), ['renamed'])
+        # Handles that were only read get their real path as well
+        self.assertNotIn(PROVISIONAL_MARK, unused_port['nodePath'])
+        self.assertEqual(self.core.get_attribute(unused_port, 'name'), 'port')
+
+    def test_deleted_nodes_drop_their_changes(self):
+        created = self.changes.create_child(self.root, self.fco)
+        self.changes.set_attribute(created, 'name', 'gone')
+        self.changes.delete_node(created)
+        self.changes.set_attribute(self.proto_child, 'name', 'changed')
+        self.changes.delete_node(self.proto)
+        self.assertNotIn(self.proto, self.changes.load_children(self.root))
+
+        self.changes.flush()
+        self.assertNotIn('gone', self.names(self.root))
+        self.assertIsNone(self.core.load_by_path(self.root, self.proto['nodePath']))
+
+    def test_copy_includes_buffered_changes(self):
+        self.changes.set_attribute(self.proto_child, 'name', 'changed')
+        copy = self.changes.copy_node(self.proto, self.root)
+        self.changes.flush()
+        self.assertEqual(self.core.get_attribute(copy, 'name'), 'proto')
+        self.assertEqual(self.names(copy), ['changed'])
+
+    def test_core_calls_flush_changed_arguments(self):
+        node = self.changes.create_child(self.root, self.fco)
+        self.changes.set_attribute(node, 'name', 'new')
+        self.assertEqual(self.changes.get_children_paths(node), [])
+        self.assertNotIn(PROVISIONAL_MARK, node['nodePath'])
+        self.assertEqual(len(self.changes), 0)
+
+    def test_buffer_is_reusable_after_flush(self):
+        first = self.changes.create_child(self.root, self.fco)
+        self.changes.flush()
+        second = self.changes.create_child(first, self.fco)
+        self.changes.set_attribute(second, 'name', 'second')
+        self.changes.flush()
+        self.assertEqual(self.names(first), ['second'])
+        self.assertEqual(self.changes._pending, {})
+        self.assertEqual(self.changes._resolved, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
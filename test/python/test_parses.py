@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from offline_project import load_plugin
+from launch_common import ParseCache
+from launch_common import parses
+
+LAUNCH = """<launch>
+  <arg name="robot" default="rover"/>
+  <include file="$(find pkg)/a.launch"><arg name="x" value="1"/></include>
+  <group ns="robot"><node pkg="p" type="t" name="n"/></group>
+  <test test-name="check" pkg="p" type="t"/>
+  <rosparam command="load">
+    a: 1
+  </rosparam>
+</launch>
+"""
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ParseCache(directory.name)
+        importer = load_plugin('ImportLaunch')
+        self.plugin = importer.__new__(importer)
+        self.parsed = 0
+
+    def parse(self, text: str):
+        def parse():
+            self.parsed += 1
+            return self.plugin.iter_ros_launch(text)
+        return parse
+
+    def events(self, text: str, version: int = 1) -> list:
+        return list(self.cache.events(ParseCache.key(text, version), self.parse(text)))
+
+    def test_replays_a_cached_parse(self):
+        expected = list(self.plugin.iter_ros_launch(LAUNCH))
+        self.assertEqual(self.events(LAUNCH), expected)
+        self.assertEqual(self.events(LAUNCH), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses, self.parsed), (1, 1, 1))
+        # The renames of the parser are in the cached events
+        self.assertIn(("start", "test", {"testName": "check", "pkg": "p", "type": "t"}), expected)
+
+    def test_replays_in_batches(self):
+        text = "<launch>" + '<node pkg="p" type="t"/>' * (parses.BATCH_SIZE * 2 + 1) + "</launch>"
+        expected = self.events(text)
+        self.assertEqual(self.events(text), expected)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_version_is_part_of_the_key(self):
+        self.events(LAUNCH, 1)
+        self.events(LAUNCH, 2)
+        self.assertEqual(self.parsed, 2)
+        self.assertNotEqual(ParseCache.key(LAUNCH, 1), ParseCache.key(LAUNCH, 2))
+
+    def test_broken_file_falls_back_to_parsing(self):
+        text = "<launch>" + '<node pkg="p" type="t"/>' * (parses.BATCH_SIZE * 4) + "</launch>"
+        expected = self.events(text)
+        path = self.cache._path(ParseCache.key(text, 1))
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:len(data) // 2])
+
+        with self.assertLogs('launch_common', 'WARNING'):
+            self.assertEqual(self.events(text), expected)
+        self.assertEqual(self.parsed, 2)
+        # Stored again in full
+        self.assertEqual(self.events(text), expected)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_failed_parse_is_not_stored(self):
+        with self.assertRaises(Exception):
+            self.events("<launch><node>")
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_unfinished_parse_is_not_stored(self):
+        events = self.cache.events(ParseCache.key(LAUNCH, 1), self.parse(LAUNCH))
+        next(events)
+        events.close()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_prunes_least_recently_used(self):
+        texts = [LAUNCH.replace("rover", f"rover{number}") for number in range(4)]
+        with mock.patch.object(parses, "MAX_FILES", 3):
+            for number, text in enumerate(texts[:3]):
+                self.events(text)
+                os.utime(self.cache._path(ParseCache.key(text, 1)), (number, number))
+            # Reading the oldest one marks it as used
+            self.events(texts[0])
+            self.events(texts[3])
+        kept = [text for text in texts if os.path.exists(self.cache._path(ParseCache.key(text, 1)))]
+        self.assertEqual(kept, [texts[0], texts[2], texts[3]])
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "needs uids")
+    def test_load_uses_a_private_directory_only(self):
+        with mock.patch.dict(os.environ, {"LAUNCH_PARSE_CACHE": self.cache.directory}):
+            self.assertEqual(ParseCache.load().directory, self.cache.directory)
+            os.chmod(self.cache.directory, 0o777)
+            with self.assertLogs('launch_common', 'WARNING'):
+                self.assertIsNone(ParseCache.load())
+
+
+if __name__ == '__main__':
+    unittest.main()
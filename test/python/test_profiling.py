@@ -0,0 +1,50 @@
+import json
+import logging
+import unittest
+from unittest import mock
+
+from offline_project import OfflineProject
+from launch_common import profiled
+from webgme_bindings import PluginBase
+
+
+class Plugin(PluginBase):
+    error = None
+
+    @profiled
+    def main(self):
+        self.core.get_children_paths(self.root_node)
+        if self.error is not None:
+            raise self.error
+
+
+class ProfiledTest(unittest.TestCase):
+
+    def setUp(self):
+        self.webgme = OfflineProject().webgme
+        self.webgme.config = {"profileRpc": True}
+        self.webgme.results = {}
+        logger = logging.getLogger('profiled_test')
+        self.plugin = Plugin(self.webgme, self.webgme.project.get_branch_hash('master'), 'master', '', [], '')
+        self.plugin.logger = logger
+
+    def test_report_is_added(self):
+        self.plugin.main()
+        report = json.loads(self.webgme.results["Plugin_rpc_profile.json"])
+        self.assertIn("core.get_children_paths", [row["method"] for row in report["methods"]])
+
+    def test_failed_report_keeps_the_error_of_the_run(self):
+        self.plugin.error = ValueError("run failed")
+        with mock.patch.object(Plugin, 'add_file', side_effect=RuntimeError("connection lost")):
+            with self.assertLogs('profiled_test', 'ERROR') as logs, self.assertRaisesRegex(ValueError, "run failed"):
+                self.plugin.main()
+        self.assertIn("connection lost", logs.output[0])
+
+    def test_failed_report_does_not_fail_the_run(self):
+        with mock.patch.object(Plugin, 'add_file', side_effect=RuntimeError("connection lost")):
+            with self.assertLogs('profiled_test', 'ERROR'):
+                self.plugin.main()
+
+
+if __name__ == '__main__':
+    unittest.main()
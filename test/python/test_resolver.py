@@ -0,0 +1,97 @@
+import unittest
+
+from offline_project import OfflineProject
+from launch_common import LaunchResolver, ModelSnapshot
+
+LAUNCH = """<launch>
+  <arg name="robot" default="rover"/>
+  <arg name="sim" default="false"/>
+  <arg name="fixed" value="$(arg robot)_fixed"/>
+  <arg name="required"/>
+  <param name="global" value="$(arg fixed)"/>
+  <group ns="$(arg robot)">
+    <param name="rate" value="10" type="int"/>
+    <group ns="inner">
+      <node pkg="rospy_tutorials" type="talker" name="talker">
+        <param name="~private" value="1.5"/>
+        <param name="relative" value="true"/>
+      </node>
+    </group>
+    <node pkg="rospy_tutorials" type="listener" name="sim_only" if="$(arg sim)"/>
+    <node pkg="rospy_tutorials" type="listener" name="real_only" unless="$(arg sim)"/>
+    <node pkg="rospy_tutorials" type="listener" name="listener" ns="sub"/>
+  </group>
+  <param name="home" value="$(env HOME)"/>
+  <param name="user" value="$(optenv USER nobody)"/>
+</launch>
+"""
+
+
+class LaunchResolverTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.project = OfflineProject()
+        cls.launch_file = cls.project.load(cls.project.import_launch(LAUNCH))
+
+    def resolve(self, args: dict = None, env: dict = None) -> dict:
+        model = ModelSnapshot.load(self.project.core, self.launch_file)
+        return LaunchResolver(model, args, env).resolve(self.launch_file)
+
+    def test_arg_precedence(self):
+        result = self.resolve({"required": "x"})
+        self.assertEqual(result["args"]["robot"], "rover")
+        self.assertEqual(result["args"]["fixed"], "rover_fixed")
+        self.assertEqual(result["errors"], [])
+
+        result = self.resolve({"required": "x", "robot": "drone"})
+        self.assertEqual(result["args"]["robot"], "drone")
+        self.assertEqual(result["args"]["fixed"], "drone_fixed")
+        self.assertEqual(result["params"]["/global"], "drone_fixed")
+
+        # An arg with a value can not be set from outside
+        result = self.resolve({"required": "x", "fixed": "other"})
+        self.assertNotIn("fixed", result["args"])
+        self.assertTrue(any("cannot override arg 'fixed'" in error for error in result["errors"]))
+
+    def test_missing_arg_is_an_error(self):
+        result = self.resolve()
+        self.assertTrue(any("arg 'required' is required" in error for error in result["errors"]))
+
+    def test_if_and_unless(self):
+        names = [node["name"] for node in self.resolve({"required": "x"})["nodes"]]
+        self.assertIn("/rover/real_only", names)
+        self.assertNotIn("/rover/sim_only", names)
+
+        result = self.resolve({"required": "x", "sim": "true"})
+        names = [node["name"] for node in result["nodes"]]
+        self.assertIn("/rover/sim_only", names)
+        self.assertNotIn("/rover/real_only", names)
+        self.assertEqual(len(result["pruned"]), 1)
+
+    def test_namespaces_and_private_params(self):
+        result = self.resolve({"required": "x"})
+        names = [node["name"] for node in result["nodes"]]
+        self.assertIn("/rover/inner/talker", names)
+        self.assertIn("/rover/sub/listener", names)
+        params = result["params"]
+        self.assertEqual(params["/rover/rate"], 10)
+        self.assertEqual(params["/rover/inner/talker/private"], 1.5)
+        self.assertEqual(params["/rover/inner/talker/relative"], True)
+
+    def test_env_is_kept_without_an_environment(self):
+        result = self.resolve({"required": "x"})
+        self.assertEqual(result["params"]["/home"], "$(env HOME)")
+        self.assertIn("$(env HOME)", result["unresolved"])
+        self.assertEqual(result["params"]["/user"], "nobody")
+
+        result = self.resolve({"required": "x"}, {"HOME": "/home/ros", "USER": "ros"})
+        self.assertEqual(result["params"]["/home"], "/home/ros")
+        self.assertEqual(result["params"]["/user"], "ros")
+
+        result = self.resolve({"required": "x"}, {})
+        self.assertTrue(any("environment variable 'HOME' is not set" in error for error in result["errors"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import json
+import unittest
+import zipfile
+
+from offline_project import OfflineProject
+from launch_common import ModelSnapshot, startup_layers
+from launch_common.startup import _components
+
+
+def library_node(name: str, publishers: list = None, subscribers: list = None) -> dict:
+    return {"node": name, "publishers": publishers, "subscribers": subscribers}
+
+
+LIBRARY = [
+    {"package": "graph",
+     "nodes": [
+         # Chain: a -> b -> c
+         library_node("chain_a", ["ab"]),
+         library_node("chain_b", ["bc"], ["ab"]),
+         library_node("chain_c", None, ["bc"]),
+         # Diamond: a -> b, a -> c, b -> d, c -> d
+         library_node("diamond_a", ["x"]),
+         library_node("diamond_b", ["y"], ["x"]),
+         library_node("diamond_c", ["z"], ["x"]),
+         library_node("diamond_d", None, ["y", "z"]),
+         # Two nodes publishing to each other
+         library_node("cycle_a", ["p"], ["q"]),
+         library_node("cycle_b", ["q"], ["p"]),
+         # A node subscribing to itself, after a node it waits for
+         library_node("loop_source", ["in"]),
+         library_node("loop", ["self"], ["self", "in"])
+     ],
+     "launch_files": []}
+]
+
+
+def launch(*types: str) -> str:
+    nodes = "".join(f'<node pkg="graph" type="{node_type}" name="{node_type}"/>' for node_type in types)
+    return f"<launch>{nodes}</launch>"
+
+
+class StartupLayersTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.project = OfflineProject(LIBRARY)
+
+    def layers(self, *types: str) -> dict:
+        path = self.project.import_launch(launch(*types))
+        self.project.run('MakeConnections', path)
+        launch_file = self.project.load(path)
+        report = startup_layers(ModelSnapshot.load(self.project.core, launch_file), launch_file)
+        names = report["names"]
+        return {
+            "layers": [sorted(names[unit] for unit in layer) for layer in report["layers"]],
+            "cycles": [sorted(names[unit] for unit in cycle) for cycle in report["cycles"]],
+            "critical_path": [[names[unit] for unit in step["units"]] for step in report["critical_path"]],
+            "topics": [step["topics"] for step in report["critical_path"]]
+        }
+
+    def test_chain(self):
+        report = self.layers("chain_c", "chain_b", "chain_a")
+        self.assertEqual(report["layers"], [["chain_a"], ["chain_b"], ["chain_c"]])
+        self.assertEqual(report["critical_path"], [["chain_a"], ["chain_b"], ["chain_c"]])
+        self.assertEqual(report["topics"], [["ab"], ["bc"], []])
+        self.assertEqual(report["cycles"], [])
+
+    def test_diamond(self):
+        report = self.layers("diamond_a", "diamond_b", "diamond_c", "diamond_d")
+        self.assertEqual(report["layers"], [["diamond_a"], ["diamond_b", "diamond_c"], ["diamond_d"]])
+        self.assertEqual(len(report["critical_path"]), 3)
+        # Ties go to the unit that comes first in the launch file
+        self.assertEqual(report["critical_path"][1], ["diamond_b"])
+
+    def test_two_cycle(self):
+        report = self.layers("cycle_a", "cycle_b", "chain_c")
+        self.assertEqual(report["layers"], [["chain_c", "cycle_a", "cycle_b"]])
+        self.assertEqual(report["cycles"], [["cycle_a", "cycle_b"]])
+
+    def test_self_loop(self):
+        report = self.layers("loop", "loop_source")
+        self.assertEqual(report["layers"], [["loop_source"], ["loop"]])
+        self.assertEqual(report["cycles"], [])
+
+    def test_export_with_params(self):
+        path = self.project.import_launch(launch("chain_a", "chain_b"))
+        self.project.run('MakeConnections', path)
+        self.project.run('ExportLaunch', path, stageStartup=True, dumpParams=True)
+        (name, data), = self.project.webgme.results.items()
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            params = json.loads(archive.read(manifest["params"]))
+        self.assertEqual([stage["units"] for stage in manifest["stages"]], [["chain_a"], ["chain_b"]])
+        self.assertEqual(sorted(node["name"] for node in params["nodes"]), ["/chain_a", "/chain_b"])
+
+
+class ComponentsTest(unittest.TestCase):
+
+    def test_components(self):
+        edges = {"a": {"b"}, "b": {"c"}, "c": {"b", "d"}, "d": {"d"}}
+        components = sorted(sorted(component) for component in _components(["a", "b", "c", "d", "e"], edges))
+        self.assertEqual(components, [["a"], ["b", "c"], ["d"], ["e"]])
+
+    def test_long_chain(self):
+        units = [str(number) for number in range(5000)]
+        edges = {unit: {units[number + 1]} for number, unit in enumerate(units[:-1])}
+        edges[units[-1]] = {units[0]}
+        self.assertEqual(len(_components(units, edges)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import logging
+import threading
+import unittest
+
+import offline_project  # noqa: F401, puts src/common on sys.path
+from launch_common import ContextPool
+from launch_common import worker
+
+
+class JobOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('launch_common')
+        self.level = self.logger.level
+        self.logger.setLevel(logging.INFO)
+        self.addCleanup(self.logger.setLevel, self.level)
+
+    def run_job(self, job):
+        """Collects the output of job like run_job does, returns the lines"""
+        output = worker._JobOutput()
+        token = worker._current_job.set(output)
+        self.logger.addHandler(output)
+        try:
+            job()
+        finally:
+            self.logger.removeHandler(output)
+            worker._current_job.reset(token)
+        return [line.rsplit(' - ', 1)[1] for line in output.lines]
+
+    def test_logs_of_the_pool_threads_are_kept(self):
+        def job():
+            self.logger.info("job")
+            with ContextPool(max_workers=2) as pool:
+                list(pool.map(lambda number: self.logger.info(f"task {number}"), range(3)))
+        self.assertEqual(sorted(self.run_job(job)), ["job", "task 0", "task 1", "task 2"])
+
+    def test_logs_of_other_jobs_are_left_out(self):
+        other_started, other_done = threading.Event(), threading.Event()
+
+        def other():
+            other_started.wait(5)
+            self.logger.info("other")
+            other_done.set()
+
+        def job():
+            self.logger.info("job")
+            other_started.set()
+            other_done.wait(5)
+
+        thread = threading.Thread(target=other, daemon=True)
+        thread.start()
+        lines = self.run_job(job)
+        thread.join()
+        self.assertEqual(lines, ["job"])
+
+
+if __name__ == '__main__':
+    unittest.main()